@@ -0,0 +1,207 @@
+import math
+import random
+import secrets
+
+import numpy as np
+
+from operations import get_operation
+from problems import DIFFICULTIES, generate_problems
+
+# Weight of the newest attempt in the moving averages once a skill has history
+ALPHA = 0.15
+# A level counts as mastered after this many attempts at this accuracy and speed
+MIN_ATTEMPTS = 5
+MASTERY_ACCURACY = 0.85
+TARGET_TIME = 8.0  # seconds
+# Drop back a level when overall accuracy at the current one falls below this
+STRUGGLE_ACCURACY = 0.35
+# Extra pull toward skills with little history, shrinking as attempts grow
+EXPLORATION = 0.5
+# Problems drawn per pick; the one served is chosen by its operand bucket's weakness
+CANDIDATES = 4
+
+
+class SkillStats:
+    """Running accuracy and exponentially weighted response time for one skill.
+
+    The first few attempts are plain averages (step 1/n) and later ones use
+    ALPHA, so early estimates aren't biased toward zero. Merging weighs each
+    side by its effective number of attempts.
+    """
+
+    __slots__ = ("attempts", "correct", "accuracy", "response_time")
+
+    def __init__(self, attempts=0, correct=0, accuracy=0.0, response_time=0.0):
+        self.attempts = attempts
+        self.correct = correct
+        self.accuracy = accuracy
+        self.response_time = response_time
+
+    def update(self, correct, response_time):
+        self.attempts += 1
+        self.correct += bool(correct)
+        step = max(ALPHA, 1.0 / self.attempts)
+        self.accuracy += (bool(correct) - self.accuracy) * step
+        self.response_time += (response_time - self.response_time) * step
+
+    def effective_attempts(self):
+        return min(self.attempts, 1.0 / ALPHA)
+
+    def merge(self, other):
+        mine, theirs = self.effective_attempts(), other.effective_attempts()
+        if theirs:
+            total = mine + theirs
+            self.accuracy = (self.accuracy * mine + other.accuracy * theirs) / total
+            self.response_time = (self.response_time * mine + other.response_time * theirs) / total
+        self.attempts += other.attempts
+        self.correct += other.correct
+        return self
+
+    def mastered(self):
+        return (self.attempts >= MIN_ATTEMPTS and self.accuracy >= MASTERY_ACCURACY
+                and self.response_time <= TARGET_TIME)
+
+    def weakness(self):
+        """Higher for inaccurate, slow or rarely practised skills."""
+        slowness = min(self.response_time / TARGET_TIME, 2.0)
+        return (1.0 - self.accuracy) + 0.5 * slowness + EXPLORATION / math.sqrt(self.attempts)
+
+
+class SkillBook:
+    """SkillStats per (operation, difficulty) for one learner or a whole class.
+
+    Each operation also has a current level that moves up once it is
+    mastered and back down when the learner struggles, so a single lucky or
+    unlucky answer doesn't flip it. Within a level, buckets holds SkillStats
+    per operand bucket (Operation.bucket, e.g. the divisor), which steer
+    which problem of that operation and level comes next.
+    """
+
+    def __init__(self):
+        self.skills = {}
+        self.levels = {}
+        self.buckets = {}
+
+    def get(self, operation, difficulty, bucket=None):
+        if bucket is None:
+            return self.skills.get((operation, difficulty))
+        return self.buckets.get((operation, difficulty, bucket))
+
+    def update(self, operation, difficulty, correct, response_time, bucket=None):
+        if bucket is not None:
+            key = (operation, difficulty, bucket)
+            stats = self.buckets.get(key)
+            if stats is None:
+                stats = self.buckets[key] = SkillStats()
+            stats.update(correct, response_time)
+
+        key = (operation, difficulty)
+        stats = self.skills.get(key)
+        if stats is None:
+            stats = self.skills[key] = SkillStats()
+        stats.update(correct, response_time)
+
+        if difficulty != self.level(operation) or stats.attempts < MIN_ATTEMPTS:
+            return
+        position = DIFFICULTIES.index(difficulty)
+        if stats.mastered() and position + 1 < len(DIFFICULTIES):
+            self.levels[operation] = DIFFICULTIES[position + 1]
+        elif stats.correct / stats.attempts < STRUGGLE_ACCURACY and position > 0:
+            self.levels[operation] = DIFFICULTIES[position - 1]
+
+    def merge(self, other):
+        for table, theirs in ((self.skills, other.skills), (self.buckets, other.buckets)):
+            for key, stats in theirs.items():
+                mine = table.get(key)
+                if mine is None:
+                    mine = table[key] = SkillStats()
+                mine.merge(stats)
+        self._relevel()
+        return self
+
+    def _relevel(self):
+        """Set each operation to its easiest unmastered level, e.g. after merging."""
+        self.levels = {}
+        for operation in {operation for operation, _ in self.skills}:
+            for difficulty in DIFFICULTIES:
+                stats = self.get(operation, difficulty)
+                if stats is None or not stats.mastered():
+                    break
+            self.levels[operation] = difficulty
+
+    def to_list(self):
+        """Rows of [operation, difficulty, bucket, attempts, correct, accuracy, response time];
+        bucket is None for a whole level."""
+        rows = [[operation, difficulty, None, s.attempts, s.correct, s.accuracy, s.response_time]
+                for (operation, difficulty), s in self.skills.items()]
+        rows += [[operation, difficulty, bucket, s.attempts, s.correct, s.accuracy,
+                  s.response_time]
+                 for (operation, difficulty, bucket), s in self.buckets.items()]
+        return rows
+
+    @classmethod
+    def from_list(cls, rows):
+        book = cls()
+        for operation, difficulty, bucket, *values in rows:
+            if bucket is None:
+                book.skills[(operation, difficulty)] = SkillStats(*values)
+            else:
+                book.buckets[(operation, difficulty, bucket)] = SkillStats(*values)
+        book._relevel()
+        return book
+
+    def level(self, operation):
+        """Difficulty the learner is currently practising for an operation."""
+        return self.levels.get(operation, DIFFICULTIES[0])
+
+    def weakness(self, operation, difficulty, bucket=None):
+        stats = self.get(operation, difficulty, bucket)
+        return 1.0 + EXPLORATION if stats is None or not stats.attempts else stats.weakness()
+
+    def choose(self, operation, rng):
+        """Pick the (operation, difficulty) to practise next, biased toward weak spots."""
+        members = getattr(get_operation(operation), "members", None) or [operation]
+        levels = [self.level(member) for member in members]
+        weights = [self.weakness(member, level) for member, level in zip(members, levels)]
+        pick = rng.choices(range(len(members)), weights=weights)[0]
+        return members[pick], levels[pick]
+
+    def prefer(self, operation, difficulty, problems, rng):
+        """Pick one of some (problem, answer) pairs, biased toward weak operand buckets.
+
+        Drawing a few problems and keeping one in proportion to its bucket's
+        weakness steers practice without listing the problem space.
+        """
+        kind = get_operation(operation)
+        weights = []
+        for problem, _ in problems:
+            parsed = kind.parse(problem)
+            weights.append(1.0 if parsed is None else
+                           self.weakness(operation, difficulty, kind.bucket(*parsed[1:])))
+        return problems[rng.choices(range(len(problems)), weights=weights)[0]]
+
+
+class AdaptiveQueue:
+    """Drop-in for ProblemQueue whose next problem depends on the learner's SkillBook.
+
+    Problems are generated one at a time because each answer can change the
+    next choice. The same seed replays the same choices for the same answers.
+    """
+
+    def __init__(self, operation, skills, seed=None):
+        self.operation = operation
+        self.difficulty = "Adaptive"
+        self.current_difficulty = None
+        self.skills = skills
+        self.seed = secrets.randbits(63) if seed is None else seed
+        self._choices = random.Random(self.seed)
+        self._rng = np.random.default_rng(self.seed)
+
+    def pop(self):
+        operation, difficulty = self.skills.choose(self.operation, self._choices)
+        self.current_difficulty = difficulty
+        candidates = generate_problems(operation, difficulty, CANDIDATES, seed=self._rng)
+        return self.skills.prefer(operation, difficulty, candidates, self._choices)
+
+    def replay(self):
+        return AdaptiveQueue(self.operation, self.skills, seed=self.seed)
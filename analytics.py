@@ -0,0 +1,424 @@
+"""Per-student and per-class reports over the attempt log.
+
+Analytics reads the attempt log in chunks into compact columns: typed
+arrays like AttemptHistory's, with students and operations stored as
+small integer codes. Each update reads only the records added since the
+last one. With a directory, the columns are also saved there: each update
+appends its new rows to one file per column and then rewrites a small JSON
+index. A later run, e.g. the next CLI call, then picks up where the last
+one stopped. A log that has been replaced or truncated is read again from
+the start.
+
+Reports are vectorized group-bys over the columns. The group keys are
+packed into one integer per row and numbered densely, and attempts and
+correct answers are counted with bincount. Medians are exact: the rows,
+kept in response-time order, are sorted stably by group, so each group's
+times come out in order. Each report can be limited to some students,
+e.g. one student or one class of a roster. The roster is a CSV file with
+user and class columns.
+
+    python -m analytics [--report skills] [--student ID | --class NAME] [--roster roster.csv]
+"""
+import argparse
+import array
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from attempt_log import DEFAULT_PATH as LOG_PATH
+from attempt_log import HEADER_SIZE, RECORD_DTYPE, iter_attempts
+from operations import get_operation
+from problems import DIFFICULTIES
+
+# Where the CLI keeps its columns unless MENTAL_MATH_ANALYTICS_DIR says otherwise
+DEFAULT_DIR = os.environ.get("MENTAL_MATH_ANALYTICS_DIR", os.path.join("data", "analytics"))
+# Class of every learner, as a CSV file with user and class columns
+ROSTER_PATH = os.environ.get("MENTAL_MATH_ROSTER", os.path.join("data", "roster.csv"))
+
+CHUNK_SIZE = 1_000_000
+REPORTS = ["skills", "missed", "weekly", "students", "classes"]
+UNASSIGNED = "Unassigned"
+
+# Column name -> array typecode (NumPy reads the same codes), 35 bytes per
+# attempt against the log's 94
+COLUMNS = {
+    "student": "I",         # code into Analytics.students
+    "operation": "B",       # code into Analytics.operations
+    "difficulty": "B",      # index into DIFFICULTIES
+    "correct": "B",
+    "timestamp": "d",
+    "response_time": "f",
+    "left": "q",
+    "right": "q",
+}
+
+
+def load_roster(path=ROSTER_PATH):
+    """{user id: class} from a roster CSV, or {} if there isn't one."""
+    try:
+        with open(path, newline="", encoding="utf-8") as roster:
+            return {row["user"].strip(): (row.get("class") or UNASSIGNED).strip()
+                    for row in csv.DictReader(roster) if row.get("user")}
+    except FileNotFoundError:
+        return {}
+
+
+class Analytics:
+    """Columns of every attempt in the log, updated incrementally, and reports over them.
+
+    Thread-safe within a process. Only one process should update a given
+    directory at a time.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.students = []
+        self.operations = []
+        self.records = 0  # log records read so far, including unreadable ones
+        self._codes = {"student": {}, "operation": {}}
+        self._columns = {name: array.array(code) for name, code in COLUMNS.items()}
+        self._saved = 0
+        self._snapshot = None
+        self._log_mark = None  # the log's first record, to notice a replaced log
+        self._lock = threading.Lock()
+        if directory is not None:
+            self._load()
+
+    def __len__(self):
+        return len(self._columns["student"])
+
+    # Ingestion
+
+    def update(self, path=LOG_PATH, chunk_size=CHUNK_SIZE):
+        """Read the records added to the log since the last update; returns how many."""
+        with self._lock:
+            if not os.path.exists(path):
+                return 0
+            count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            mark = self._mark(path) if count > 0 else None
+            if count < self.records or (self.records and mark != self._log_mark):
+                self._reset()
+            self._log_mark = mark
+            start = self.records
+            for chunk in iter_attempts(path, chunk_size, start=start):
+                self._append(chunk)
+                self.records += len(chunk)
+            if self.directory is not None and (self.records != start or self._saved != len(self)):
+                self._save()
+            return self.records - start
+
+    def _mark(self, path):
+        with open(path, "rb") as log:
+            log.seek(HEADER_SIZE)
+            return log.read(RECORD_DTYPE.itemsize).hex()
+
+    def _reset(self):
+        self.students, self.operations = [], []
+        self._codes = {"student": {}, "operation": {}}
+        self._columns = {name: array.array(code) for name, code in COLUMNS.items()}
+        self.records = 0
+        self._saved = -1  # rewrite the files from scratch
+
+    def _encode(self, field, values, names):
+        """Dictionary-encode a column of byte strings, adding new names to names."""
+        unique, inverse = np.unique(values, return_inverse=True)
+        codes = self._codes[field]
+        for value in unique.tolist():
+            if value not in codes:
+                codes[value] = len(names)
+                names.append(value.decode(errors="replace"))
+        return np.array([codes[value] for value in unique.tolist()],
+                        dtype=COLUMNS[field])[inverse.ravel()]
+
+    def _append(self, chunk):
+        chunk = np.asarray(chunk)
+        new = {
+            "student": self._encode("student", chunk["session"], self.students),
+            "operation": self._encode("operation", chunk["operation"], self.operations),
+            "difficulty": chunk["difficulty"],
+            "correct": chunk["correct"].view(np.uint8),
+            "timestamp": chunk["timestamp"],
+            "response_time": chunk["response_time"],
+            "left": chunk["left"],
+            "right": chunk["right"],
+        }
+        for name, column in self._columns.items():
+            column.frombytes(np.ascontiguousarray(new[name], dtype=column.typecode).tobytes())
+
+    # Storage
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self._path("index.json"), encoding="utf-8") as index:
+                meta = json.load(index)
+        except (FileNotFoundError, ValueError):
+            self._saved = -1
+            return
+        rows = meta["rows"]
+        try:
+            for name, column in self._columns.items():
+                with open(self._path(f"{name}.col"), "rb") as data:
+                    # Rows past the index were appended by an update that didn't finish
+                    column.fromfile(data, rows)
+        except (OSError, EOFError):
+            self._reset()
+            return
+        self.students, self.operations = meta["students"], meta["operations"]
+        self._codes = {"student": {s.encode(): i for i, s in enumerate(self.students)},
+                       "operation": {o.encode(): i for i, o in enumerate(self.operations)}}
+        self.records, self._log_mark, self._saved = meta["records"], meta["log_mark"], rows
+
+    def _save(self):
+        rows = len(self)
+        for name, column in self._columns.items():
+            start = max(self._saved, 0)
+            with open(self._path(f"{name}.col"), "r+b" if self._saved > 0 else "wb") as data:
+                data.seek(start * column.itemsize)
+                data.truncate()
+                data.write(memoryview(column)[start:].tobytes())
+        temporary = self._path("index.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as index:
+            json.dump({"rows": rows, "records": self.records, "log_mark": self._log_mark,
+                       "students": self.students, "operations": self.operations}, index)
+        os.replace(temporary, self._path("index.json"))
+        self._saved = rows
+
+    # Reports
+
+    def columns(self, students=None):
+        """NumPy copies of the columns, limited to the given student ids if any.
+
+        "by_time" lists the rows in order of response time, so group-bys can
+        read medians off it without sorting the times again.
+        """
+        with self._lock:
+            # Copied, since a typed array can't grow while NumPy views it; the
+            # copy is kept until the next update adds rows
+            if self._snapshot is None or len(self._snapshot["student"]) != len(self):
+                snapshot = {name: np.frombuffer(column, dtype=column.typecode).copy()
+                            for name, column in self._columns.items()}
+                snapshot["correct"] = snapshot["correct"].astype(bool)
+                snapshot["by_time"] = np.argsort(snapshot["response_time"], kind="stable")
+                self._snapshot = snapshot
+            columns = dict(self._snapshot)
+        if students is not None:
+            codes = self._codes["student"]
+            wanted = np.zeros(len(self.students) + 1, dtype=bool)
+            wanted[[codes[s.encode()] for s in students if s.encode() in codes]] = True
+            keep = wanted[columns["student"]]
+            order = columns.pop("by_time")
+            columns = {name: column[keep] for name, column in columns.items()}
+            # The kept rows' time order, renumbered to their new positions
+            columns["by_time"] = (np.cumsum(keep) - 1)[order[keep[order]]]
+        return columns
+
+    def skills(self, students=None):
+        """Attempts, accuracy and median time per operation and difficulty."""
+        columns = self.columns(students)
+        first, _, stats = _grouped(columns, ["operation", "difficulty"])
+        return _frame({
+            "Operation": _names(self.operations, columns["operation"][first]),
+            "Difficulty": _names(DIFFICULTIES, columns["difficulty"][first]),
+            **stats,
+        })
+
+    def most_missed(self, students=None, top=10):
+        """The problems missed most often, with how often they were tried."""
+        columns = self.columns(students)
+        first, _, stats = _grouped(columns, ["operation", "left", "right"], medians=False)
+        misses = stats["Attempts"] - stats["Correct"]
+        order = np.lexsort((-stats["Attempts"], -misses))[:top]
+        order = order[misses[order] > 0]
+        operations = _names(self.operations, columns["operation"][first[order]])
+        return _frame({
+            "Problem": [_problem(name, left, right) for name, left, right in
+                        zip(operations, columns["left"][first[order]].tolist(),
+                            columns["right"][first[order]].tolist())],
+            "Operation": operations,
+            "Misses": misses[order],
+            "Attempts": stats["Attempts"][order],
+            "Miss rate (%)": 100 * misses[order] / stats["Attempts"][order],
+        })
+
+    def weekly(self, students=None):
+        """Attempts, accuracy and median time per week, from Monday."""
+        columns = self.columns(students)
+        days = (columns["timestamp"] // 86400).astype(np.int64)
+        # 1970-01-01 was a Thursday
+        columns["week"] = days - (days + 3) % 7
+        first, _, stats = _grouped(columns, ["week"])
+        epoch = date(1970, 1, 1)
+        return _frame({
+            "Week of": [epoch + timedelta(days=day) for day in columns["week"][first].tolist()],
+            **stats,
+        })
+
+    def per_student(self, students=None, roster=None):
+        """Attempts, accuracy, median time and last activity per student."""
+        roster = roster or {}
+        columns = self.columns(students)
+        first, ids, stats = _grouped(columns, ["student"])
+        last = np.full(len(first), -np.inf)
+        np.maximum.at(last, ids, columns["timestamp"])
+        names = _names(self.students, columns["student"][first])
+        return _frame({
+            "Student": names,
+            "Class": [roster.get(student, UNASSIGNED) for student in names],
+            **stats,
+            "Last active": [time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+                            for ts in last.tolist()],
+        })
+
+    def per_class(self, roster, students=None):
+        """Students, attempts, accuracy and median time per roster class."""
+        columns = self.columns(students)
+        classes = sorted(set(roster.values()) | {UNASSIGNED})
+        position = {name: i for i, name in enumerate(classes)}
+        lookup = np.array([position[roster.get(student, UNASSIGNED)]
+                           for student in self.students] or [0], dtype=np.int64)
+        columns["class"] = lookup[columns["student"]]
+        first, _, stats = _grouped(columns, ["class"])
+        active = np.flatnonzero(np.bincount(columns["student"], minlength=len(self.students)))
+        learners = np.bincount(lookup[active], minlength=len(classes))
+        return _frame({
+            "Class": _names(classes, columns["class"][first]),
+            "Students": learners[columns["class"][first]],
+            **stats,
+        })
+
+    def class_members(self, roster, name):
+        """Student ids of a roster class; UNASSIGNED is everyone the roster leaves out."""
+        if name == UNASSIGNED:
+            return [student for student in self.students if student not in roster]
+        return [student for student, klass in roster.items() if klass == name]
+
+
+def _group_ids(columns, keys):
+    """(dense group id per row, number of groups), with ids in the order of the keys."""
+    rows = len(columns["student"])
+    combined = np.zeros(rows, dtype=np.int64)
+    span = 1
+    for key in keys:
+        values = columns[key].astype(np.int64)
+        low = int(values.min()) if rows else 0
+        size = int(values.max()) - low + 1 if rows else 1
+        if span * size >= 2 ** 62:
+            # Too wide to pack; number the groups so far first
+            combined = np.unique(combined, return_inverse=True)[1].ravel()
+            span = int(combined.max()) + 1 if rows else 1
+        combined = combined * size + (values - low)
+        span *= size
+    if span <= 4 * rows + 1024:
+        # Few enough possible keys to number the ones present with a count
+        present = np.bincount(combined, minlength=span) > 0
+        dense = np.cumsum(present) - 1
+        return dense[combined], int(present.sum())
+    unique, ids = np.unique(combined, return_inverse=True)
+    return ids.ravel(), len(unique)
+
+
+def _grouped(columns, keys, medians=True):
+    """(first row of each group, group id per row, per-group stats), in key order.
+
+    With medians, the first row is the group's fastest; without, its earliest.
+    """
+    ids, groups = _group_ids(columns, keys)
+    attempts = np.bincount(ids, minlength=groups)
+    correct = np.bincount(ids, weights=columns["correct"], minlength=groups).astype(np.int64)
+    # A stable sort of 16-bit ids is a radix sort
+    stats = {
+        "Attempts": attempts,
+        "Correct": correct,
+        "Accuracy (%)": 100 * correct / np.maximum(attempts, 1),
+    }
+    if not medians:
+        first = np.full(groups, len(ids), dtype=np.int64)
+        np.minimum.at(first, ids, np.arange(len(ids)))
+        return first, ids, stats
+    narrow = ids.astype(np.uint16) if groups <= 2 ** 16 else ids
+    order = columns["by_time"]
+    order = order[np.argsort(narrow[order], kind="stable")]
+    starts = np.cumsum(attempts) - attempts
+    times = columns["response_time"][order].astype(np.float64)
+    stats["Median time (s)"] = (times[starts + (attempts - 1) // 2]
+                                + times[starts + attempts // 2]) / 2
+    return order[starts], ids, stats
+
+
+def _names(names, codes):
+    return [names[code] for code in codes.tolist()]
+
+
+def _problem(operation, left, right):
+    try:
+        return get_operation(operation).format(left, right)
+    except (ValueError, IndexError, KeyError):
+        return f"{left} ? {right}"
+
+
+def _frame(data):
+    import pandas as pd
+    return pd.DataFrame(data)
+
+
+def report(analytics, name, students=None, roster=None, top=10):
+    """One of REPORTS as a DataFrame."""
+    if name == "skills":
+        return analytics.skills(students)
+    if name == "missed":
+        return analytics.most_missed(students, top)
+    if name == "weekly":
+        return analytics.weekly(students)
+    if name == "students":
+        return analytics.per_student(students, roster)
+    if name == "classes":
+        return analytics.per_class(roster or {}, students)
+    raise ValueError(f"Unknown report: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--report", default="skills", choices=REPORTS)
+    parser.add_argument("--student", help="limit the report to one student id")
+    parser.add_argument("--class", dest="klass", help="limit the report to one roster class")
+    parser.add_argument("--roster", default=ROSTER_PATH, help="CSV file with user and class columns")
+    parser.add_argument("--log", default=LOG_PATH, help="attempt log to read")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="where the columns are kept between runs")
+    parser.add_argument("--top", type=int, default=10, help="problems in the missed report")
+    parser.add_argument("--format", default="table", choices=["table", "csv", "json"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    analytics = Analytics(args.dir)
+    new = analytics.update(args.log)
+    print(f"Read {new:,} new attempts ({len(analytics):,} in all) in "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    roster = load_roster(args.roster)
+    students = None
+    if args.student:
+        students = [args.student]
+    elif args.klass:
+        students = analytics.class_members(roster, args.klass)
+    frame = report(analytics, args.report, students, roster, args.top)
+    if args.format == "csv":
+        frame.to_csv(sys.stdout, index=False)
+    elif args.format == "json":
+        frame.to_json(sys.stdout, orient="records", lines=True, date_format="iso")
+    else:
+        print(frame.to_string(index=False, float_format=lambda value: f"{value:.1f}")
+              if len(frame) else "No attempts yet.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Answer box and numpad that check answers in the browser.
+
+The component gets the current answer masked with a one-time key, plus the
+operation's tolerance. It checks every keystroke locally, with the same
+grammar as answers.parse_answer, and sends one message to the server when
+the answer is right: the typed answer and the seconds the player took. Its
+Skip button sends whatever is typed instead. Wrong attempts never leave the
+browser. The mask only keeps the answer out of plain sight in the page.
+Scores stay trustworthy because the server checks the reported answer again
+against its own copy, and times the attempt on its own clock.
+"""
+import base64
+import os
+import secrets
+
+import streamlit.components.v1 as components
+
+_component = components.declare_component(
+    "answer_pad",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "answer_pad"),
+)
+
+
+def mask_answer(answer):
+    """(masked, key): the answer's text XORed with a random key, both base64."""
+    text = repr(float(answer)).encode()
+    key = secrets.token_bytes(len(text))
+    masked = bytes(a ^ b for a, b in zip(text, key))
+    return base64.b64encode(masked).decode(), base64.b64encode(key).decode()
+
+
+def unmask_answer(masked, key):
+    """Inverse of mask_answer, as the component does it."""
+    masked, key = base64.b64decode(masked), base64.b64decode(key)
+    return float(bytes(a ^ b for a, b in zip(masked, key)).decode())
+
+
+def answer_pad(problem_id, mask, operation, key, rejected=0, on_change=None):
+    """Render the pad for one problem, given its answer's mask from mask_answer.
+
+    Keep the same mask for as long as the problem is shown. Raise rejected
+    each time the server turns down a report: the pad stops reporting once
+    it has sent one, and starts again when rejected goes up. Returns the
+    last report for this key, {"problem_id", "answer", "elapsed"} plus
+    "skip": True for a skip, or None before the pad has reported.
+    """
+    masked, mask_key = mask
+    return _component(
+        problem_id=problem_id,
+        masked=masked,
+        mask_key=mask_key,
+        tolerance=float(operation.tolerance),
+        inclusive=operation.tolerance_inclusive,
+        rejected=rejected,
+        key=key,
+        default=None,
+        on_change=on_change,
+    )
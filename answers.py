@@ -0,0 +1,75 @@
+"""Exact answers: integers and Fractions, never float division.
+
+Correct answers are ints or Fractions from the operation's operands.
+Typed answers are read as the decimal that was typed, so 33.3 is exactly
+333/10. A check is then one exact subtraction and comparison against the
+operation's tolerance. Floats, e.g. answers stored in a problem index, are
+taken at the shortest decimal that prints as them.
+
+format_answer is how every page and export shows an answer.
+"""
+import math
+import numbers
+import re
+from fractions import Fraction
+
+import numpy as np
+
+_NUMBER = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+# Longest typed answer, in digits; every drill's answers fit in far fewer, and
+# longer ones would overflow the float kept in the history and attempt log
+MAX_DIGITS = 30
+
+
+def exact(value):
+    """value as an int or Fraction; floats are read as the decimal they print as.
+
+    Infinities and NaN stay floats, which no tolerance check accepts.
+    """
+    if isinstance(value, (int, Fraction)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    value = float(value)
+    return Fraction(repr(value)) if math.isfinite(value) else value
+
+
+def parse_answer(text):
+    """A typed answer as an exact number: at most MAX_DIGITS digits with an optional
+    sign, point, thousands commas and trailing %. Raises ValueError for anything else."""
+    text = str(text).strip().removesuffix("%").replace(",", "").strip()
+    # Fraction() would also take "1/3", which answers a conversion drill with its
+    # own question, and "1e999999999", which it would expand digit by digit
+    match = _NUMBER.fullmatch(text)
+    if match is None or not (match[2] or match[3]):
+        raise ValueError(f"not a number: {text!r}")
+    if len(match[2]) + len(match[3] or "") > MAX_DIGITS:
+        raise ValueError(f"more than {MAX_DIGITS} digits: {text[:40]!r}")
+    sign, whole, decimals = match[1], match[2], (match[3] or "").rstrip("0")
+    value = int(sign + (whole or "0") + decimals)
+    return Fraction(value, 10 ** len(decimals)) if decimals else value
+
+
+def format_answer(value):
+    """An answer as shown: whole numbers as integers, others to at most three decimals."""
+    value = float(value)
+    if math.isfinite(value) and value % 1 == 0:
+        return str(int(value))
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def format_answers(values):
+    """format_answer over an array, with whole numbers that fit in int64 converted at once."""
+    values = np.asarray(values, dtype=np.float64)
+    whole = np.isfinite(values) & (np.abs(values) < 2 ** 63)
+    whole[whole] = values[whole] % 1 == 0
+    text = np.empty(len(values), dtype=object)
+    text[whole] = values[whole].astype(np.int64).astype(str)
+    text[~whole] = [format_answer(value) for value in values[~whole].tolist()]
+    return text
+
+
+def round_half_up(value, places=0):
+    """A non-negative exact value rounded half up, in units of 10 ** -places, as an int."""
+    value = Fraction(value) * 10 ** places
+    return (2 * value.numerator + value.denominator) // (2 * value.denominator)
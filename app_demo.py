@@ -1,5 +1,28 @@
+import functools
+import os
+import time
+import uuid
+
 import streamlit as st
-import random
+
+from adaptive import AdaptiveQueue
+from answer_pad import answer_pad, mask_answer
+from answers import parse_answer
+from leaderboard import WINDOWS
+from operations import get_operation, operation_names
+from page_assets import how_it_works, stylesheet
+from problem_queue import ProblemQueue
+from problems import DIFFICULTIES
+from quiz_session import QuizSession
+from resources import attempt_log, leaderboard, server_metrics, session_store
+from review import ReviewQueue, ReviewSchedule, schedule_path
+from worksheet import FORMATS, export_bytes
+
+# Problems generated when a sprint starts, and again each time it runs out
+SPRINT_BATCH = 64
+
+# Server time for this run, reported at the end of the script
+page_started = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -8,281 +31,59 @@ st.set_page_config(
     layout="centered"
 )
 
+# Shared by every session in this process (see resources.py), looked up once per run
+metrics = server_metrics()
+store = session_store()
+
 # Custom CSS for better button layout on mobile (especially Safari iOS)
-st.markdown("""
-<style>
-    /* Compact spacing throughout the app */
-    .block-container {
-        padding-top: 1rem !important;
-        padding-bottom: 1rem !important;
-        padding-left: 0.5rem !important;
-        padding-right: 0.5rem !important;
-        max-width: 100% !important;
-    }
-
-    /* Prevent horizontal overflow */
-    .main .block-container {
-        overflow-x: hidden !important;
-    }
-
-    /* Make buttons compact but touch-friendly */
-    .stButton > button {
-        height: 55px;
-        font-size: 22px;
-        font-weight: bold;
-        margin: 0px;
-        padding: 0.2rem;
-        width: 100%;
-        box-sizing: border-box;
-    }
-
-    /* Reduce spacing in markdown elements */
-    h1 {
-        margin-top: 0.5rem !important;
-        margin-bottom: 0.5rem !important;
-        font-size: 1.8rem !important;
-    }
-
-    h3 {
-        margin-top: 0.3rem !important;
-        margin-bottom: 0.3rem !important;
-        font-size: 1.3rem !important;
-    }
-
-    /* Compact progress bar */
-    .stProgress {
-        margin-top: 0.3rem !important;
-        margin-bottom: 0.3rem !important;
-    }
-
-    /* Compact horizontal rules */
-    hr {
-        margin-top: 0.5rem !important;
-        margin-bottom: 0.5rem !important;
-    }
-
-    /* Numpad container */
-    .numpad-container {
-        text-align: left !important;
-        font-size: 0 !important; /* Remove whitespace between inline-block elements */
-    }
-
-    /* Make buttons display in a 3-column grid */
-    .numpad-container .stButton {
-        display: inline-block !important;
-        width: 31% !important;
-        margin: 0.5% !important;
-        margin-bottom: 0.3rem !important;
-        vertical-align: top !important;
-        box-sizing: border-box !important;
-        font-size: 1rem !important; /* Reset font size */
-    }
-
-    .numpad-container .stButton > button {
-        width: 100% !important;
-    }
-
-    /* Force columns to stay horizontal - use multiple selectors for Safari compatibility */
-    div[data-testid="column"] {
-        min-width: 0 !important;
-        flex: 1 1 0 !important;
-        padding: 0 0.25rem !important;
-        margin: 0 !important;
-        box-sizing: border-box !important;
-    }
-
-    /* Remove Streamlit's default column padding */
-    div[data-testid="column"] > div {
-        padding: 0 !important;
-    }
-
-    /* Override Streamlit's mobile responsive behavior */
-    div[data-testid="stHorizontalBlock"] {
-        display: -webkit-box !important;
-        display: -webkit-flex !important;
-        display: -ms-flexbox !important;
-        display: flex !important;
-        -webkit-flex-direction: row !important;
-        -ms-flex-direction: row !important;
-        flex-direction: row !important;
-        -webkit-flex-wrap: nowrap !important;
-        -ms-flex-wrap: nowrap !important;
-        flex-wrap: nowrap !important;
-        gap: 0 !important;
-        margin-bottom: 0.2rem !important;
-        width: 100% !important;
-        max-width: 100% !important;
-        box-sizing: border-box !important;
-        padding: 0 !important;
-    }
-
-    /* Prevent column stacking on mobile - Safari specific */
-    @media (max-width: 768px) {
-        /* Tighter container on mobile */
-        .block-container {
-            padding-left: 0.25rem !important;
-            padding-right: 0.25rem !important;
-        }
-
-        div[data-testid="column"] {
-            flex: 0 0 31% !important;
-            -webkit-flex: 0 0 31% !important;
-            max-width: 31% !important;
-            min-width: 0 !important;
-            width: 31% !important;
-            padding: 0 !important;
-            margin: 0 !important;
-        }
-
-        div[data-testid="column"] > div {
-            padding: 0 !important;
-        }
-
-        div[data-testid="stHorizontalBlock"] {
-            flex-direction: row !important;
-            -webkit-flex-direction: row !important;
-            flex-wrap: nowrap !important;
-            -webkit-flex-wrap: nowrap !important;
-            gap: 1.5% !important;
-            padding: 0 !important;
-        }
-
-        /* Button grid on mobile */
-        .numpad-container .stButton {
-            width: 30.5% !important;
-            margin: 0.75% !important;
-            margin-bottom: 0.3rem !important;
-        }
-
-        /* Smaller buttons and fonts on mobile */
-        .stButton > button {
-            height: 42px;
-            font-size: 17px;
-            padding: 0.1rem;
-            margin: 0;
-            width: 100% !important;
-        }
-
-        h1 {
-            font-size: 1.3rem !important;
-        }
-
-        h3 {
-            font-size: 0.95rem !important;
-        }
-
-        /* Compact metrics on mobile */
-        [data-testid="stMetricValue"] {
-            font-size: 1rem !important;
-        }
-
-        [data-testid="stMetricLabel"] {
-            font-size: 0.8rem !important;
-        }
-
-        /* Smaller progress text */
-        p, .stMarkdown {
-            font-size: 0.9rem !important;
-        }
-    }
-
-    /* Make metric cards more compact */
-    [data-testid="stMetricValue"] {
-        font-size: 1.4rem;
-    }
-
-    /* Reduce padding in metrics */
-    [data-testid="metric-container"] {
-        padding: 0.5rem 0.5rem !important;
-    }
-
-    /* Compact error/success messages */
-    .stAlert {
-        padding: 0.5rem !important;
-        margin-top: 0.3rem !important;
-        margin-bottom: 0.3rem !important;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-def generate_problem(operation, difficulty):
-    """Generate a math problem based on operation and difficulty."""
-    if difficulty == "Easy":
-        min_num, max_num = 1, 10
-    elif difficulty == "Medium":
-        min_num, max_num = 10, 50
-    else:  # Hard
-        min_num, max_num = 50, 100
-
-    num1 = random.randint(min_num, max_num)
-    num2 = random.randint(min_num, max_num)
-
-    if operation == "Mixed":
-        operation = random.choice(["Addition", "Subtraction",
-                                   "Multiplication", "Division"])
-
-    if operation == "Addition":
-        problem = f"{num1} + {num2}"
-        answer = num1 + num2
-    elif operation == "Subtraction":
-        if num1 < num2:
-            num1, num2 = num2, num1
-        problem = f"{num1} - {num2}"
-        answer = num1 - num2
-    elif operation == "Multiplication":
-        problem = f"{num1} × {num2}"
-        answer = num1 * num2
-    elif operation == "Division":
-        num1 = num2 * random.randint(2, 10)
-        problem = f"{num1} ÷ {num2}"
-        answer = num1 // num2
-    elif operation == "Ratio to %":
-        # Generate ratios with different denominators based on difficulty
-        if difficulty == "Easy":
-            denominators = [2, 4, 5, 10]  # 1/2=50%, 1/4=25%, etc.
-        elif difficulty == "Medium":
-            denominators = [2, 3, 4, 5, 8, 10, 20]
-        else:  # Hard
-            denominators = [2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 15, 16, 20, 25]
-
-        denominator = random.choice(denominators)
-        numerator = random.randint(1, denominator)
-        problem = f"{numerator}/{denominator}"
-        answer = round((numerator / denominator) * 100, 1)  # Store as percentage with 1 decimal
-    elif operation == "Multiply by %":
-        # Generate percentage multiplications with increasing scale
-        if difficulty == "Easy":
-            base_num = random.randint(10, 100)  # 10-100
-            percentage = random.choice([1, 5, 10, 25, 50])
-        elif difficulty == "Medium":
-            base_num = random.randint(100, 10000)  # 100-10,000
-            percentage = random.choice([1, 5, 10, 15, 20, 25, 50, 75])
-        else:  # Hard
-            base_num = random.randint(10000, 1000000)  # 10,000-1,000,000
-            percentage = random.choice([1, 2, 5, 10, 15, 20, 25, 30, 50, 75])
-
-        problem = f"{percentage}% of {base_num:,}"
-        answer = round((percentage / 100) * base_num)
-
-    return problem, answer
+st.markdown(stylesheet(), unsafe_allow_html=True)
+
+
+def session():
+    """This learner's Session, brought back from its snapshot if it was evicted while idle."""
+    current = store.resume(st.session_state.session)
+    if current is not st.session_state.session:
+        st.session_state.session = current
+    # A restored quiz comes back without its hook
+    if current.quiz is not None and current.quiz.on_attempt is None:
+        current.quiz.on_attempt = log_attempt
+    return current
+
+
+def quiz_seed():
+    """Seed for the next quiz, drawn from this session's generator."""
+    return session().rng.getrandbits(63)
+
+
+def review_schedule():
+    """This learner's review schedule, opened on first use."""
+    if session().review_schedule is None:
+        session().review_schedule = ReviewSchedule(schedule_path(st.session_state.user_id))
+    return session().review_schedule
+
+
+def log_attempt(quiz, attempt):
+    """Persist an accepted or skipped problem and feed it to the histograms and review schedule."""
+    metrics.observe("mental_math_response_seconds", attempt.response_time,
+                    operation=quiz.queue.operation, difficulty=attempt.difficulty)
+    if quiz.queue.difficulty == "Review":
+        review_schedule().reviewed(attempt.operation, attempt.problem, attempt.correct)
+    elif not attempt.correct:
+        review_schedule().missed(attempt.operation, attempt.difficulty, attempt.problem,
+                                 attempt.correct_answer)
+    attempt_log().append(
+        session=st.session_state.user_id,
+        operation=quiz.queue.operation,
+        difficulty=attempt.difficulty,
+        problem=attempt.problem,
+        answer=attempt.correct_answer,
+        user_answer=attempt.user_answer,
+        correct=attempt.correct,
+        response_time=attempt.response_time,
+    )
+
 
 # Initialize session state
-if 'score' not in st.session_state:
-    st.session_state.score = 0
-if 'total_attempts' not in st.session_state:
-    st.session_state.total_attempts = 0
-if 'current_problem' not in st.session_state:
-    st.session_state.current_problem = None
-if 'current_answer' not in st.session_state:
-    st.session_state.current_answer = None
-if 'problem_history' not in st.session_state:
-    st.session_state.problem_history = []
-if 'quiz_active' not in st.session_state:
-    st.session_state.quiz_active = False
-if 'total_problems' not in st.session_state:
-    st.session_state.total_problems = 10
-if 'quiz_complete' not in st.session_state:
-    st.session_state.quiz_complete = False
 if 'user_input' not in st.session_state:
     st.session_state.user_input = ""
 if 'show_feedback' not in st.session_state:
@@ -291,6 +92,21 @@ if 'feedback_message' not in st.session_state:
     st.session_state.feedback_message = ""
 if 'last_check' not in st.session_state:
     st.session_state.last_check = ""
+if 'user_id' not in st.session_state:
+    # Keep the learner id in the URL so a reload or bookmark finds their saved progress
+    st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+    st.query_params["user"] = st.session_state.user_id
+if 'session' not in st.session_state:
+    # The quiz, skills and generator live in a Session that is moved to disk while
+    # the tab sits idle; coming back with the same ?user= carries on where it stopped
+    st.session_state.session = store.open(st.session_state.user_id)
+if 'answer_mask' not in st.session_state:
+    st.session_state.answer_mask = None
+if 'pad_rejected' not in st.session_state:
+    st.session_state.pad_rejected = (None, 0)
+if 'worksheet_seed' not in st.session_state:
+    st.session_state.worksheet_seed = session().rng.getrandbits(31)
+
 
 # Title and description
 st.title("🧮 Mental Math Practice")
@@ -300,62 +116,284 @@ st.markdown("Sharpen your mental calculation skills!")
 st.sidebar.header("⚙️ Settings")
 operation = st.sidebar.selectbox(
     "Select Operation",
-    ["Addition", "Subtraction", "Multiplication", "Division", "Ratio to %", "Multiply by %", "Mixed"]
+    operation_names()
 )
 difficulty = st.sidebar.selectbox(
     "Select Difficulty",
-    ["Easy", "Medium", "Hard"]
+    DIFFICULTIES + ["Adaptive"],
+    help="Adaptive moves each operation up a level once you answer it quickly and accurately, "
+         "and serves more of what you find hard."
 )
-problem_count = st.sidebar.selectbox(
-    "Number of Problems",
-    [10, 20, 30, 50]
+mode = st.sidebar.radio(
+    "Mode",
+    ["Fixed count", "Sprint"],
+    horizontal=True,
+    help="Sprint: answer as many problems as you can before the time runs out."
 )
+if mode == "Sprint":
+    sprint_seconds = st.sidebar.selectbox(
+        "Sprint Length",
+        [60, 120],
+        format_func=lambda seconds: f"{seconds} seconds"
+    )
+    problem_count = None
+else:
+    problem_count = st.sidebar.selectbox(
+        "Number of Problems",
+        [10, 20, 30, 50]
+    )
+use_answer_pad = st.sidebar.toggle(
+    "⚡ Instant answer pad",
+    value=True,
+    key="use_answer_pad",
+    help="Checks answers in your browser as you type, so the page only talks to the server "
+         "once per problem."
+)
+
+# Printable worksheet for the selected operation, built only when downloaded
+with st.sidebar.expander("🖨️ Printable Worksheet"):
+    worksheet_difficulty = st.selectbox(
+        "Worksheet Difficulty",
+        DIFFICULTIES,
+        index=DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else 1
+    )
+    worksheet_count = st.selectbox("Problems", [50, 100, 500, 1000, 10000])
+    worksheet_format = st.selectbox(
+        "Format",
+        list(FORMATS),
+        format_func={"csv": "CSV", "jsonl": "JSON Lines", "pdf": "PDF with answer key"}.get
+    )
+    worksheet_seed = st.number_input(
+        "Seed", min_value=0, step=1, key="worksheet_seed",
+        help="The same seed gives the same worksheet again."
+    )
+    st.download_button(
+        "⬇️ Download Worksheet",
+        data=functools.partial(export_bytes, worksheet_format, operation, worksheet_difficulty,
+                               worksheet_count, int(worksheet_seed)),
+        file_name=f"worksheet-{operation}-{worksheet_difficulty}-{worksheet_seed}"
+                  f".{worksheet_format}".replace(" ", "_").replace("%", "pct"),
+        mime=FORMATS[worksheet_format],
+        on_click="ignore",
+        use_container_width=True
+    )
+st.sidebar.caption(f"Session seed: {session().session_seed}")
 
 st.markdown("---")
 
+def answer_key():
+    """Widget key of the answer box; changes per question so the box starts empty."""
+    return f"answer_input_{session().quiz.attempts}"
+
+
+def pad_key():
+    """Key of the answer pad; like the answer box, a new one per question."""
+    return f"answer_pad_{session().quiz.attempts}"
+
+
+def answer_mask():
+    """The current answer masked for the pad, made once per question so the pad keeps its state."""
+    key = pad_key()
+    if st.session_state.answer_mask is None or st.session_state.answer_mask[0] != key:
+        st.session_state.answer_mask = (key, mask_answer(session().quiz.current_exact))
+    return st.session_state.answer_mask[1]
+
+
+def pad_rejected():
+    """How many reports the server has turned down for the current pad."""
+    key, count = st.session_state.pad_rejected
+    return count if key == pad_key() else 0
+
+
+def reset_input():
+    """Forget what was typed for the previous problem."""
+    st.session_state.user_input = ""
+    st.session_state.show_feedback = False
+    st.session_state.last_check = ""
+
+
+# Auto-check answer when input changes
+def check_and_advance():
+    """Check if current input is correct and auto-advance if it is."""
+    started = time.perf_counter()
+    quiz = session().quiz
+    st.session_state.user_input = st.session_state.get(answer_key(), "")
+    # A sprint can run out between keystrokes; the clock then shows the results
+    if (st.session_state.user_input and st.session_state.user_input != st.session_state.last_check
+            and not quiz.complete):
+        try:
+            user_answer = parse_answer(st.session_state.user_input)
+            st.session_state.last_check = st.session_state.user_input
+
+            if quiz.submit(user_answer):
+                # Correct answer - the session has moved on to the next problem
+                reset_input()
+            elif not quiz.complete:
+                # Wrong answer - show error
+                st.session_state.show_feedback = True
+                st.session_state.feedback_message = f"❌ Wrong! Try again or clear to skip."
+        except ValueError:
+            pass  # Not a valid number yet
+
+    metrics.observe("mental_math_answer_seconds", time.perf_counter() - started,
+                    action="check")
+
+
+def pad_answered():
+    """Accept an answer the pad found correct, after checking it again on the server,
+    or skip with whatever was typed in the pad."""
+    started = time.perf_counter()
+    action = "pad"
+    quiz = session().quiz
+    report = st.session_state.get(pad_key())
+    # A report for an earlier question (e.g. sent twice) has nothing left to answer
+    if report and report.get("problem_id") == quiz.attempts and not quiz.complete:
+        try:
+            user_answer = parse_answer(report["answer"])
+        except (KeyError, TypeError, ValueError):
+            user_answer = None
+        elapsed = report.get("elapsed")
+        if report.get("skip"):
+            action = "skip"
+            quiz.skip(0 if user_answer is None else user_answer)
+            reset_input()
+        elif user_answer is not None and quiz.submit(user_answer):
+            # The browser's timing is only observed; the score uses the server clock
+            if isinstance(elapsed, (int, float)) and elapsed >= 0:
+                metrics.observe("mental_math_client_answer_seconds", elapsed,
+                                operation=quiz.queue.operation)
+            reset_input()
+        elif not quiz.complete:
+            # The pad shows the error and starts reporting again
+            st.session_state.pad_rejected = (pad_key(), pad_rejected() + 1)
+
+    metrics.observe("mental_math_answer_seconds", time.perf_counter() - started,
+                    action=action)
+
+
+def clear_answer():
+    """Empty the answer box and hide any feedback."""
+    st.session_state[answer_key()] = ""
+    st.session_state.user_input = ""
+    st.session_state.last_check = ""
+    st.session_state.show_feedback = False
+    st.session_state.feedback_message = ""
+
+
+def skip_problem():
+    """Mark the current problem as incorrect and skip to the next one."""
+    started = time.perf_counter()
+
+    # Record the current user input (or 0 if empty)
+    try:
+        user_answer = parse_answer(st.session_state.user_input) if st.session_state.user_input else 0
+    except:
+        user_answer = 0
+
+    if not session().quiz.complete:
+        session().quiz.skip(user_answer)
+    reset_input()
+    metrics.observe("mental_math_answer_seconds", time.perf_counter() - started,
+                    action="skip")
+
+
+def begin_quiz(queue, total_problems, time_limit=None):
+    """Start a new quiz session on queue and show its first problem."""
+    session().quiz = QuizSession(queue, total_problems, skills=session().skill_stats,
+                                 on_attempt=log_attempt, time_limit=time_limit).start()
+    session().quiz_active = True
+    session().quiz_ranked = False
+    st.session_state.user_input = ""
+    st.session_state.show_feedback = False
+    st.session_state.feedback_message = ""
+    st.session_state.last_check = ""
+    # Pad keys restart at answer_pad_0, so drop what belonged to the last quiz's pads
+    st.session_state.answer_mask = None
+    st.session_state.pad_rejected = (None, 0)
+
+
 # Start new quiz button
-if not st.session_state.quiz_active:
+if not session().quiz_active:
     if st.button("🚀 Start Quiz", type="primary"):
-        st.session_state.quiz_active = True
-        st.session_state.quiz_complete = False
-        st.session_state.score = 0
-        st.session_state.total_attempts = 0
-        st.session_state.problem_history = []
-        st.session_state.total_problems = problem_count
-        st.session_state.user_input = ""
-        st.session_state.show_feedback = False
-        st.session_state.feedback_message = ""
-        st.session_state.last_check = ""
-        # Generate first problem
-        problem, answer = generate_problem(operation, difficulty)
-        st.session_state.current_problem = problem
-        st.session_state.current_answer = answer
+        # Pre-generate the whole quiz and show the first problem
+        generation_started = time.perf_counter()
+        if difficulty == "Adaptive":
+            queue = AdaptiveQueue(operation, session().skill_stats, seed=quiz_seed())
+        elif mode == "Sprint":
+            # Enough for a fast sprint up front, topped up in batches of the same size
+            queue = ProblemQueue(operation, difficulty, SPRINT_BATCH, seed=quiz_seed())
+        else:
+            queue = ProblemQueue(operation, difficulty, problem_count, seed=quiz_seed())
+        metrics.observe("mental_math_generation_seconds",
+                        time.perf_counter() - generation_started,
+                        operation=operation, difficulty=difficulty)
+        if mode == "Sprint":
+            begin_quiz(queue, None, time_limit=sprint_seconds)
+        else:
+            begin_quiz(queue, problem_count)
         st.rerun()
 
-# Quiz in progress
-if st.session_state.quiz_active and not st.session_state.quiz_complete:
-    # Progress indicator
-    progress = st.session_state.total_attempts / st.session_state.total_problems
-    st.progress(progress)
-    st.markdown(f"**Question {st.session_state.total_attempts + 1} of {st.session_state.total_problems}**")
+    # Missed problems come back on a spaced-repetition schedule; the schedule
+    # file is only read once the learner asks for a review
+    if session().review_schedule is not None or os.path.exists(
+            schedule_path(st.session_state.user_id)):
+        if st.button("📚 Review Missed Problems"):
+            due = review_schedule().take_due(problem_count or 20)
+            if due:
+                begin_quiz(ReviewQueue(due), len(due))
+                st.rerun()
+            else:
+                st.info("🎉 Nothing is due for review right now!")
+
+
+# The countdown redraws itself every second without touching the quiz panel;
+# the deadline itself is enforced by QuizSession on the server clock
+@st.fragment(run_every=1)
+def sprint_clock():
+    quiz = session().quiz
+    if quiz.expire():
+        st.rerun()
+    remaining = quiz.remaining()
+    st.progress(1 - remaining / quiz.time_limit)
+    st.markdown(f"**⏱️ {remaining:.0f}s left**")
+
+
+# The quiz panel is a fragment: typing, Clear and Skip re-run only this
+# function (not the whole page), and their callbacks update the state before
+# it renders, so each interaction costs a single run.
+@st.fragment
+def quiz_panel():
+    # The last answer finished the quiz - re-run the whole page for the results
+    quiz = session().quiz
+    if quiz.complete:
+        st.rerun()
+
+    panel_started = time.perf_counter()
+
+    # Progress indicator; a sprint's progress is the countdown above
+    if quiz.time_limit is None:
+        st.progress(quiz.attempts / quiz.total_problems)
+        st.markdown(f"**Question {quiz.attempts + 1} of {quiz.total_problems}**")
+    else:
+        st.markdown(f"**Question {quiz.attempts + 1}**")
+    if quiz.queue.difficulty == "Adaptive":
+        st.caption(f"Adaptive level: {quiz.queue.current_difficulty}")
 
     # Display statistics
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("✅ Score", st.session_state.score)
+        st.metric("✅ Score", quiz.score)
     with col2:
-        st.metric("📝 Answered", st.session_state.total_attempts)
+        st.metric("📝 Answered", quiz.attempts)
     with col3:
-        if st.session_state.total_attempts > 0:
-            accuracy = (st.session_state.score /
-                       st.session_state.total_attempts) * 100
-            st.metric("🎯 Accuracy", f"{accuracy:.1f}%")
+        if quiz.attempts > 0:
+            st.metric("🎯 Accuracy", f"{quiz.accuracy:.1f}%")
 
     st.markdown("---")
 
     # Display current problem
-    if st.session_state.current_problem:
-        st.markdown(f"### Problem: {st.session_state.current_problem}")
+    if quiz.current_problem:
+        st.markdown(f"### Problem: {quiz.current_problem}")
 
         # Show feedback message if exists
         if st.session_state.show_feedback:
@@ -364,145 +402,101 @@ if st.session_state.quiz_active and not st.session_state.quiz_complete:
             else:
                 st.error(st.session_state.feedback_message)
 
-        # Auto-check answer when input changes
-        def check_and_advance():
-            """Check if current input is correct and auto-advance if it is."""
-            if st.session_state.user_input and st.session_state.user_input != st.session_state.last_check:
-                try:
-                    user_answer = float(st.session_state.user_input)
-                    st.session_state.last_check = st.session_state.user_input
-
-                    # Check if answer is correct (with tolerance for Ratio to % problems)
-                    is_correct = False
-                    if operation == "Ratio to %":
-                        # Allow 5% tolerance for ratio to percentage problems
-                        tolerance = 5.0
-                        if abs(user_answer - st.session_state.current_answer) <= tolerance:
-                            is_correct = True
-                    else:
-                        # For other operations, require exact match
-                        if abs(user_answer - st.session_state.current_answer) < 0.01:
-                            is_correct = True
-
-                    if is_correct:
-                        # Correct answer - auto advance
-                        st.session_state.total_attempts += 1
-                        st.session_state.score += 1
-
-                        # Add to history
-                        st.session_state.problem_history.append({
-                            'problem': st.session_state.current_problem,
-                            'correct_answer': st.session_state.current_answer,
-                            'user_answer': user_answer,
-                            'correct': True
-                        })
-
-                        # Check if quiz is complete
-                        if st.session_state.total_attempts >= st.session_state.total_problems:
-                            st.session_state.quiz_complete = True
-                            st.session_state.current_problem = None
-                            st.session_state.current_answer = None
-                            st.session_state.user_input = ""
-                            st.session_state.show_feedback = False
-                            st.session_state.last_check = ""
-                        else:
-                            # Generate next problem
-                            problem, answer = generate_problem(operation, difficulty)
-                            st.session_state.current_problem = problem
-                            st.session_state.current_answer = answer
-                            st.session_state.user_input = ""
-                            st.session_state.show_feedback = False
-                            st.session_state.last_check = ""
-
-                        st.rerun()
-                    else:
-                        # Wrong answer - show error
-                        st.session_state.show_feedback = True
-                        st.session_state.feedback_message = f"❌ Wrong! Try again or clear to skip."
-                except ValueError:
-                    pass  # Not a valid number yet
-
-        # Text input for answer with auto-check
-        user_answer = st.text_input(
-            "Type your answer:",
-            value=st.session_state.user_input,
-            key=f"answer_input_{st.session_state.total_attempts}",
-            label_visibility="collapsed"
+        if use_answer_pad:
+            # Checked in the browser; the server hears back once, with a right answer
+            # or a skip, so a skip records what was typed
+            answer_pad(quiz.attempts, answer_mask(), get_operation(quiz.current_operation),
+                       key=pad_key(), rejected=pad_rejected(), on_change=pad_answered)
+        else:
+            # Text input for answer, checked as soon as it changes
+            st.text_input(
+                "Type your answer:",
+                key=answer_key(),
+                on_change=check_and_advance,
+                label_visibility="collapsed"
+            )
+
+            # Clear and Skip buttons
+            col_clear, col_skip = st.columns(2)
+
+            with col_clear:
+                st.button("🔄 Clear", use_container_width=True, on_click=clear_answer)
+
+            with col_skip:
+                st.button("⏭️ Skip", use_container_width=True, on_click=skip_problem)
+
+    metrics.observe("mental_math_render_seconds", time.perf_counter() - panel_started,
+                    view="quiz_panel")
+
+
+def save_player_name():
+    name = st.session_state.player_name.strip()[:24]
+    if name:
+        leaderboard().set_name(st.session_state.user_id, name)
+
+
+# Switching the window or renaming re-runs only the leaderboard
+@st.fragment
+def leaderboard_panel(operation, difficulty):
+    st.markdown(f"### 🏆 Leaderboard: {operation}, {difficulty}")
+    window = st.radio("Period", list(WINDOWS), horizontal=True, label_visibility="collapsed")
+    rows = leaderboard().top(operation, difficulty, WINDOWS[window])
+    if rows:
+        user_id = st.session_state.user_id
+        st.dataframe(
+            [{"#": position,
+              "Player": (name or f"Player {user[:6]}") + (" (you)" if user == user_id else ""),
+              "Accuracy": f"{accuracy:.0f}%",
+              "Avg time": f"{mean_time:.1f}s"}
+             for position, (user, name, accuracy, mean_time, score, total) in enumerate(rows, 1)],
+            hide_index=True,
+            width="stretch",
         )
+        placing = leaderboard().rank(user_id, operation, difficulty, WINDOWS[window])
+        if placing is not None:
+            st.caption(f"Your best puts you #{placing[0]} of {placing[1]}")
+    else:
+        st.caption("No results yet.")
+    st.text_input("Name on the leaderboard", key="player_name", max_chars=24,
+                  placeholder=f"Player {st.session_state.user_id[:6]}", on_change=save_player_name)
 
-        # Update session state if input changed
-        if user_answer != st.session_state.user_input:
-            st.session_state.user_input = user_answer
-            st.rerun()
-
-        # Check answer after input update
-        check_and_advance()
-
-        # Clear and Skip buttons
-        col_clear, col_skip = st.columns(2)
-
-        with col_clear:
-            if st.button("🔄 Clear", use_container_width=True):
-                st.session_state.user_input = ""
-                st.session_state.last_check = ""
-                st.session_state.show_feedback = False
-                st.session_state.feedback_message = ""
-                st.rerun()
 
-        with col_skip:
-            if st.button("⏭️ Skip", use_container_width=True):
-                # Mark as incorrect and skip to next
-                st.session_state.total_attempts += 1
-
-                # Add to history with current user input (or 0 if empty)
-                try:
-                    user_answer = float(st.session_state.user_input) if st.session_state.user_input else 0
-                except:
-                    user_answer = 0
-
-                st.session_state.problem_history.append({
-                    'problem': st.session_state.current_problem,
-                    'correct_answer': st.session_state.current_answer,
-                    'user_answer': user_answer,
-                    'correct': False
-                })
-
-                # Check if quiz is complete
-                if st.session_state.total_attempts >= st.session_state.total_problems:
-                    st.session_state.quiz_complete = True
-                    st.session_state.current_problem = None
-                    st.session_state.current_answer = None
-                    st.session_state.user_input = ""
-                    st.session_state.show_feedback = False
-                    st.session_state.last_check = ""
-                else:
-                    # Generate next problem
-                    problem, answer = generate_problem(operation, difficulty)
-                    st.session_state.current_problem = problem
-                    st.session_state.current_answer = answer
-                    st.session_state.user_input = ""
-                    st.session_state.show_feedback = False
-                    st.session_state.last_check = ""
+quiz_complete = session().quiz_active and session().quiz.complete
 
-                st.rerun()
+# Quiz in progress
+if session().quiz_active and not quiz_complete:
+    if session().quiz.time_limit is not None:
+        sprint_clock()
+    quiz_panel()
 
 # Quiz complete - show results
-if st.session_state.quiz_complete:
+if quiz_complete:
     st.balloons()
     st.success("🎉 Quiz Complete!")
 
-    accuracy = (st.session_state.score / st.session_state.total_problems) * 100
+    results = session().quiz.results()
+    accuracy = results['accuracy']
+
+    # Each finished quiz goes on its leaderboard once; reviews and sprints aren't ranked
+    quiz = session().quiz
+    ranked = quiz.queue.difficulty != "Review" and quiz.time_limit is None
+    if ranked and not session().quiz_ranked:
+        leaderboard().record(st.session_state.user_id, quiz.queue.operation, quiz.queue.difficulty,
+                             results['score'], results['total'], results['mean_time'])
+        session().quiz_ranked = True
 
     # Final statistics
     st.markdown("### 📊 Final Results")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("✅ Correct", st.session_state.score)
+        st.metric("✅ Correct", results['score'])
     with col2:
-        st.metric("❌ Incorrect",
-                 st.session_state.total_problems - st.session_state.score)
+        st.metric("❌ Incorrect", results['incorrect'])
     with col3:
         st.metric("🎯 Accuracy", f"{accuracy:.1f}%")
+    if quiz.time_limit is not None:
+        st.metric(f"⚡ Problems per minute ({quiz.time_limit}s sprint)",
+                  f"{results['problems_per_minute']:.1f}")
 
     # Performance message
     st.markdown("---")
@@ -515,48 +509,64 @@ if st.session_state.quiz_complete:
     else:
         st.error("📚 Keep practicing! You'll improve with time!")
 
+    if ranked:
+        leaderboard_panel(quiz.queue.operation, quiz.queue.difficulty)
+
     # Show detailed history
     st.markdown("### 📋 Problem Review")
-    for i, item in enumerate(st.session_state.problem_history, 1):
-        status = "✅" if item['correct'] else "❌"
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            # Format answer properly (show decimals if needed)
-            correct_ans = item['correct_answer']
-            if isinstance(correct_ans, float) and correct_ans % 1 != 0:
-                correct_ans_str = f"{correct_ans:.1f}"
-            else:
-                correct_ans_str = f"{int(correct_ans)}"
-            st.text(f"{status} Problem {i}: {item['problem']} = {correct_ans_str}")
-        with col2:
-            if not item['correct']:
-                user_ans = item['user_answer']
-                if isinstance(user_ans, float) and user_ans % 1 != 0:
-                    user_ans_str = f"{user_ans:.1f}"
-                else:
-                    user_ans_str = f"{int(user_ans)}"
-                st.text(f"Your answer: {user_ans_str}")
+    # One table for the whole history: the grid only draws the rows in view,
+    # so long quizzes cost a single element instead of a few per problem
+    history = results['history']
+    per_operation, slowest = history.summary()
+    st.dataframe(
+        history.to_frame(),
+        width="stretch",
+        height=min(35 * len(history) + 38, 400),
+        column_config={"Time (s)": st.column_config.NumberColumn(format="%.1f")},
+    )
+    if len(per_operation) > 1:
+        st.caption("By operation")
+        st.dataframe(
+            per_operation,
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "Accuracy (%)": st.column_config.NumberColumn(format="%.0f%%"),
+                "Mean time (s)": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+    if len(history) > len(slowest):
+        st.caption("Slowest problems")
+        st.dataframe(
+            slowest,
+            hide_index=True,
+            width="stretch",
+            column_config={"Time (s)": st.column_config.NumberColumn(format="%.1f")},
+        )
 
     # Restart button
     st.markdown("---")
     if st.button("🔄 Start New Quiz", type="primary"):
-        st.session_state.quiz_active = False
-        st.session_state.quiz_complete = False
-        st.session_state.current_problem = None
-        st.session_state.current_answer = None
+        session().quiz_active = False
         st.session_state.user_input = ""
         st.session_state.show_feedback = False
         st.session_state.feedback_message = ""
         st.session_state.last_check = ""
         st.rerun()
 
+    # Replay the same problems from the quiz seed. Not for reviews: every
+    # replay would move the reviewed items up another box in the schedule
+    queue = session().quiz.queue
+    if queue.seed is not None:
+        st.caption(f"Quiz seed: {queue.seed}")
+    if queue.difficulty != "Review" and st.button("🔁 Replay This Quiz"):
+        begin_quiz(queue.replay(), quiz.total_problems, time_limit=quiz.time_limit)
+        st.rerun()
+
 # If not started yet
-if not st.session_state.quiz_active and not st.session_state.quiz_complete:
+if not session().quiz_active:
     st.info("👆 Click 'Start Quiz' to begin practicing!")
-    st.markdown("""
-    ### How it works:
-    1. Choose your settings in the sidebar
-    2. Click 'Start Quiz' to begin
-    3. Answer each problem and submit
-    4. Get instant feedback after completing all problems
-    """)
+    st.markdown(how_it_works())
+
+metrics.observe("mental_math_render_seconds", time.perf_counter() - page_started,
+                view="page")
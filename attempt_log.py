@@ -0,0 +1,221 @@
+"""Append-only on-disk log of every answered or skipped problem.
+
+The file is a short header followed by fixed-width binary records
+(RECORD_DTYPE), so it can be memory-mapped and scanned as a NumPy structured
+array. Writers only append a tuple to an in-memory buffer; a background
+thread turns the buffer into records, appends them in one write and fsyncs,
+so the request path never waits on disk. A failed write is logged and
+retried on the next flush; while the disk stays unwritable the buffer holds
+at most max_pending attempts and newer ones are counted in dropped.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from operations import get_operation
+from problems import DIFFICULTIES
+
+# Where the app keeps its log unless MENTAL_MATH_ATTEMPT_LOG says otherwise
+DEFAULT_PATH = os.environ.get("MENTAL_MATH_ATTEMPT_LOG", os.path.join("data", "attempts.log"))
+
+MAGIC = b"MMATTLOG"
+VERSION = 1
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),       # Unix time the attempt was accepted
+    ("session", "S32"),         # user or session id
+    ("operation", "S16"),       # concrete operation, e.g. "Division" for a Mixed quiz
+    ("difficulty", "u1"),       # index into DIFFICULTIES
+    ("correct", "?"),
+    ("left", "<i8"),            # operands as displayed
+    ("right", "<i8"),
+    ("answer", "<f8"),
+    ("user_answer", "<f8"),
+    ("response_time", "<f4"),   # seconds from display to acceptance
+])
+
+# Magic, format version and record size, padded to 16 bytes
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+logger = logging.getLogger(__name__)
+
+
+def _header():
+    return np.array([(MAGIC, VERSION, RECORD_DTYPE.itemsize)], dtype=HEADER_DTYPE).tobytes()
+
+
+def _check_header(raw, path):
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC or header["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not an attempt log (version {VERSION})")
+
+
+class AttemptLog:
+    """Buffered appender for one log file, safe to share between sessions."""
+
+    def __init__(self, path, batch_size=512, flush_interval=1.0, fsync=True,
+                 max_pending=100_000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_pending = max_pending
+        # Attempts thrown away because the buffer was full or would not convert
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_header())
+            self._file.flush()
+        else:
+            with open(path, "rb") as existing:
+                _check_header(existing.read(HEADER_SIZE), path)
+            # Drop a partial record left by a crash so new records stay aligned
+            torn = (self._file.tell() - HEADER_SIZE) % RECORD_DTYPE.itemsize
+            if torn:
+                self._file.truncate(self._file.tell() - torn)
+
+        self._flusher = threading.Thread(target=self._run, name="attempt-log-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, session, operation, difficulty, problem, answer, user_answer, correct,
+               response_time, timestamp=None):
+        """Queue one attempt; parsing and disk writes happen on the flusher thread."""
+        item = (time.time() if timestamp is None else timestamp, session, operation, difficulty,
+                problem, answer, user_answer, correct, response_time)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(item)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_logged()
+
+    def _flush_logged(self):
+        # The flusher has no caller to raise to: a failure must not end the thread
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("could not write attempts to %s; %d waiting, %d dropped",
+                             self.path, len(self._pending), self.dropped)
+
+    def flush(self):
+        """Write everything queued so far.
+
+        Attempts that fail to write are queued again, ahead of newer ones, and
+        the error is raised.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        records = self._convert(pending)
+        with self._write_lock:
+            try:
+                self._write(records.tobytes())
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = pending
+                    overflow = len(self._pending) - self.max_pending
+                    if overflow > 0:
+                        del self._pending[self.max_pending:]
+                        self.dropped += overflow
+                raise
+
+    def _convert(self, pending):
+        try:
+            return to_records(pending)
+        except Exception:
+            # Keep every attempt that converts on its own; one bad one is dropped
+            records = []
+            for attempt in pending:
+                try:
+                    records.append(to_records([attempt]))
+                except Exception:
+                    logger.exception("dropped an attempt that does not fit the log: %r", attempt)
+                    with self._lock:
+                        self.dropped += 1
+            return np.concatenate(records) if records else np.zeros(0, dtype=RECORD_DTYPE)
+
+    def _write(self, data):
+        # Straight to the file descriptor, so a failed write leaves nothing
+        # buffered and can be cut back to whole records
+        descriptor = self._file.fileno()
+        position = os.lseek(descriptor, 0, os.SEEK_END)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(descriptor, view):]
+            if self.fsync:
+                os.fsync(descriptor)
+        except OSError:
+            try:
+                os.ftruncate(descriptor, position)
+            except OSError:
+                pass  # the torn record is dropped when the log is next opened
+            raise
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self._flush_logged()
+        self._file.close()
+
+
+def to_records(attempts):
+    """Convert queued attempt tuples into a RECORD_DTYPE array."""
+    rows = []
+    for (timestamp, session, operation, difficulty, problem, answer, user_answer, correct,
+         response_time) in attempts:
+        try:
+            parsed = get_operation(operation).parse(problem)
+        except ValueError:
+            parsed = None
+        name, left, right = parsed if parsed is not None else (operation, 0, 0)
+        rows.append((timestamp, session.encode()[:32], name.encode()[:16],
+                     DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else 2,
+                     bool(correct), left, right, answer, user_answer, response_time))
+    return np.array(rows, dtype=RECORD_DTYPE)
+
+
+def read_attempts(path):
+    """Memory-map every complete record in the log as a read-only structured array."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as log:
+        _check_header(log.read(HEADER_SIZE), path)
+    # A crash mid-write can leave a partial record at the end; ignore it
+    count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def iter_attempts(path, chunk_size=1_000_000, start=0):
+    """Yield the log in chunks of at most chunk_size records, beginning at record start."""
+    records = read_attempts(path)
+    for offset in range(start, len(records), chunk_size):
+        yield records[offset:offset + chunk_size]
@@ -0,0 +1,128 @@
+"""Convergence and per-answer cost of the adaptive engine on synthetic learners.
+
+Each synthetic learner has a hidden mastery per operation: levels below it
+are answered accurately and quickly, levels at or above it are not. The
+engine should find each operation's true level and serve more problems from
+the learner's weakest operation.
+
+A second run drills Division alone with learners who are slow and
+inaccurate on some divisor buckets at every level. The engine should serve
+those buckets more often than uniform draws at the same levels would.
+
+Run from the repository root:
+    python -m benchmarks.bench_adaptive [--learners 500] [--attempts 300]
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+
+from adaptive import MASTERY_ACCURACY, AdaptiveQueue, SkillBook
+from operations import BASIC_OPERATIONS, get_operation
+from problems import DIFFICULTIES
+
+
+def make_learner(rng):
+    """Hidden mastery (0-3 levels) per operation."""
+    return {operation: rng.uniform(0, 3.5) for operation in BASIC_OPERATIONS}
+
+
+def answer(mastery, operation, difficulty, rng):
+    """(correct, response time) for one attempt by a synthetic learner."""
+    known = DIFFICULTIES.index(difficulty) < mastery[operation]
+    accuracy, mean_time = (0.97, 4.0) if known else (0.55, 12.0)
+    return rng.random() < accuracy, rng.expovariate(1 / mean_time)
+
+
+def true_level(mastery, operation):
+    """Easiest level the learner doesn't know yet (Hard if they know them all)."""
+    index = math.ceil(mastery[operation])
+    return DIFFICULTIES[min(index, len(DIFFICULTIES) - 1)]
+
+
+def simulate(seed, attempts):
+    rng = random.Random(seed)
+    mastery = make_learner(rng)
+    book = SkillBook()
+    weakest = min(mastery, key=mastery.get)
+    last_wrong_level = 0
+    served_weakest = 0
+    spent = 0.0
+    for attempt in range(1, attempts + 1):
+        start = time.perf_counter()
+        operation, difficulty = book.choose("Mixed", rng)
+        spent += time.perf_counter() - start
+        correct, response_time = answer(mastery, operation, difficulty, rng)
+        start = time.perf_counter()
+        book.update(operation, difficulty, correct, response_time)
+        spent += time.perf_counter() - start
+        if any(book.level(op) != true_level(mastery, op) for op in BASIC_OPERATIONS):
+            last_wrong_level = attempt
+        if attempt > attempts // 2:
+            served_weakest += operation == weakest
+    return last_wrong_level, served_weakest / (attempts - attempts // 2), spent / attempts
+
+
+def simulate_buckets(seed, attempts, weak=(7, 8, 9, 30, 40, 80, 90)):
+    """Share of Division problems in weak divisor buckets in the second half, the share
+    uniform draws at the same levels would give, and the cost per answer."""
+    rng = random.Random(seed)
+    division = get_operation("Division")
+    uniform = {}
+    for level in DIFFICULTIES:
+        divisors = division.grid(level)[1]
+        uniform[level] = sum(division.band(int(d)) in weak for d in divisors) / len(divisors)
+    book = SkillBook()
+    queue = AdaptiveQueue("Division", book, seed=seed)
+    served_weak = expected_weak = 0.0
+    spent = 0.0
+    for attempt in range(1, attempts + 1):
+        start = time.perf_counter()
+        problem, _ = queue.pop()
+        spent += time.perf_counter() - start
+        _, left, right = division.parse(problem)
+        bucket = division.bucket(left, right)
+        accuracy, mean_time = (0.55, 12.0) if bucket in weak else (0.97, 4.0)
+        correct, response_time = rng.random() < accuracy, rng.expovariate(1 / mean_time)
+        start = time.perf_counter()
+        book.update("Division", queue.current_difficulty, correct, response_time, bucket)
+        spent += time.perf_counter() - start
+        if attempt > attempts // 2:
+            served_weak += bucket in weak
+            expected_weak += uniform[queue.current_difficulty]
+    second_half = attempts - attempts // 2
+    return served_weak / second_half, expected_weak / second_half, spent / attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--learners", type=int, default=500)
+    parser.add_argument("--attempts", type=int, default=300)
+    args = parser.parse_args()
+
+    results = [simulate(seed, args.attempts) for seed in range(args.learners)]
+    converged = sorted(r[0] for r in results)
+    share = statistics.mean(r[1] for r in results)
+    cost = statistics.mean(r[2] for r in results)
+    settled = sum(c < args.attempts for c in converged) / len(converged)
+
+    print(f"learners                     {args.learners} x {args.attempts} attempts (Mixed)")
+    print(f"levels correct at the end    {settled:.0%}")
+    print(f"attempts to settle levels    median {statistics.median(converged):.0f}, "
+          f"p90 {converged[int(len(converged) * 0.9)]}")
+    print(f"weakest operation share      {share:.0%} in the second half (uniform would be "
+          f"{1 / len(BASIC_OPERATIONS):.0%})")
+    print(f"choose + update              {cost * 1e6:.1f} us per answer")
+    print(f"mastery threshold            accuracy >= {MASTERY_ACCURACY}")
+
+    results = [simulate_buckets(seed, args.attempts) for seed in range(args.learners)]
+    print(f"\nweak divisor share           {statistics.mean(r[0] for r in results):.0%} in the "
+          f"second half of a Division drill (uniform would be "
+          f"{statistics.mean(r[1] for r in results):.0%})")
+    print(f"pop + update                 {statistics.mean(r[2] for r in results) * 1e6:.1f} us "
+          f"per answer")
+
+
+if __name__ == "__main__":
+    main()
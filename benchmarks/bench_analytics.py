@@ -0,0 +1,168 @@
+"""Analytics ingest and report speed, incremental updates, and a check against plain Python.
+
+Writes a synthetic attempt log of --records records straight as
+RECORD_DTYPE rows: --students students in classes of 30, spread over 12
+weeks, with Mixed Medium problems. It then measures:
+- a full ingest into a fresh directory, and memory per attempt;
+- an update that finds 1% new records, and one that finds none;
+- opening the saved columns again in a new Analytics;
+- each report for everyone, one class and one student.
+
+The skills report must match a plain-Python group-by over dicts, the way
+per-session histories used to be summed up, and the speed of both is
+reported. It exits with status 1 on a mismatch.
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics [--records 2000000] [--students 600]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from analytics import Analytics
+from attempt_log import RECORD_DTYPE, _header
+from problems import DIFFICULTIES, get_problem_index
+
+WEEK = 7 * 86400
+
+
+def synthetic(count, students, rng, start_time=1_780_000_000.0):
+    """count log records for the given student ids."""
+    index = get_problem_index("Mixed", "Medium")
+    picks = rng.integers(0, len(index), size=count)
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    records["timestamp"] = np.sort(start_time + rng.uniform(0, 12 * WEEK, size=count))
+    records["session"] = np.array([s.encode() for s in students])[
+        rng.integers(0, len(students), size=count)]
+    parsed = [index._item(i)[0] for i in range(len(index))]
+    operations = np.array([p.split()[1] for p in parsed])
+    names = {"+": b"Addition", "-": b"Subtraction", "×": b"Multiplication", "÷": b"Division"}
+    records["operation"] = [names[o] for o in operations[picks].tolist()]
+    records["difficulty"] = DIFFICULTIES.index("Medium")
+    records["correct"] = rng.random(count) < 0.8
+    records["left"] = index.left[picks]
+    records["right"] = index.right[picks]
+    records["answer"] = index.answers[picks]
+    records["user_answer"] = np.where(records["correct"], records["answer"], 0)
+    records["response_time"] = rng.gamma(2.0, 2.5, size=count).astype(np.float32)
+    return records
+
+
+def write_log(path, records, append=False):
+    with open(path, "ab" if append else "wb") as log:
+        if not append:
+            log.write(_header())
+        log.write(records.tobytes())
+
+
+def timed(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def python_skills(records):
+    """The skills report from a list of attempt dicts, one loop at a time."""
+    groups = defaultdict(list)
+    for row in records:
+        groups[(row["operation"], row["difficulty"])].append(row)
+    report = {}
+    for key, rows in groups.items():
+        times = sorted(row["response_time"] for row in rows)
+        middle = len(times) // 2
+        median = times[middle] if len(times) % 2 else (times[middle - 1] + times[middle]) / 2
+        report[key] = (len(rows), sum(row["correct"] for row in rows), median)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2_000_000)
+    parser.add_argument("--students", type=int, default=600)
+    parser.add_argument("--python-records", type=int, default=200_000,
+                        help="records for the plain-Python comparison")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    students = [f"student{number:05d}" for number in range(args.students)]
+    roster = {student: f"Class {number // 30 + 1}" for number, student in enumerate(students)}
+    failures = []
+
+    with tempfile.TemporaryDirectory(prefix="bench_analytics_") as directory:
+        log = os.path.join(directory, "attempts.log")
+        store = os.path.join(directory, "analytics")
+        write_log(log, synthetic(args.records, students, rng))
+
+        start = time.perf_counter()
+        analytics = Analytics(store)
+        analytics.update(log)
+        ingest = time.perf_counter() - start
+        on_disk = sum(entry.stat().st_size for entry in os.scandir(store))
+        print(f"{'records':<36}{args.records:>14,}")
+        print(f"{'full ingest':<36}{args.records / ingest:>14,.0f} records/s ({ingest:.2f}s)")
+        print(f"{'bytes per attempt (log / columns)':<36}"
+              f"{RECORD_DTYPE.itemsize:>8} / {on_disk / args.records:.1f}")
+
+        tail = synthetic(args.records // 100, students, rng, start_time=1_780_000_000.0 + 12 * WEEK)
+        write_log(log, tail, append=True)
+        start = time.perf_counter()
+        new = analytics.update(log)
+        print(f"{'update with 1% new records':<36}{(time.perf_counter() - start) * 1000:>11.1f} ms"
+              f" ({new:,} read)")
+        seconds, new = timed(lambda: analytics.update(log))
+        print(f"{'update with nothing new':<36}{seconds * 1000:>11.2f} ms")
+        seconds, reopened = timed(lambda: Analytics(store))
+        print(f"{'reopen saved columns':<36}{seconds * 1000:>11.1f} ms")
+        if len(reopened) != len(analytics) or reopened.update(log) != 0:
+            failures.append("the reopened columns differ from the saved ones")
+
+        klass = analytics.class_members(roster, "Class 1")
+        print(f"\n{'report (ms)':<16}{'everyone':>12}{'one class':>12}{'one student':>12}")
+        for name, fn in [("skills", analytics.skills), ("missed", analytics.most_missed),
+                         ("weekly", analytics.weekly),
+                         ("students", lambda s: analytics.per_student(s, roster)),
+                         ("classes", lambda s: analytics.per_class(roster, s))]:
+            cells = [timed(lambda: fn(subset))[0] * 1000 for subset in (None, klass, students[:1])]
+            print(f"{name:<16}" + "".join(f"{cell:>12.1f}" for cell in cells))
+
+        # The same report from attempt dicts, over a smaller log
+        write_log(log, synthetic(args.python_records, students, np.random.default_rng(1)))
+        subset = Analytics()
+        start = time.perf_counter()
+        subset.update(log)
+        ingest = time.perf_counter() - start
+        seconds_numpy, frame = timed(subset.skills)
+        start = time.perf_counter()
+        records = np.fromfile(log, dtype=RECORD_DTYPE, offset=len(_header()))
+        rows = [{"operation": r["operation"].decode(), "difficulty": DIFFICULTIES[r["difficulty"]],
+                 "correct": bool(r["correct"]), "response_time": float(r["response_time"])}
+                for r in records]
+        to_dicts = time.perf_counter() - start
+        seconds_python, expected = timed(lambda: python_skills(rows))
+        got = {(row["Operation"], row["Difficulty"]):
+               (row["Attempts"], row["Correct"], row["Median time (s)"])
+               for row in frame.to_dict("records")}
+        if got.keys() != expected.keys() or any(
+                got[key][:2] != expected[key][:2] or abs(got[key][2] - expected[key][2]) > 1e-9
+                for key in expected):
+            failures.append("the skills report differs from the plain-Python one")
+        print(f"\nskills over {args.python_records:,} attempts (ms)")
+        print(f"{'columns':<16}ingest {ingest * 1000:>8.1f}   report {seconds_numpy * 1000:>8.1f}")
+        print(f"{'dicts':<16}load   {to_dicts * 1000:>8.1f}   report {seconds_python * 1000:>8.1f}")
+
+    if failures:
+        print("\n".join(["FAILED:"] + failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
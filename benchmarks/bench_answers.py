@@ -0,0 +1,81 @@
+"""Cost of exact answer checks, and which answers changed with half-up rounding.
+
+For each operation it times, per call:
+- reading a typed answer: float() before, parse_answer() now;
+- check(): the float comparison it replaced, against the exact one with a
+  Fraction tolerance, for a correct answer and a wrong one;
+- exact(): the unrounded answer QuizSession works out when it shows a problem.
+
+It then counts the entries of every problem space whose shown answer is not
+what the old float formula gave: round(100 * n / d, 1) for Ratio to % and
+round(p / 100 * base) for Multiply by %.
+
+Run from the repository root:
+    python -m benchmarks.bench_answers
+"""
+import random
+import time
+
+import numpy as np
+
+from answers import parse_answer
+from operations import get_operation, operation_names
+from problems import DIFFICULTIES
+
+N = 20000
+
+
+def per_call(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def float_check(operation):
+    """check() as it was: floats, with the tolerance as a float."""
+    tolerance, inclusive = float(operation.tolerance), operation.tolerance_inclusive
+
+    def check(user_answer, correct_answer):
+        error = abs(user_answer - correct_answer)
+        return error <= tolerance if inclusive else error < tolerance
+    return check
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'operation':<20}{'float()':>9}{'parse':>9}{'old check':>11}{'right':>9}"
+          f"{'wrong':>9}{'exact()':>9}   (us per call)")
+    for name in operation_names():
+        operation = get_operation(name)
+        samples = [operation.generate("Hard", rng) for _ in range(N)]
+        parsed = [operation.parse(problem) for problem, _ in samples]
+        members = [get_operation(member) for member, _, _ in parsed]
+        exacts = [member.exact(left, right) for member, (_, left, right) in zip(members, parsed)]
+        typed = [str(answer) for _, answer in samples]
+        answers = [parse_answer(text) for text in typed]
+        old = float_check(operation)
+        pairs = list(zip(answers, exacts, members))
+        print(f"{name:<20}"
+              f"{per_call(float, typed):>9.2f}"
+              f"{per_call(parse_answer, typed):>9.2f}"
+              f"{per_call(lambda item: old(float(item[0]), float(item[1])), pairs):>11.2f}"
+              f"{per_call(lambda item: item[2].check(item[0], item[1]), pairs):>9.2f}"
+              f"{per_call(lambda item: item[2].check(item[0] + 7, item[1]), pairs):>9.2f}"
+              f"{per_call(lambda item: item[0].exact(*item[1][1:]), list(zip(members, parsed))):>9.2f}")
+        assert all(member.check(answer, value) for answer, value, member in pairs), name
+
+    print(f"\n{'shown answers changed':<28}{'difficulty':<12}{'entries':>9}{'changed':>9}")
+    for name, old in [("Ratio to %", lambda n, d: round((n / d) * 100, 1)),
+                      ("Multiply by %", lambda p, base: round((p / 100) * base))]:
+        operation = get_operation(name)
+        for level in DIFFICULTIES:
+            left, right, _ = operation.grid(level)
+            answers = operation.answers_batch(level, left, right)
+            before = np.array([old(a, b) for a, b in zip(left.tolist(), right.tolist())])
+            changed = int((answers != before).sum())
+            print(f"{name:<28}{level:<12}{len(answers):>9,}{changed:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Attempt log cost on the request path, write throughput and scan speed.
+
+Run from the repository root:
+    python -m benchmarks.bench_attempt_log [--records 2000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from attempt_log import RECORD_DTYPE, AttemptLog, iter_attempts, read_attempts
+from problems import generate_problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    problems = generate_problems("Mixed", "Medium", 1000, seed=0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "attempts.log")
+        # The loop appends faster than any disk, so let the buffer hold all of it
+        log = AttemptLog(path, batch_size=4096, max_pending=args.records)
+
+        start = time.perf_counter()
+        for i in range(args.records):
+            problem, answer = problems[i % 1000]
+            log.append("bench-session", "Mixed", "Medium", problem, answer, answer,
+                       True, 2.5)
+        appended = time.perf_counter() - start
+        log.close()
+        written = time.perf_counter() - start
+        assert log.dropped == 0, f"{log.dropped:,} attempts dropped"
+
+        size = os.path.getsize(path)
+        print(f"records           {args.records:,} x {RECORD_DTYPE.itemsize} bytes"
+              f" = {size / 1024 / 1024:.1f} MiB")
+        print(f"append (request)  {appended / args.records * 1e6:.2f} us/record")
+        print(f"append + flush    {args.records / written:,.0f} records/s")
+
+        start = time.perf_counter()
+        records = read_attempts(path)
+        accuracy = records["correct"].mean()
+        mean_time = records["response_time"].mean()
+        print(f"memmap scan       {args.records / (time.perf_counter() - start):,.0f} records/s"
+              f" (accuracy {accuracy:.2f}, mean time {mean_time:.2f}s)")
+
+        start = time.perf_counter()
+        correct = sum(int(np.count_nonzero(chunk["correct"]))
+                      for chunk in iter_attempts(path, chunk_size=250_000))
+        print(f"chunked scan      {args.records / (time.perf_counter() - start):,.0f} records/s"
+              f" ({correct:,} correct)")
+        del records
+
+
+if __name__ == "__main__":
+    main()
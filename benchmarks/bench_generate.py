@@ -0,0 +1,32 @@
+"""Compare problems per second: generate_problem in a loop vs generate_problems.
+
+Run from the repository root:
+    python -m benchmarks.bench_generate
+"""
+import random
+import time
+
+from operations import operation_names
+from problems import DIFFICULTIES, generate_problem, generate_problems
+
+N = 20000
+
+
+def rate(fn):
+    start = time.perf_counter()
+    fn()
+    return N / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'operation':<20}{'difficulty':<12}{'loop/s':>12}{'batch/s':>12}{'speedup':>10}")
+    rng = random.Random(0)
+    for operation in operation_names():
+        for difficulty in DIFFICULTIES:
+            loop = rate(lambda: [generate_problem(operation, difficulty, rng) for _ in range(N)])
+            batch = rate(lambda: generate_problems(operation, difficulty, N, seed=0))
+            print(f"{operation:<20}{difficulty:<12}{loop:>12,.0f}{batch:>12,.0f}{batch / loop:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Bytes per session spent on the problem history, list of dicts vs AttemptHistory.
+
+Fills both with the same Mixed-quiz attempts and measures the memory they
+hold with tracemalloc, at the lengths of a normal quiz, a long session and
+a marathon. Also times appending and reading the history back.
+
+Run from the repository root:
+    python -m benchmarks.bench_history
+"""
+import random
+import time
+import tracemalloc
+
+from history import Attempt, AttemptHistory
+from operations import get_operation
+from problems import generate_problems
+
+SIZES = (50, 1_000, 100_000)
+
+
+def make_attempts(n):
+    rng = random.Random(0)
+    attempts = []
+    for problem, answer in generate_problems("Mixed", "Medium", n, seed=0):
+        operation = get_operation("Mixed").parse(problem)[0]
+        correct = rng.random() < 0.8
+        attempts.append(Attempt(problem, answer, float(answer) if correct else 0.0, correct,
+                                rng.expovariate(1 / 6.0), operation, "Medium"))
+    return attempts
+
+
+def as_dicts(attempts):
+    """The history as the app used to keep it: one dict per attempt.
+
+    In a live session each dict owns its problem string and floats, so fresh
+    copies are made here to count them.
+    """
+    history = []
+    for a in attempts:
+        history.append({
+            'problem': (a.problem + " ")[:-1],
+            'correct_answer': a.correct_answer,
+            'user_answer': a.user_answer + 0.0,
+            'correct': a.correct,
+            'response_time': a.response_time + 0.0,
+        })
+    return history
+
+
+def as_compact(attempts):
+    history = AttemptHistory()
+    for a in attempts:
+        history.append(a)
+    return history
+
+
+def measure(build, attempts):
+    """(bytes held, seconds to build) for the history built from attempts."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    history = build(attempts)
+    seconds = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    return held, seconds
+
+
+def main():
+    print(f"{'attempts':>10}{'dicts B':>14}{'compact B':>14}{'ratio':>8}"
+          f"{'B/attempt':>16}{'read us/attempt':>17}")
+    for n in SIZES:
+        attempts = make_attempts(n)
+        dict_bytes, _ = measure(as_dicts, attempts)
+        compact_bytes, _ = measure(as_compact, attempts)
+        history = as_compact(attempts)
+        start = time.perf_counter()
+        for _ in history:
+            pass
+        read = (time.perf_counter() - start) / n
+        print(f"{n:>10,}{dict_bytes:>14,}{compact_bytes:>14,}{dict_bytes / compact_bytes:>7.1f}x"
+              f"{dict_bytes / n:>8.0f} ->{compact_bytes / n:>5.0f}{read * 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Build time, memory and sampling rate of the per-(operation, difficulty) problem indexes.
+
+Run from the repository root:
+    python -m benchmarks.bench_index
+"""
+import random
+import time
+
+from operations import get_operation, operation_names
+from problems import DIFFICULTIES, generate_problem, get_problem_index, index_stats
+
+N = 100000
+
+
+def rate(fn):
+    start = time.perf_counter()
+    for _ in range(N):
+        fn()
+    return N / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'operation':<20}{'difficulty':<12}{'entries':>9}{'build ms':>10}{'KiB':>9}"
+          f"{'indexed/s':>12}{'scratch/s':>12}")
+    rng = random.Random(0)
+    for operation in operation_names():
+        for difficulty in DIFFICULTIES:
+            index = get_problem_index(operation, difficulty)
+            indexed = rate(lambda: generate_problem(operation, difficulty, rng))
+            scratch = rate(lambda: get_operation(operation).generate(difficulty, rng))
+            if index is None:
+                print(f"{operation:<20}{difficulty:<12}{'fallback':>9}{'-':>10}{'-':>9}"
+                      f"{indexed:>12,.0f}{scratch:>12,.0f}")
+                continue
+            stats = next(s for s in index_stats()
+                         if s["operation"] == operation and s["difficulty"] == difficulty)
+            print(f"{operation:<20}{difficulty:<12}{stats['entries']:>9,}{stats['build_ms']:>10.2f}"
+                  f"{stats['bytes'] / 1024:>9.1f}{indexed:>12,.0f}{scratch:>12,.0f}")
+    total = sum(s["bytes"] for s in index_stats())
+    print(f"\nAll indexes: {total / 1024 / 1024:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Leaderboard write and read costs with a class-sized and a school-sized history.
+
+Records completed quizzes from many players across operations,
+difficulties and days. It then times reading a top 10 from SQLite through
+the rank index, from the in-process cache, and by loading the whole board
+and sorting it in Python, which is what a store without the index would
+have to do.
+
+Run from the repository root:
+    python -m benchmarks.bench_leaderboard [--players 2000] [--quizzes 50000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from leaderboard import Leaderboard, periods
+from operations import BASIC_OPERATIONS
+from problems import DIFFICULTIES
+
+DAY = 24 * 60 * 60
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--quizzes", type=int, default=50_000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = time.time()
+    with tempfile.TemporaryDirectory() as directory:
+        board = Leaderboard(os.path.join(directory, "leaderboard.db"), ttl=5.0)
+        start = time.perf_counter()
+        for _ in range(args.quizzes):
+            total = rng.choice([10, 20, 30, 50])
+            board.record(f"user{rng.randrange(args.players)}", rng.choice(BASIC_OPERATIONS),
+                         rng.choice(DIFFICULTIES), rng.randint(total // 2, total), total,
+                         rng.uniform(2, 15), finished_at=now - rng.uniform(0, 30 * DAY))
+        record = (time.perf_counter() - start) / args.quizzes
+        rows = board._db.execute("SELECT COUNT(*) FROM best").fetchone()[0]
+        largest = board._db.execute(
+            "SELECT COUNT(*) FROM best WHERE operation = 'Addition' AND difficulty = 'Easy' "
+            "AND period = 'all'").fetchone()[0]
+
+        def uncached():
+            board._cache.clear()
+            board.top("Addition", "Easy", "all")
+
+        def full_sort():
+            everyone = board._db.execute(
+                "SELECT user, accuracy, mean_time FROM best WHERE operation = ? AND difficulty = ? "
+                "AND period = ?", ("Addition", "Easy", periods(now)["all"])).fetchall()
+            return sorted(everyone, key=lambda row: (-row[1], row[2]))[:10]
+
+        def rank():
+            board._cache.clear()
+            board.rank("user1", "Addition", "Easy", "all")
+
+        indexed = timed(uncached, args.reads)
+        cached = timed(lambda: board.top("Addition", "Easy", "all"), args.reads)
+        sorting = timed(full_sort, args.reads // 10)
+        ranking = timed(rank, args.reads)
+        board.close()
+
+    print(f"quizzes recorded             {args.quizzes:,} by {args.players:,} players "
+          f"({rows:,} best rows, {largest:,} on the all-time Addition/Easy board)")
+    print(f"record                       {record * 1e6:.0f} us per quiz (3 boards)")
+    print(f"top 10 via rank index        {indexed * 1e6:.0f} us")
+    print(f"top 10 from cache            {cached * 1e6:.1f} us")
+    print(f"top 10 by full sort          {sorting * 1e6:.0f} us")
+    print(f"rank of one player           {ranking * 1e6:.0f} us (uncached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Load test: simulated quiz-takers driving the real app through AppTest, across processes.
+
+Each worker process plays its share of --users simulated users one after
+another. Users cycle through every operation and difficulty, so each pair
+is covered once there are at least 24 users. A user opens the page, picks
+a mode, starts a fixed-count quiz and plays it through the answer box,
+keystroke by keystroke. Some first type a wrong answer and press Clear,
+some press Skip, and the rest go straight to the right answer. Every
+script execution is counted and timed by wrapping the script runner's exec
+call, as in bench_reruns.
+
+Reported, and saved as JSON with --json:
+- reruns per question and per interaction;
+- p50/p95/p99 server milliseconds per interaction, overall and by kind
+  (keystroke, clear, skip, finish, start, load). "answering" is
+  keystroke, clear and skip together; finish is the answer or skip that
+  ends the quiz and renders the results;
+- peak session-state bytes per user: everything reachable from
+  st.session_state, measured after every question;
+- throughput: questions and interactions per second across the pool,
+  which includes AppTest's own overhead, and the interactions per second
+  one CPU could serve on script time alone.
+
+With --baseline, the run is compared with an earlier JSON result. It exits
+with status 1 if p95 time, reruns per question or peak session bytes got
+worse by more than --tolerance.
+
+AppTest always re-executes the whole script, and the answer pad can't be
+driven from it, so this is a conservative, text-box-only load. Each worker
+writes its logs, leaderboard and session snapshots to its own temporary
+directory.
+
+Run from the repository root:
+    python -m benchmarks.bench_load [--processes 4] [--users 42] [--problems 10]
+                                    [--json load.json] [--baseline old.json]
+"""
+import argparse
+import array
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import streamlit
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.testing.v1 import AppTest
+
+from answers import format_answer
+from benchmarks.bench_reruns import use_text_input
+from operations import get_operation, operation_names
+from problems import DIFFICULTIES
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+SKIP_RATE = 0.15
+WRONG_RATE = 0.2
+
+script_seconds = []
+
+
+def _timed(exec_func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return exec_func(*args, **kwargs)
+        finally:
+            script_seconds.append(time.perf_counter() - start)
+    return wrapper
+
+
+script_runner.exec_func_with_error_handling = _timed(script_runner.exec_func_with_error_handling)
+
+_LEAVES = (str, bytes, bytearray, int, float, complex, bool, type(None), array.array,
+           np.ndarray, np.generic)
+_SKIP = (type, type(sys), type(len), type(lambda: None), type(APP.join))
+
+
+def deep_size(obj, seen):
+    """Bytes reachable from obj that seen doesn't already hold; modules, classes and functions
+    (shared by every session) are not counted."""
+    if id(obj) in seen or isinstance(obj, _SKIP) or callable(getattr(obj, "__self__", None)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    # pandas objects report their own deep size
+    if isinstance(obj, _LEAVES) or type(obj).__module__.startswith("pandas"):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == "deque":
+        size += sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def session_bytes(at):
+    seen = set()
+    return sum(deep_size(key, seen) + deep_size(value, seen)
+               for key, value in at.session_state.to_dict().items())
+
+
+class User:
+    """One simulated quiz-taker; every interaction is timed into samples."""
+
+    def __init__(self, samples, rng):
+        self.at = AppTest.from_file(APP, default_timeout=60)
+        self.samples = samples
+        self.rng = rng
+
+    def interact(self, kind, action):
+        del script_seconds[:]
+        action()
+        assert not self.at.exception, self.at.exception
+        # The answer that ends the quiz also renders the results page
+        session = self.at.session_state["session"] if "session" in self.at.session_state else None
+        quiz = getattr(session, "quiz", None)
+        if kind in ("keystroke", "skip") and quiz is not None and quiz.complete:
+            kind = "finish"
+        self.samples.append((kind, sum(script_seconds), len(script_seconds)))
+        return len(script_seconds)
+
+    def type(self, text, attempts):
+        """Type text a key at a time; stops early once the question is accepted."""
+        runs = 0
+        for end in range(1, len(text) + 1):
+            runs += self.interact("keystroke",
+                                  lambda: self.at.text_input[0].input(text[:end]).run())
+            if self.at.session_state.session.quiz.attempts != attempts:
+                break
+        return runs
+
+    def press(self, label, kind):
+        button = next(b for b in self.at.button if label in b.label)
+        return self.interact(kind, lambda: button.click().run())
+
+    def play(self, operation, difficulty, problems):
+        """Play one quiz; returns (runs per question, peak session bytes)."""
+        at = self.at
+        self.interact("load", at.run)
+        at.selectbox[0].set_value(operation)
+        at.selectbox[1].set_value(difficulty)
+        next(s for s in at.selectbox if s.label == "Number of Problems").set_value(problems)
+        use_text_input(at)
+        self.interact("settings", at.run)
+        self.press("Start Quiz", "start")
+
+        tolerance = get_operation(operation).tolerance
+        question_runs, peak = [], session_bytes(at)
+        while not at.session_state.session.quiz.complete:
+            quiz = at.session_state.session.quiz
+            attempts, answer = quiz.attempts, quiz.current_answer
+            runs = 0
+            if self.rng.random() < SKIP_RATE:
+                runs += self.press("Skip", "skip")
+            else:
+                if self.rng.random() < WRONG_RATE:
+                    wrong = format_answer(answer + 10 * max(1, round(tolerance)) + 7)
+                    runs += self.type(wrong, attempts)
+                    if at.session_state.session.quiz.attempts == attempts:
+                        runs += self.press("Clear", "clear")
+                if at.session_state.session.quiz.attempts == attempts:
+                    runs += self.type(format_answer(answer), attempts)
+            assert at.session_state.session.quiz.attempts == attempts + 1
+            question_runs.append(runs)
+            peak = max(peak, session_bytes(at))
+        return question_runs, peak
+
+
+def worker(first_user, users, problems, seed):
+    """Play users first_user..first_user + users - 1 in this process; returns raw samples."""
+    directory = tempfile.mkdtemp(prefix="bench_load_")
+    os.environ["MENTAL_MATH_ATTEMPT_LOG"] = os.path.join(directory, "attempts.log")
+    os.environ["MENTAL_MATH_LEADERBOARD"] = os.path.join(directory, "leaderboard.db")
+    os.environ["MENTAL_MATH_REVIEW_DIR"] = os.path.join(directory, "review")
+    os.environ["MENTAL_MATH_SESSION_DIR"] = os.path.join(directory, "sessions")
+    pairs = [(operation, difficulty) for operation in operation_names()
+             for difficulty in DIFFICULTIES]
+    samples, question_runs, peaks = [], [], []
+    start = time.perf_counter()
+    try:
+        for number in range(first_user, first_user + users):
+            operation, difficulty = pairs[number % len(pairs)]
+            user = User(samples, random.Random(seed + number))
+            runs, peak = user.play(operation, difficulty, problems)
+            question_runs += runs
+            peaks.append(peak)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {"samples": samples, "question_runs": question_runs, "peaks": peaks,
+            "seconds": time.perf_counter() - start}
+
+
+def summarize(server_seconds, runs):
+    milliseconds = np.asarray(server_seconds) * 1000
+    return {"count": len(milliseconds),
+            "runs_per_interaction": float(np.mean(runs)),
+            "p50_ms": float(np.percentile(milliseconds, 50)),
+            "p95_ms": float(np.percentile(milliseconds, 95)),
+            "p99_ms": float(np.percentile(milliseconds, 99))}
+
+
+def report(results, args, wall):
+    samples = [sample for result in results for sample in result["samples"]]
+    question_runs = [runs for result in results for runs in result["question_runs"]]
+    peaks = [peak for result in results for peak in result["peaks"]]
+    # Workers run side by side, so the slowest one bounds the pool's busy time
+    busy = max(result["seconds"] for result in results)
+    kinds = {}
+    for kind, seconds, runs in samples:
+        kinds.setdefault(kind, ([], []))
+        kinds[kind][0].append(seconds)
+        kinds[kind][1].append(runs)
+    answering = [sample for sample in samples if sample[0] in ("keystroke", "clear", "skip")]
+    return {
+        "config": {"processes": args.processes, "users": args.users, "problems": args.problems,
+                   "seed": args.seed, "python": platform.python_version(),
+                   "streamlit": streamlit.__version__, "cpus": os.cpu_count()},
+        "runs_per_question": float(np.mean(question_runs)),
+        "interactions": summarize([s[1] for s in answering], [s[2] for s in answering]),
+        "by_kind": {kind: summarize(*values) for kind, values in sorted(kinds.items())},
+        "session_bytes": {"peak": int(max(peaks)), "mean_peak": float(np.mean(peaks))},
+        "throughput": {"questions_per_s": len(question_runs) / busy,
+                       "interactions_per_s": len(samples) / busy,
+                       "users_per_s": len(peaks) / busy,
+                       "server_interactions_per_cpu_s": len(samples) / sum(s[1] for s in samples),
+                       "busy_seconds": busy, "wall_seconds": wall},
+    }
+
+
+def regressions(current, baseline, tolerance):
+    """Metrics that got worse than baseline by more than tolerance (a fraction)."""
+    checks = [("p95 ms per interaction", current["interactions"]["p95_ms"],
+               baseline["interactions"]["p95_ms"]),
+              ("reruns per question", current["runs_per_question"],
+               baseline["runs_per_question"]),
+              ("peak session bytes", current["session_bytes"]["peak"],
+               baseline["session_bytes"]["peak"])]
+    return [f"{name}: {now:,.2f} vs {then:,.2f}" for name, now, then in checks
+            if now > then * (1 + tolerance)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--users", type=int, default=42, help="simulated users in total")
+    parser.add_argument("--problems", type=int, default=10, choices=[10, 20, 30, 50])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="earlier --json results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown or growth over the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    shares = [args.users // args.processes + (i < args.users % args.processes)
+              for i in range(args.processes)]
+    firsts = np.cumsum([0] + shares[:-1]).tolist()
+    start = time.perf_counter()
+    # spawn: each worker imports the app's modules after pointing them at its own data files
+    with ProcessPoolExecutor(args.processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(worker, firsts, shares, [args.problems] * args.processes,
+                                [args.seed] * args.processes))
+    result = report(results, args, time.perf_counter() - start)
+
+    print(f"{args.users} users x {args.problems} problems on {args.processes} processes "
+          f"({os.cpu_count()} CPUs)")
+    print(f"{'interaction':<14}{'count':>8}{'runs':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for kind, stats in list(result["by_kind"].items()) + [("answering", result["interactions"])]:
+        print(f"{kind:<14}{stats['count']:>8,}{stats['runs_per_interaction']:>7.2f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+    throughput = result["throughput"]
+    print(f"\nreruns per question   {result['runs_per_question']:.2f}")
+    print(f"peak session state    {result['session_bytes']['peak'] / 1024:,.1f} KiB "
+          f"(mean {result['session_bytes']['mean_peak'] / 1024:,.1f} KiB per user)")
+    print(f"throughput            {throughput['questions_per_s']:,.1f} questions/s, "
+          f"{throughput['interactions_per_s']:,.1f} interactions/s, "
+          f"{throughput['users_per_s']:,.2f} users/s")
+    print(f"server capacity       {throughput['server_interactions_per_cpu_s']:,.0f} "
+          f"interactions/s per CPU on script time alone")
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(result, out, indent=2)
+        print(f"results written to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            worse = regressions(result, json.load(f), args.tolerance)
+        if worse:
+            print("\n".join(["REGRESSED:"] + worse))
+            sys.exit(1)
+        print(f"no regression beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
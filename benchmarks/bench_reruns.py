@@ -0,0 +1,102 @@
+"""Script executions and server milliseconds per answered question.
+
+Drives the app with Streamlit's AppTest: starts a quiz and types every answer
+one keystroke at a time. Each script execution, including the ones started
+by st.rerun(), is counted and timed by wrapping the script runner's exec
+call, so any version of the app can be measured,
+e.g. the version before a change:
+
+    git show <rev>:app_demo.py > /tmp/app_before.py
+    python -m benchmarks.bench_reruns --script /tmp/app_before.py
+    python -m benchmarks.bench_reruns
+
+AppTest always re-executes the whole script for a widget interaction, so on a
+live server the fragment-scoped interactions are cheaper still than reported.
+
+AppTest cannot drive custom components, so the answer pad is switched off
+and the text box is measured. The pad checks answers in the browser and
+reports each question to the server once, i.e. one run per question.
+"""
+import argparse
+import os
+import time
+
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.testing.v1 import AppTest
+
+from answers import format_answer
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+runs = {"count": 0, "seconds": 0.0}
+
+
+def _counting(exec_func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return exec_func(*args, **kwargs)
+        finally:
+            runs["count"] += 1
+            runs["seconds"] += time.perf_counter() - start
+    return wrapper
+
+
+script_runner.exec_func_with_error_handling = _counting(script_runner.exec_func_with_error_handling)
+
+
+def use_text_input(at):
+    """Answer through the text box: switch off the answer pad, in versions that have it."""
+    for toggle in at.toggle:
+        if toggle.key == "use_answer_pad":
+            toggle.set_value(False)
+
+
+def play_quiz(script, operation, difficulty):
+    """Play one 10-question quiz; returns (questions, keystrokes, runs, seconds) while answering."""
+    at = AppTest.from_file(script, default_timeout=30)
+    at.run()
+    at.selectbox[0].set_value(operation)
+    at.selectbox[1].set_value(difficulty)
+    use_text_input(at)
+    at.run()
+    next(b for b in at.button if "Start Quiz" in b.label).click().run()
+
+    # Only count the runs spent answering, not loading the page and starting the quiz
+    start_count, start_seconds = runs["count"], runs["seconds"]
+    questions = keystrokes = 0
+    while not at.session_state.session.quiz.complete:
+        typed = format_answer(at.session_state.session.quiz.current_answer)
+        attempts = at.session_state.session.quiz.attempts
+        for end in range(1, len(typed) + 1):
+            at.text_input[0].input(typed[:end]).run()
+            keystrokes += 1
+            # Tolerant checks can accept the answer before it is fully typed
+            if at.session_state.session.quiz.attempts != attempts:
+                break
+        questions += 1
+        assert not at.exception, at.exception
+    return questions, keystrokes, runs["count"] - start_count, runs["seconds"] - start_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=APP, help="app script to measure")
+    parser.add_argument("--quizzes", type=int, default=3, help="quizzes per operation")
+    args = parser.parse_args()
+    script = os.path.abspath(args.script)
+
+    print(f"{script}")
+    print(f"{'operation':<16}{'runs/question':>15}{'ms/question':>13}{'ms/run':>9}{'keys/question':>15}")
+    for operation in ("Addition", "Division", "Ratio to %", "Multiply by %", "Mixed"):
+        questions = keystrokes = count = seconds = 0
+        for _ in range(args.quizzes):
+            q, k, c, s = play_quiz(script, operation, "Medium")
+            questions, keystrokes, count, seconds = questions + q, keystrokes + k, count + c, seconds + s
+        ms = seconds * 1000
+        print(f"{operation:<16}{count / questions:>15.2f}{ms / questions:>13.1f}"
+              f"{ms / count:>9.2f}{keystrokes / questions:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
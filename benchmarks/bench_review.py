@@ -0,0 +1,67 @@
+"""Cost of the spaced-repetition schedule as a learner's backlog grows.
+
+Fills a schedule with missed problems spread over a few weeks, then times
+taking a review's worth of due items, recording the answers, and loading
+the journal back from disk.
+
+Run from the repository root:
+    python -m benchmarks.bench_review [--items 50000] [--reviews 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from review import DAY, ReviewSchedule
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--reviews", type=int, default=1000)
+    parser.add_argument("--quiz-size", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Distinct problems, so every miss is a separate item
+    problems = [(f"{i} + {i + 1}", 2 * i + 1) for i in range(args.items)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "learner.jsonl")
+        schedule = ReviewSchedule(path)
+        start_time = 1_700_000_000.0
+
+        start = time.perf_counter()
+        for problem, answer in problems:
+            schedule.missed("Addition", "Hard", problem, answer,
+                            now=start_time + rng.uniform(0, 21 * DAY))
+        missed = (time.perf_counter() - start) / len(problems)
+
+        now = start_time + 21 * DAY
+        take = record = 0.0
+        for _ in range(args.reviews):
+            start = time.perf_counter()
+            due = schedule.take_due(args.quiz_size, now=now)
+            take += time.perf_counter() - start
+            start = time.perf_counter()
+            for item in due:
+                schedule.reviewed(item.operation, item.problem, rng.random() < 0.8, now=now)
+            record += time.perf_counter() - start
+            now += 60
+
+        start = time.perf_counter()
+        reloaded = ReviewSchedule(path)
+        live = len(reloaded)
+        load = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+    print(f"schedule                     {len(schedule)} items ({live} after reload)")
+    print(f"missed                       {missed * 1e6:.1f} us per problem")
+    label = f"take_due({args.quiz_size})"
+    print(f"{label:<29}{take / args.reviews * 1e6:.1f} us")
+    print(f"reviewed                     {record / (args.reviews * args.quiz_size) * 1e6:.1f} us per answer")
+    print(f"load journal                 {load * 1e3:.1f} ms ({size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Server time to render the results page against the length of the history.
+
+Plays a quiz of each length headlessly with QuizSession, hands the finished
+session to the app through AppTest and times reruns of the results page
+(wall time of AppTest.run, so building and serializing every element is
+included). Any version of the app can be measured, e.g. the one before a
+change:
+
+    git show <rev>:app_demo.py > /tmp/app_before.py
+    python -m benchmarks.bench_review_render --script /tmp/app_before.py
+    python -m benchmarks.bench_review_render
+
+Run from the repository root.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_sessions import FakeClock
+from problem_queue import ProblemQueue
+from quiz_session import QuizSession
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+
+def finished_quiz(problems, seed=0):
+    """A completed Mixed quiz with about one problem in five skipped."""
+    rng = random.Random(seed)
+    clock = FakeClock()
+    quiz = QuizSession(ProblemQueue("Mixed", "Medium", problems, seed=seed), problems,
+                       clock=clock).start()
+    while not quiz.complete:
+        clock.now += rng.expovariate(1 / 6.0)
+        if rng.random() < 0.2:
+            quiz.skip()
+        else:
+            quiz.submit(float(quiz.current_answer))
+    return quiz
+
+
+def render_times(script, problems, reruns):
+    """(median seconds per rerun, elements on the page) for a finished quiz."""
+    at = AppTest.from_file(script, default_timeout=600)
+    quiz = finished_quiz(problems)
+    # Apps from before the session store keep the quiz in session state itself
+    at.session_state["quiz"] = quiz
+    at.session_state["quiz_active"] = True
+    at.run()
+    if "session" in at.session_state:
+        at.session_state.session.quiz = quiz
+        at.session_state.session.quiz_active = True
+        at.run()
+    assert not at.exception, at.exception
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    elements = len(at.text) + len(at.dataframe) + len(at.columns)
+    return statistics.median(times), elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=APP, help="app script to measure")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+    script = os.path.abspath(args.script)
+
+    print(script)
+    print(f"{'attempts':>10}{'ms/rerun':>12}{'elements':>10}")
+    for problems in args.sizes:
+        seconds, elements = render_times(script, problems, args.reruns)
+        print(f"{problems:>10,}{seconds * 1000:>12.1f}{elements:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of the per-session generators: creating them and drawing problems with them.
+
+A session owns a random.Random, and every quiz seeds its own queue from it
+with a ProblemQueue (NumPy PCG64) or an AdaptiveQueue (both kinds). This
+prints how long each of those takes to create. It then prints the cost per
+problem of generate_problem with a session generator, next to the
+module-level generator that it replaced.
+
+Run from the repository root:
+    python -m benchmarks.bench_rng
+"""
+import random
+import time
+
+import numpy as np
+
+from adaptive import AdaptiveQueue, SkillBook
+from operations import operation_names
+from problem_queue import ProblemQueue
+from problems import generate_problem, get_problem_index
+
+N = 20000
+
+
+def per_call(fn, n=N):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    skills = SkillBook()
+    print(f"{'created':<40}{'us each':>10}")
+    for label, fn in [
+        ("random.Random(seed) (session)", lambda i: random.Random(i)),
+        ("np.random.default_rng(seed)", lambda i: np.random.default_rng(i)),
+        ("ProblemQueue, 10 problems", lambda i: ProblemQueue("Mixed", "Medium", 10, seed=i)),
+        ("AdaptiveQueue", lambda i: AdaptiveQueue("Mixed", skills, seed=i)),
+    ]:
+        print(f"{label:<40}{per_call(fn, 5000):>10.2f}")
+
+    print(f"\n{'generate_problem, Medium':<24}{'session us':>12}{'global us':>11}")
+    session = random.Random(0)
+    for operation in operation_names():
+        get_problem_index(operation, "Medium")
+        ours = per_call(lambda i: generate_problem(operation, "Medium", session))
+        # The module-level generator, as generate_problem used before it took one
+        shared = per_call(lambda i: generate_problem(operation, "Medium", random))
+        print(f"{operation:<24}{ours:>12.2f}{shared:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
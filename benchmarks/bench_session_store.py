@@ -0,0 +1,199 @@
+"""Memory per session, snapshot size and evict/restore latency of the SessionStore.
+
+Fills a store with --sessions learners, each partway through a quiz of
+--problems problems (with their SkillBook and generator, as the app keeps
+them). It then reports:
+- bytes reachable from one live session, and the size of its snapshot;
+- traced memory with every session live, after a sweep has evicted them
+  all, and after they have all been restored;
+- p50/p95 milliseconds to evict one session and to restore one;
+- that the disk budget holds, with the oldest snapshots deleted first.
+
+It also checks that a restored quiz carries on where it stopped: the same
+problem, score and history, and a sprint deadline that counts the time
+spent on disk. It exits with status 1 if a check fails.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_store [--sessions 2000] [--problems 50]
+"""
+import argparse
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from adaptive import SkillBook
+from benchmarks.bench_load import deep_size
+from benchmarks.bench_sessions import FakeClock
+from problem_queue import ProblemQueue
+from quiz_session import QuizSession
+from session_store import SessionStore
+
+failures = []
+
+
+def expect(ok, message):
+    if not ok:
+        failures.append(message)
+
+
+def half_played(problems, seed, time_limit=None):
+    """A Mixed quiz with half its problems answered or skipped, and the learner's skills."""
+    rng = random.Random(seed)
+    skills = SkillBook()
+    quiz = QuizSession(ProblemQueue("Mixed", "Medium", problems, seed=seed), problems,
+                       skills=skills, time_limit=time_limit).start()
+    for _ in range(problems // 2):
+        if rng.random() < 0.2:
+            quiz.skip()
+        else:
+            quiz.submit(float(quiz.current_answer))
+    return {"quiz": quiz, "quiz_active": True, "quiz_ranked": False, "skill_stats": skills,
+            "session_seed": seed, "rng": random.Random(seed), "review_schedule": None}
+
+
+def percentiles(seconds):
+    cuts = statistics.quantiles([s * 1000 for s in seconds], n=20)
+    return cuts[9], cuts[18]
+
+
+def fill(store, users, problems):
+    sessions = []
+    for number, user_id in enumerate(users):
+        session = store.open(user_id)
+        vars(session).update(half_played(problems, number))
+        sessions.append(session)
+    return sessions
+
+
+def measure(directory, count, problems):
+    clock = FakeClock()
+    store = SessionStore(directory, idle_seconds=60, max_live=count + 1, clock=clock)
+    users = [f"user{number}" for number in range(count)]
+
+    # Memory first, traced from before the sessions exist
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = fill(store, users, problems)
+    live = tracemalloc.get_traced_memory()[0] - baseline
+    clock.now += 61
+    store.sweep()
+    evicted = tracemalloc.get_traced_memory()[0] - baseline
+    for session in sessions:
+        store.resume(session)
+    restored = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    one = deep_size(vars(sessions[0]), set())
+    snapshot = len(zlib.compress(pickle.dumps(
+        {key: value for key, value in vars(sessions[0]).items() if key != "user_id"},
+        protocol=pickle.HIGHEST_PROTOCOL)))
+
+    # Then latency, untraced: each eviction inside a sweep, and each restore
+    evict_times, restore_times = [], []
+    evict = store._evict
+
+    def timed_evict(*args):
+        start = time.perf_counter()
+        evict(*args)
+        evict_times.append(time.perf_counter() - start)
+
+    store._evict = timed_evict
+    clock.now += 61
+    store.sweep()
+    for session in sessions:
+        start = time.perf_counter()
+        store.resume(session)
+        restore_times.append(time.perf_counter() - start)
+    stats = store.stats()
+    expect(stats["evictions"] == 2 * count and stats["restores"] == 2 * count,
+           f"expected {2 * count} evictions and restores, got {stats}")
+
+    print(f"{'sessions':<34}{count:>12,}")
+    print(f"{'problems per quiz (half played)':<34}{problems:>12,}")
+    print(f"{'live bytes per session':<34}{one:>12,}")
+    print(f"{'snapshot bytes per session':<34}{snapshot:>12,}")
+    print(f"{'traced KiB, all live':<34}{live / 1024:>12,.0f}")
+    print(f"{'traced KiB, all evicted':<34}{evicted / 1024:>12,.0f}")
+    print(f"{'traced KiB, all restored':<34}{restored / 1024:>12,.0f}")
+    print(f"{'evict ms p50 / p95':<34}{'%.3f / %.3f' % percentiles(evict_times):>12}")
+    print(f"{'restore ms p50 / p95':<34}{'%.3f / %.3f' % percentiles(restore_times):>12}")
+
+
+def check_budget(directory, problems):
+    """Snapshots stay within the budget; the least recently written go first."""
+    clock = FakeClock()
+    store = SessionStore(directory, idle_seconds=60, max_live=10, clock=clock)
+    fill(store, ["sizer"], problems)
+    clock.now += 61
+    store.sweep()
+    size = store.stats()["snapshot_bytes"]
+
+    budget = 20 * size
+    clock = FakeClock()
+    store = SessionStore(directory, idle_seconds=60, max_live=10, disk_budget=budget,
+                         clock=clock)
+    fill(store, [f"budget{number}" for number in range(100)], problems)
+    stats = store.stats()
+    expect(stats["snapshot_bytes"] <= budget, f"{stats['snapshot_bytes']:,} bytes on disk "
+                                              f"over a budget of {budget:,}")
+    # Over max_live, the least recently used were evicted; of those, the oldest were deleted
+    expect(getattr(store.open("budget0"), "quiz", None) is None, "the oldest snapshot was kept")
+    expect(store.open("budget85").quiz.attempts > 0, "a recent snapshot was deleted")
+    print(f"{'disk budget KiB / used KiB':<34}"
+          f"{'%d / %d' % (budget // 1024, stats['snapshot_bytes'] // 1024):>12}")
+
+
+def check_resume(directory, problems):
+    """A restored quiz carries on, in a new store as if the server had restarted."""
+    clock = FakeClock()
+    store = SessionStore(directory, idle_seconds=60, clock=clock)
+    session = store.open("resumer")
+    vars(session).update(half_played(problems, 7))
+    sprint = QuizSession(ProblemQueue("Addition", "Easy", 64, seed=7), None,
+                         time_limit=60.0).start()
+    session.sprint = sprint
+    before = (session.quiz.current_problem, session.quiz.score, session.quiz.attempts,
+              session.quiz.history.problems(), session.rng.getstate())
+    remaining = sprint.remaining()
+    clock.now += 61
+    store.sweep()
+    expect(session.evicted, "an idle session was not evicted")
+
+    time.sleep(0.5)
+    store = SessionStore(directory, idle_seconds=60, clock=FakeClock())
+    session = store.open("resumer")
+    after = (session.quiz.current_problem, session.quiz.score, session.quiz.attempts,
+             session.quiz.history.problems(), session.rng.getstate())
+    expect(after == before, "the restored quiz differs from the evicted one")
+    expect(session.quiz.submit(float(session.quiz.current_answer)),
+           "the restored quiz refused a right answer")
+    away = remaining - session.sprint.remaining()
+    expect(0.5 <= away < 1.0, f"the sprint lost {away:.2f}s while on disk, expected about 0.5s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--problems", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_session_store_") as directory:
+        measure(directory, args.sessions, args.problems)
+    with tempfile.TemporaryDirectory(prefix="bench_session_store_") as directory:
+        check_budget(directory, args.problems)
+    with tempfile.TemporaryDirectory(prefix="bench_session_store_") as directory:
+        check_resume(directory, args.problems)
+
+    if failures:
+        print("\n".join(["FAILED:"] + failures))
+        sys.exit(1)
+    print("restored sessions resume where they stopped")
+
+
+if __name__ == "__main__":
+    main()
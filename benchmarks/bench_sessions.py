@@ -0,0 +1,111 @@
+"""Simulated quiz sessions per second through the headless QuizSession.
+
+Each simulated learner starts a quiz, answers most problems correctly (some
+after a wrong first try) and skips the rest, with response times taken
+from a fake clock so no time is spent waiting. No Streamlit code is
+involved, so this measures the quiz core on its own. Add --log to also
+write every attempt to an AttemptLog in a temporary directory, or
+--profile to print where the time goes.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions [--sessions 2000] [--problems 20] [--log] [--profile]
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import random
+import tempfile
+import time
+
+from adaptive import AdaptiveQueue, SkillBook
+from attempt_log import AttemptLog
+from problem_queue import ProblemQueue
+from quiz_session import QuizSession
+
+MODES = [("Addition", "Easy"), ("Multiplication", "Hard"), ("Ratio to %", "Medium"),
+         ("Mixed", "Medium"), ("Mixed", "Adaptive")]
+
+
+class FakeClock:
+    """Clock a simulated learner moves forward by their thinking time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def play(operation, difficulty, problems, rng, skills, on_attempt):
+    """One simulated quiz; returns the number of submit and skip calls."""
+    clock = FakeClock()
+    if difficulty == "Adaptive":
+        queue = AdaptiveQueue(operation, skills, seed=rng.getrandbits(63))
+    else:
+        queue = ProblemQueue(operation, difficulty, problems, seed=rng.getrandbits(63))
+    quiz = QuizSession(queue, problems, skills=skills, on_attempt=on_attempt, clock=clock).start()
+    calls = 0
+    while not quiz.complete:
+        clock.now += rng.expovariate(1 / 6.0)
+        calls += 1
+        if rng.random() < 0.15:
+            quiz.skip()
+            continue
+        if rng.random() < 0.2:
+            calls += 1
+            quiz.submit(float(quiz.current_answer) + 1000)
+        accepted = quiz.submit(float(quiz.current_answer))
+        assert accepted, quiz.current_problem
+    results = quiz.results()
+    assert results['total'] == len(results['history']) == problems
+    return calls
+
+
+def run(args, on_attempt):
+    rng = random.Random(0)
+    print(f"{'mode':<26}{'sessions/s':>12}{'calls/s':>12}{'us/call':>10}")
+    for operation, difficulty in MODES:
+        skills = SkillBook()
+        calls = 0
+        start = time.perf_counter()
+        for _ in range(args.sessions):
+            calls += play(operation, difficulty, args.problems, rng, skills, on_attempt)
+        seconds = time.perf_counter() - start
+        print(f"{operation + ' / ' + difficulty:<26}{args.sessions / seconds:>12,.0f}"
+              f"{calls / seconds:>12,.0f}{seconds / calls * 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000, help="quizzes per mode")
+    parser.add_argument("--problems", type=int, default=20, help="problems per quiz")
+    parser.add_argument("--log", action="store_true", help="append every attempt to an AttemptLog")
+    parser.add_argument("--profile", action="store_true", help="print the top functions by time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        on_attempt = None
+        log = None
+        if args.log:
+            log = AttemptLog(os.path.join(directory, "attempts.log"), fsync=False)
+
+            def on_attempt(quiz, attempt):
+                log.append("bench", quiz.queue.operation, attempt.difficulty, attempt.problem,
+                           attempt.correct_answer, attempt.user_answer, attempt.correct,
+                           attempt.response_time)
+
+        print(f"{args.sessions} sessions x {args.problems} problems per mode"
+              f"{', logging attempts' if args.log else ''}")
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.runcall(run, args, on_attempt)
+            pstats.Stats(profiler).sort_stats("tottime").print_stats(15)
+        else:
+            run(args, on_attempt)
+        if log is not None:
+            log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Latency budget for Sprint mode: server time per answered question.
+
+Starts a 60-second sprint through AppTest and answers each problem in a
+single input, the way a fast player submits. Script executions are counted
+by wrapping the script runner's exec call, as in bench_reruns.
+
+The app's own server time per answer is the answer callback plus the quiz
+panel run that shows the next problem. Both are read from the app's
+histograms (mental_math_answer_seconds{action="check"} and
+mental_math_render_seconds{view="quiz_panel"}), whose sums are exact, so
+Streamlit's and AppTest's own overhead is left out. The whole script run
+as AppTest sees it is printed for reference but not checked: most of it is
+AppTest, and it varies a lot between machines.
+
+The benchmark checks that:
+- each answer costs one script run (no extra rerun to show the next problem);
+- the 95th percentile app server time per answered question is within
+  --budget-ms;
+- the headless QuizSession.submit path stays within --submit-budget-us.
+
+Both budgets are for a machine that runs the calibration workload (drawing
+and reading back Mixed problems) in CALIBRATION_MS. On a slower or busier
+machine they are scaled up by how much longer the calibration takes there.
+
+It exits with status 1 if a check fails, so it can gate a change.
+
+Run from the repository root:
+    python -m benchmarks.bench_sprint [--questions 200] [--budget-ms 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.testing.v1 import AppTest
+
+from answers import format_answer, parse_answer
+from benchmarks.bench_reruns import use_text_input
+from operations import get_operation
+from problem_queue import ProblemQueue
+from quiz_session import QuizSession
+from resources import server_metrics
+
+# Best of CALIBRATION_ROUNDS runs of calibration() on the machine the budgets were set on
+CALIBRATION_MS = 15.0
+CALIBRATION_ROUNDS = 9
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+script_seconds = []
+
+
+def _timed(exec_func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return exec_func(*args, **kwargs)
+        finally:
+            script_seconds.append(time.perf_counter() - start)
+    return wrapper
+
+
+script_runner.exec_func_with_error_handling = _timed(script_runner.exec_func_with_error_handling)
+
+
+def calibration():
+    """Seconds for a fixed piece of work like the server's: draw and read back 5,000 problems."""
+    rng = random.Random(0)
+    mixed = get_operation("Mixed")
+    start = time.perf_counter()
+    for _ in range(5000):
+        _, answer = mixed.generate("Medium", rng)
+        parse_answer(str(answer))
+    return time.perf_counter() - start
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def app_seconds():
+    """Total app server time so far in answer callbacks and quiz panel runs."""
+    metrics = server_metrics()
+    check = metrics.histogram("mental_math_answer_seconds", action="check")
+    panel = metrics.histogram("mental_math_render_seconds", view="quiz_panel")
+    return (check.sum if check else 0.0) + (panel.sum if panel else 0.0)
+
+
+def app_sprint(operation, questions):
+    """(runs, app server seconds, script seconds) per answer over a sprint in the app."""
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.run()
+    at.selectbox[0].set_value(operation)
+    at.radio[0].set_value("Sprint")
+    use_text_input(at)
+    at.run()
+    next(b for b in at.button if "Start Quiz" in b.label).click().run()
+    runs, per_answer, per_script = [], [], []
+    for _ in range(questions):
+        quiz = at.session_state.session.quiz
+        attempts = quiz.attempts
+        del script_seconds[:]
+        before = app_seconds()
+        at.text_input[0].input(format_answer(quiz.current_answer)).run()
+        per_answer.append(app_seconds() - before)
+        assert not at.exception, at.exception
+        assert at.session_state.session.quiz.attempts == attempts + 1
+        runs.append(len(script_seconds))
+        per_script.append(sum(script_seconds))
+    return runs, per_answer, per_script
+
+
+def headless_submits(operation, questions):
+    """Seconds per QuizSession.submit of a correct answer in a sprint."""
+    quiz = QuizSession(ProblemQueue(operation, "Medium", 64), None, time_limit=3600).start()
+    times = []
+    for _ in range(questions):
+        answer = float(quiz.current_answer)
+        start = time.perf_counter()
+        quiz.submit(answer)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200, help="answers per operation")
+    parser.add_argument("--budget-ms", type=float, default=5.0,
+                        help="p95 app server time per answered question, before scaling")
+    parser.add_argument("--submit-budget-us", type=float, default=100.0,
+                        help="p95 time of QuizSession.submit, before scaling")
+    args = parser.parse_args()
+
+    measured = min(calibration() for _ in range(CALIBRATION_ROUNDS)) * 1000
+    scale = max(1.0, measured / CALIBRATION_MS)
+    budget_ms, submit_budget_us = args.budget_ms * scale, args.submit_budget_us * scale
+    print(f"calibration {measured:.1f} ms against {CALIBRATION_MS} ms: budgets x{scale:.2f}, "
+          f"{budget_ms:.1f} ms per answer and {submit_budget_us:.0f} us per submit\n")
+
+    failures = []
+    print(f"{'operation':<16}{'runs/answer':>12}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'script p95 ms':>15}{'submit p50 us':>15}{'p95 us':>9}")
+    for operation in ("Addition", "Ratio to %", "Mixed"):
+        runs, per_answer, per_script = app_sprint(operation, args.questions)
+        submits = headless_submits(operation, args.questions * 10)
+        p95 = percentile(per_answer, 95) * 1000
+        submit_p95 = percentile(submits, 95) * 1e6
+        print(f"{operation:<16}{statistics.mean(runs):>12.2f}"
+              f"{statistics.median(per_answer) * 1000:>9.2f}{p95:>9.2f}"
+              f"{percentile(per_script, 95) * 1000:>15.1f}"
+              f"{statistics.median(submits) * 1e6:>15.1f}{submit_p95:>9.1f}")
+        if max(runs) > 1:
+            failures.append(f"{operation}: {max(runs)} script runs for one answer")
+        if p95 > budget_ms:
+            failures.append(f"{operation}: p95 {p95:.2f} ms per answer > {budget_ms:.1f} ms")
+        if submit_p95 > submit_budget_us:
+            failures.append(f"{operation}: submit p95 {submit_p95:.1f} us > "
+                            f"{submit_budget_us:.0f} us")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("latency budget met" if not failures else "latency budget exceeded")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
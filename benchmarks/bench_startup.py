@@ -0,0 +1,144 @@
+"""Cold start and per-rerun cost of the app script.
+
+Measures three things:
+- cold import: a fresh interpreter running the script once in bare mode
+  (no server), which is the imports plus one top-to-bottom run;
+- first run: a fresh interpreter's first AppTest run, the time a new
+  server process takes to serve its first page;
+- per rerun: median script time of full-page reruns in a warm process, on
+  the start page and in a quiz, with the bytes of static markdown each
+  one re-sends and the st.cache_resource / st.cache_data decorations it
+  makes. Each decoration reads the function's source to build its key, so
+  a script that defines cached functions pays for them on every run.
+
+The script imports the modules next to it, so compare another version
+from a checkout of the whole tree, e.g.:
+
+    git worktree add /tmp/before <rev>
+    python -m benchmarks.bench_startup --script /tmp/before/app_demo.py
+    python -m benchmarks.bench_startup
+
+Run from the repository root.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+COLD_IMPORT = """
+import runpy, sys, time
+start = time.perf_counter()
+runpy.run_path(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+FIRST_RUN = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file(sys.argv[1], default_timeout=60).run()
+print(time.perf_counter() - start)
+"""
+
+
+def fresh_interpreter(code, script, repeat):
+    """Median seconds reported by code run in repeat new interpreters."""
+    tree = os.path.dirname(script)
+    env = dict(os.environ, PYTHONPATH=tree)
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code, script], cwd=tree, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def static_bytes(at):
+    """Bytes of the stylesheet and help text in the last run's markdown."""
+    return sum(len(m.value.encode()) for m in at.markdown
+               if m.value.lstrip().startswith(("<style>", "### How it works")))
+
+
+script_seconds = []
+
+
+def _timed(exec_func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return exec_func(*args, **kwargs)
+        finally:
+            script_seconds.append(time.perf_counter() - start)
+    return wrapper
+
+
+script_runner.exec_func_with_error_handling = _timed(script_runner.exec_func_with_error_handling)
+
+decorations = []
+
+
+class _Counted:
+    """A cache decorator that notes each use, and is otherwise the same."""
+
+    def __init__(self, decorator):
+        self._decorator = decorator
+
+    def __call__(self, *args, **kwargs):
+        decorations.append(1)
+        return self._decorator(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._decorator, name)
+
+
+st.cache_resource = _Counted(st.cache_resource)
+st.cache_data = _Counted(st.cache_data)
+
+
+def rerun_times(at, reruns):
+    """Median seconds spent executing the script per rerun, and cache decorations per rerun."""
+    del script_seconds[:]
+    del decorations[:]
+    for _ in range(reruns):
+        at.run()
+    return statistics.median(script_seconds), len(decorations) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=APP, help="app script to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per cold measurement")
+    parser.add_argument("--reruns", type=int, default=200)
+    args = parser.parse_args()
+    script = os.path.abspath(args.script)
+
+    cold = fresh_interpreter(COLD_IMPORT, script, args.repeat)
+    first = fresh_interpreter(FIRST_RUN, script, args.repeat)
+
+    at = AppTest.from_file(script, default_timeout=60)
+    at.run()
+    idle, idle_cached = rerun_times(at, args.reruns)
+    idle_static = static_bytes(at)
+    next(b for b in at.button if "Start Quiz" in b.label).click().run()
+    quiz, quiz_cached = rerun_times(at, args.reruns)
+    quiz_static = static_bytes(at)
+
+    print(script)
+    print(f"cold import                  {cold * 1000:.0f} ms")
+    print(f"first run                    {first * 1000:.0f} ms")
+    print(f"rerun, start page            {idle * 1000:.1f} ms, {idle_static:,} static bytes, "
+          f"{idle_cached:g} cache decorations")
+    print(f"rerun, quiz page             {quiz * 1000:.1f} ms, {quiz_static:,} static bytes, "
+          f"{quiz_cached:g} cache decorations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Worksheet export throughput and memory, by format and size.
+
+Each export streams problems to a null sink, so the numbers are generation
+plus formatting, not disk speed. Peak memory is traced in a second run of
+the same export: it should stay flat as the number of problems grows,
+because only one chunk of problems is held at a time.
+
+Run from the repository root:
+    python -m benchmarks.bench_worksheet [--counts 10000 100000 1000000] [--operation Mixed]
+"""
+import argparse
+import time
+import tracemalloc
+
+from problems import DIFFICULTIES
+from worksheet import FORMATS, export
+
+
+class NullSink:
+    """Binary stream that counts what is written and keeps none of it."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    # io.TextIOWrapper (used by the CSV writer) checks these
+    def writable(self):
+        return True
+
+    def readable(self):
+        return False
+
+    def seekable(self):
+        return False
+
+    closed = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--operation", default="Mixed")
+    parser.add_argument("--difficulty", default="Medium", choices=DIFFICULTIES)
+    args = parser.parse_args()
+
+    print(f"{args.operation} / {args.difficulty}, answers included")
+    print(f"{'format':<8}{'problems':>12}{'seconds':>10}{'problems/s':>14}{'MB/s':>8}"
+          f"{'output MB':>11}{'peak MB':>9}")
+    for fmt in FORMATS:
+        for count in args.counts:
+            sink = NullSink()
+            start = time.perf_counter()
+            export(sink, fmt, args.operation, args.difficulty, count, seed=0)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            export(NullSink(), fmt, args.operation, args.difficulty, count, seed=0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{fmt:<8}{count:>12,}{seconds:>10.2f}{count / seconds:>14,.0f}"
+                  f"{sink.bytes / seconds / 1e6:>8.1f}{sink.bytes / 1e6:>11.1f}{peak / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
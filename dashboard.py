@@ -0,0 +1,134 @@
+"""Teacher dashboard: per-class and per-student reports from the attempt log.
+
+A separate app from the learners' one, run with `streamlit run dashboard.py`.
+It shows nothing until the key in MENTAL_MATH_DASHBOARD_KEY is entered, and
+it refuses to run without one. Students appear under their leaderboard name
+or a short hash of their id, never the id itself: that is the ?user= value
+that reopens their quiz.
+
+The Analytics columns are shared by every session in the server process and
+read only the log records added since the last refresh, at most every
+REFRESH_SECONDS. Reports are cached per view until new attempts arrive.
+"""
+import hashlib
+import hmac
+import os
+
+import streamlit as st
+
+from analytics import ROSTER_PATH, UNASSIGNED, Analytics, load_roster, report
+from attempt_log import DEFAULT_PATH
+from resources import leaderboard
+
+REFRESH_SECONDS = 30
+DASHBOARD_KEY = os.environ.get("MENTAL_MATH_DASHBOARD_KEY")
+
+st.set_page_config(page_title="Class Analytics", page_icon="📊", layout="wide")
+
+
+@st.cache_resource
+def attempt_columns():
+    """Columns of the attempt log shared by every session in this server process."""
+    return Analytics()
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def refresh():
+    """Read new attempts from the log; returns how many the columns hold."""
+    columns = attempt_columns()
+    columns.update(DEFAULT_PATH)
+    return len(columns)
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def roster():
+    return load_roster(ROSTER_PATH)
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def labels(rows):
+    """{user id: how the dashboard shows that student}; rows as for cached_report."""
+    names = leaderboard().names()
+    labels = {}
+    for user in attempt_columns().students:
+        digest = hashlib.sha256(user.encode()).hexdigest()[:6]
+        labels[user] = f"{names[user]} ({digest})" if names.get(user) else f"Learner {digest}"
+    return labels
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_report(name, students, rows, top=10):
+    """A report for some students; rows is only there to miss the cache once new attempts arrive."""
+    frame = report(attempt_columns(), name, None if students is None else list(students),
+                   roster(), top)
+    if "Student" in frame:
+        frame["Student"] = frame["Student"].map(labels(rows))
+    return frame
+
+
+st.title("📊 Class Analytics")
+
+if not DASHBOARD_KEY:
+    st.error("Set MENTAL_MATH_DASHBOARD_KEY to open the dashboard.")
+    st.stop()
+key = st.text_input("Dashboard key", type="password")
+if not hmac.compare_digest(key.encode(), DASHBOARD_KEY.encode()):
+    st.stop()
+
+rows = refresh()
+if not rows:
+    st.info("No attempts logged yet.")
+    st.stop()
+
+# Who the reports cover
+classes = sorted(set(roster().values()) | {UNASSIGNED})
+scope = st.sidebar.radio("Report on", ["Everyone", "A class", "A student"])
+students = None
+if scope == "A class":
+    klass = st.sidebar.selectbox("Class", classes)
+    students = tuple(attempt_columns().class_members(roster(), klass))
+elif scope == "A student":
+    # Only labels go to the browser; the id is looked up here
+    by_label = {label: user for user, label in labels(rows).items()}
+    student = st.sidebar.selectbox("Student", sorted(by_label))
+    students = (by_label[student],)
+st.sidebar.caption(f"{rows:,} attempts, refreshed every {REFRESH_SECONDS}s")
+
+skills = cached_report("skills", students, rows)
+if skills.empty:
+    st.info("No attempts for this selection yet.")
+    st.stop()
+
+attempts = int(skills["Attempts"].sum())
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("📝 Attempts", f"{attempts:,}")
+with col2:
+    st.metric("🎯 Accuracy", f"{100 * skills['Correct'].sum() / attempts:.1f}%")
+with col3:
+    st.metric("👥 Students", len(cached_report("students", students, rows)))
+
+seconds = {"Median time (s)": st.column_config.NumberColumn(format="%.1f"),
+           "Accuracy (%)": st.column_config.NumberColumn(format="%.1f")}
+skills_tab, missed_tab, weekly_tab, students_tab, classes_tab = st.tabs(
+    ["Skills", "Most missed", "Weekly", "Students", "Classes"])
+with skills_tab:
+    st.dataframe(skills, hide_index=True, width="stretch", column_config=seconds)
+with missed_tab:
+    top = st.slider("Problems", 5, 50, 10, step=5)
+    st.dataframe(cached_report("missed", students, rows, top), hide_index=True, width="stretch",
+                 column_config={"Miss rate (%)": st.column_config.NumberColumn(format="%.0f")})
+with weekly_tab:
+    weekly = cached_report("weekly", students, rows)
+    st.line_chart(weekly, x="Week of", y="Accuracy (%)")
+    st.line_chart(weekly, x="Week of", y="Median time (s)")
+    st.dataframe(weekly, hide_index=True, width="stretch", column_config=seconds)
+with students_tab:
+    st.dataframe(cached_report("students", students, rows), hide_index=True, width="stretch",
+                 column_config=seconds)
+with classes_tab:
+    st.dataframe(cached_report("classes", students, rows), hide_index=True, width="stretch",
+                 column_config=seconds)
+    if not roster():
+        st.caption(f"Everyone is {UNASSIGNED} until a roster is saved at {ROSTER_PATH} "
+                   "(columns user and class).")
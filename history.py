@@ -0,0 +1,202 @@
+import array
+import sys
+
+import numpy as np
+
+from answers import format_answers
+from operations import get_operation
+from problems import DIFFICULTIES
+
+
+class Attempt:
+    """One accepted or skipped problem, as shown in the Problem Review."""
+
+    __slots__ = ("problem", "correct_answer", "user_answer", "correct", "response_time",
+                 "operation", "difficulty")
+
+    def __init__(self, problem, correct_answer, user_answer, correct, response_time,
+                 operation, difficulty):
+        self.problem = problem
+        self.correct_answer = correct_answer
+        self.user_answer = user_answer
+        self.correct = correct
+        self.response_time = response_time
+        self.operation = operation
+        self.difficulty = difficulty
+
+
+class AttemptHistory:
+    """A quiz's attempts in parallel typed arrays, about 40 bytes each.
+
+    Only operands are stored; the problem string is formatted again from
+    the operation's template when an attempt is read back. Operation names
+    are stored as small codes. Problems the operation can't parse keep their
+    text in a side table. Indexing and iteration build Attempt records on
+    demand.
+    """
+
+    def __init__(self):
+        self._left = array.array("q")
+        self._right = array.array("q")
+        self._answers = array.array("d")
+        self._user_answers = array.array("d")
+        self._response_times = array.array("f")
+        self._correct = array.array("B")
+        self._operations = array.array("B")    # index into _names
+        self._difficulties = array.array("B")  # index into DIFFICULTIES
+        self._names = []
+        self._codes = {}
+        self._unparsed = {}
+        self._tables = {}
+
+    def __len__(self):
+        return len(self._correct)
+
+    def __getstate__(self):
+        # The cached tables are rebuilt on demand
+        return {**vars(self), "_tables": {}}
+
+    def append(self, attempt, operands=None):
+        """Add an attempt; operands are parsed from its problem unless given."""
+        code = self._codes.get(attempt.operation)
+        if code is None:
+            code = self._codes[attempt.operation] = len(self._names)
+            self._names.append(attempt.operation)
+        if operands is None:
+            parsed = get_operation(attempt.operation).parse(attempt.problem)
+            operands = parsed[1:] if parsed else None
+        if operands is None:
+            self._unparsed[len(self)] = attempt.problem
+            operands = (0, 0)
+        self._left.append(operands[0])
+        self._right.append(operands[1])
+        self._answers.append(attempt.correct_answer)
+        self._user_answers.append(attempt.user_answer)
+        self._response_times.append(attempt.response_time)
+        self._correct.append(bool(attempt.correct))
+        self._operations.append(code)
+        self._difficulties.append(DIFFICULTIES.index(attempt.difficulty))
+
+    def problem(self, i):
+        """Display string of attempt i."""
+        text = self._unparsed.get(i)
+        if text is None:
+            operation = get_operation(self._names[self._operations[i]])
+            text = operation.format(self._left[i], self._right[i])
+        return text
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("attempt index out of range")
+        return Attempt(self.problem(i), self._answers[i], self._user_answers[i],
+                       bool(self._correct[i]), self._response_times[i],
+                       self._names[self._operations[i]], DIFFICULTIES[self._difficulties[i]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _view(self, buffer, dtype):
+        view = np.frombuffer(buffer, dtype=dtype) if len(buffer) else np.zeros(0, dtype=dtype)
+        view.flags.writeable = False
+        return view
+
+    def columns(self):
+        """NumPy views of the stored columns, for vectorized summaries."""
+        return {
+            "left": self._view(self._left, np.int64),
+            "right": self._view(self._right, np.int64),
+            "answer": self._view(self._answers, np.float64),
+            "user_answer": self._view(self._user_answers, np.float64),
+            "response_time": self._view(self._response_times, np.float32),
+            "correct": self._view(self._correct, np.uint8).astype(bool),
+            "operation": self._view(self._operations, np.uint8),
+            "difficulty": self._view(self._difficulties, np.uint8),
+        }
+
+    def problems(self):
+        """Every problem string, formatted one operation at a time."""
+        texts = [None] * len(self)
+        left, right = self._left, self._right
+        codes = self._view(self._operations, np.uint8)
+        for code, name in enumerate(self._names):
+            form = get_operation(name).format
+            for i in np.flatnonzero(codes == code).tolist():
+                texts[i] = form(left[i], right[i])
+        for i, text in self._unparsed.items():
+            texts[i] = text
+        return texts
+
+    def _cached(self, key, build):
+        # Tables are rebuilt only after new attempts, not on every rerun of the results page
+        cached = self._tables.get(key)
+        if cached is None or cached[0] != len(self):
+            cached = self._tables[key] = (len(self), build())
+        return cached[1]
+
+    def summary(self, slowest=5):
+        """Per-operation counts, accuracy and mean time, and the slowest attempts.
+
+        Returns (per_operation, slowest) DataFrames, both computed with NumPy
+        over the whole history at once.
+        """
+        return self._cached(("summary", slowest), lambda: self._summary(slowest))
+
+    def _summary(self, slowest):
+        import pandas as pd  # only the results page needs it; keeps it out of app startup
+        columns = self.columns()
+        codes = columns["operation"]
+        correct = columns["correct"]
+        times = columns["response_time"].astype(np.float64)
+        count = np.bincount(codes, minlength=len(self._names))
+        right = np.bincount(codes, weights=correct, minlength=len(self._names))
+        total_time = np.bincount(codes, weights=times, minlength=len(self._names))
+        seen = count > 0
+        per_operation = pd.DataFrame({
+            "Operation": np.array(self._names, dtype=object)[seen] if self._names else [],
+            "Attempts": count[seen],
+            "Correct": right[seen].astype(np.int64),
+            "Accuracy (%)": right[seen] / count[seen] * 100,
+            "Mean time (s)": total_time[seen] / count[seen],
+        })
+
+        k = min(slowest, len(self))
+        top = np.argpartition(-times, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+        top = top[np.argsort(-times[top], kind="stable")]
+        slow = pd.DataFrame({
+            "#": top + 1,
+            "Problem": [self.problem(i) for i in top.tolist()],
+            "Time (s)": times[top],
+            "Result": np.where(correct[top], "✅", "❌"),
+        })
+        return per_operation, slow
+
+    def to_frame(self):
+        """One row per attempt for the Problem Review table."""
+        return self._cached("frame", self._frame)
+
+    def _frame(self):
+        import pandas as pd
+        columns = self.columns()
+        correct = columns["correct"]
+        your_answer = format_answers(columns["user_answer"])
+        your_answer[correct] = ""
+        frame = pd.DataFrame({
+            "Result": np.where(correct, "✅", "❌"),
+            "Problem": self.problems(),
+            "Answer": format_answers(columns["answer"]),
+            "Your answer": your_answer,
+            "Time (s)": columns["response_time"],
+        })
+        frame.index = pd.RangeIndex(1, len(self) + 1)
+        return frame
+
+    @property
+    def nbytes(self):
+        buffers = (self._left, self._right, self._answers, self._user_answers,
+                   self._response_times, self._correct, self._operations, self._difficulties)
+        return (sum(sys.getsizeof(b) for b in buffers) + sys.getsizeof(self._names)
+                + sys.getsizeof(self._codes) + sys.getsizeof(self._unparsed)
+                + sum(sys.getsizeof(text) for text in self._unparsed.values()))
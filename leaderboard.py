@@ -0,0 +1,167 @@
+"""Leaderboards per operation, difficulty and time window, kept in SQLite.
+
+Each completed quiz updates the player's best result in three periods (the
+day, the ISO week and all time). Rows only change when the new result
+ranks higher. An index on (operation, difficulty, period, accuracy,
+mean_time) keeps every board in rank order as rows are written, so reading
+the top N is an index range scan with no sort, and a player's rank is a
+range count.
+
+Reads go through an in-process cache that expires after ttl seconds.
+Writes from this process clear the boards they touch straight away, and
+other processes see them once their cached copy expires.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+# Where the app keeps its leaderboard unless MENTAL_MATH_LEADERBOARD says otherwise
+DEFAULT_PATH = os.environ.get("MENTAL_MATH_LEADERBOARD", os.path.join("data", "leaderboard.db"))
+
+WINDOWS = {"Today": "day", "This week": "week", "All time": "all"}
+# Expired cache entries are dropped once the cache holds this many
+MAX_CACHED = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS best (
+    operation  TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    period     TEXT NOT NULL,  -- 'all', '2026-W42' or '2026-10-17'
+    user       TEXT NOT NULL,
+    accuracy   REAL NOT NULL,
+    mean_time  REAL NOT NULL,
+    score      INTEGER NOT NULL,
+    total      INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (operation, difficulty, period, user)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS best_rank
+    ON best (operation, difficulty, period, accuracy DESC, mean_time ASC);
+CREATE TABLE IF NOT EXISTS players (
+    user TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Replace a stored best only with a better result: higher accuracy, or as accurate but faster
+UPSERT = """
+INSERT INTO best (operation, difficulty, period, user, accuracy, mean_time, score, total,
+                  finished_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (operation, difficulty, period, user) DO UPDATE SET
+    accuracy = excluded.accuracy, mean_time = excluded.mean_time, score = excluded.score,
+    total = excluded.total, finished_at = excluded.finished_at
+WHERE excluded.accuracy > best.accuracy
+   OR (excluded.accuracy = best.accuracy AND excluded.mean_time < best.mean_time)
+"""
+
+TOP = """
+SELECT best.user, COALESCE(players.name, ''), accuracy, mean_time, score, total
+FROM best LEFT JOIN players ON players.user = best.user
+WHERE operation = ? AND difficulty = ? AND period = ?
+ORDER BY accuracy DESC, mean_time ASC
+LIMIT ?
+"""
+
+RANK = """
+SELECT 1 + COUNT(*) FROM best
+WHERE operation = ? AND difficulty = ? AND period = ?
+  AND (accuracy > ? OR (accuracy = ? AND mean_time < ?))
+"""
+
+
+def periods(timestamp):
+    """Period keys a result finished at timestamp belongs to, by window."""
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    year, week, _ = moment.isocalendar()
+    return {"day": moment.date().isoformat(), "week": f"{year}-W{week:02d}", "all": "all"}
+
+
+class Leaderboard:
+    """Leaderboards in one SQLite file, safe to share between sessions."""
+
+    def __init__(self, path, ttl=5.0):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def record(self, user, operation, difficulty, score, total, mean_time, finished_at=None):
+        """Add a completed quiz; returns the period keys it was recorded under."""
+        finished_at = time.time() if finished_at is None else finished_at
+        accuracy = score / total * 100 if total else 0.0
+        keys = periods(finished_at)
+        rows = [(operation, difficulty, period, user, accuracy, mean_time, score, total,
+                 finished_at) for period in keys.values()]
+        with self._lock:
+            with self._db:
+                self._db.executemany(UPSERT, rows)
+            for period in keys.values():
+                for key in [key for key in self._cache if key[:3] == (operation, difficulty, period)]:
+                    del self._cache[key]
+        return keys
+
+    def set_name(self, user, name):
+        with self._lock:
+            with self._db:
+                self._db.execute("INSERT INTO players (user, name) VALUES (?, ?) "
+                                 "ON CONFLICT (user) DO UPDATE SET name = excluded.name",
+                                 (user, name))
+            # Names appear on every board
+            self._cache.clear()
+
+    def names(self):
+        """{user: name} for every player who has set a name."""
+        with self._lock:
+            return dict(self._db.execute("SELECT user, name FROM players"))
+
+    def _read(self, key, read):
+        """Result of read() for a cache key, reusing it until it is ttl seconds old."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None or cached[0] <= now:
+                if len(self._cache) >= MAX_CACHED:
+                    self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                cached = self._cache[key] = (now + self.ttl, read())
+            return cached[1]
+
+    def top(self, operation, difficulty, window="all", limit=10, now=None):
+        """Best results on a board as (user, name, accuracy, mean_time, score, total) rows."""
+        period = periods(time.time() if now is None else now)[window]
+        return self._read((operation, difficulty, period, "top", limit), lambda: self._db.execute(
+            TOP, (operation, difficulty, period, limit)).fetchall())
+
+    def rank(self, user, operation, difficulty, window="all", now=None):
+        """(rank, players on the board) for user, or None if they have no result there."""
+        period = periods(time.time() if now is None else now)[window]
+        return self._read((operation, difficulty, period, "rank", user),
+                          lambda: self._rank(user, operation, difficulty, period))
+
+    def _rank(self, user, operation, difficulty, period):
+        row = self._db.execute(
+            "SELECT accuracy, mean_time FROM best "
+            "WHERE operation = ? AND difficulty = ? AND period = ? AND user = ?",
+            (operation, difficulty, period, user)).fetchone()
+        if row is None:
+            return None
+        accuracy, mean_time = row
+        rank = self._db.execute(RANK, (operation, difficulty, period, accuracy, accuracy,
+                                       mean_time)).fetchone()[0]
+        players = self._db.execute(
+            "SELECT COUNT(*) FROM best WHERE operation = ? AND difficulty = ? AND period = ?",
+            (operation, difficulty, period)).fetchone()[0]
+        return rank, players
+
+    def close(self):
+        with self._lock:
+            self._db.close()
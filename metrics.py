@@ -0,0 +1,169 @@
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Each power of two is split into this many linear sub-buckets (~6% precision)
+SUB_BUCKETS = 16
+# Tracked range is 2**-20 s (~1 us) to 2**12 s (~68 min); values outside are clamped
+MIN_EXPONENT = -19
+MAX_EXPONENT = 12
+BUCKETS = (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS
+# Powers of two exported as Prometheus "le" bounds: ~122 us to 1024 s
+EXPORT_EXPONENTS = range(-13, 11)
+
+HELP = {
+    "mental_math_response_seconds": "Time from showing a problem to accepting or skipping it.",
+    "mental_math_generation_seconds": "Server time spent pre-generating a quiz.",
+    "mental_math_render_seconds": "Server time to run the whole page or only the quiz panel.",
+    "mental_math_answer_seconds": "Server time to check an answer or skip a problem.",
+    "mental_math_client_answer_seconds": "Answer time measured in the browser by the answer pad.",
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket(seconds):
+    if seconds <= 0:
+        return 0
+    mantissa, exponent = math.frexp(seconds)  # seconds = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    if exponent < MIN_EXPONENT:
+        return 0
+    if exponent > MAX_EXPONENT:
+        return BUCKETS - 1
+    return (exponent - MIN_EXPONENT) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def _upper_bound(bucket):
+    exponent, sub = divmod(bucket, SUB_BUCKETS)
+    return (0.5 + (sub + 1) / (2 * SUB_BUCKETS)) * 2.0 ** (exponent + MIN_EXPONENT)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations in seconds.
+
+    Recording is a frexp and a list increment, and histograms with the same
+    layout merge by adding counts.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, seconds):
+        self.counts[_bucket(seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other):
+        for bucket, count in enumerate(other.counts):
+            if count:
+                self.counts[bucket] += count
+        self.count += other.count
+        self.sum += other.sum
+        return self
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return _upper_bound(bucket)
+        return _upper_bound(BUCKETS - 1)
+
+    def cumulative(self, exponent):
+        """Number of values below 2**exponent seconds."""
+        end = (exponent - MIN_EXPONENT + 1) * SUB_BUCKETS
+        return sum(self.counts[:max(0, min(end, BUCKETS))])
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+class Metrics:
+    """Named, labelled latency histograms shared by every session in the process."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def histogram(self, name, **labels):
+        """The histogram for one label set, or all label sets merged when none are given."""
+        with self._lock:
+            if labels:
+                return self._histograms.get((name, tuple(sorted(labels.items()))))
+            merged = LatencyHistogram()
+            for (key_name, _), histogram in self._histograms.items():
+                if key_name == name:
+                    merged.merge(histogram)
+            return merged
+
+    def render_prometheus(self):
+        """All histograms in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        lines = []
+        current = None
+        for (name, labels), histogram in items:
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            label_text = _labels(labels)
+            separator = "," if label_text else ""
+            for exponent in EXPORT_EXPONENTS:
+                lines.append(f'{name}_bucket{{{label_text}{separator}le="{2.0 ** exponent:g}"}} '
+                             f"{histogram.cumulative(exponent)}")
+            lines.append(f'{name}_bucket{{{label_text}{separator}le="+Inf"}} {histogram.count}')
+            suffix = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def serve(metrics, port, host="127.0.0.1"):
+    """Serve metrics at http://host:port/metrics for a Prometheus scraper.
+
+    The server runs on a daemon thread and is returned; if the port is taken,
+    e.g. by another app process, the error is logged and None is returned.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # one line per scrape is noise
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError:
+        logger.exception("could not serve metrics on %s:%d", host, port)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,461 @@
+import random
+import re
+from fractions import Fraction
+
+import numpy as np
+
+from answers import exact, round_half_up
+
+
+class Operation:
+    """One kind of problem: operand ranges per difficulty, generation, formatting and checking.
+
+    Subclasses set ``name`` and ``template`` and implement ``operands`` and
+    ``answer``. ``answer`` is the answer as shown and stored, while ``exact``
+    is the int or Fraction that answers are checked against; they differ
+    when the shown answer is rounded. The ``*_batch`` hooks default to
+    looping over the scalar methods; hot operations override them with
+    NumPy fast paths. ``grid`` lists the whole problem space so that small
+    spaces can be indexed. ``bucket`` sorts operands into the few groups
+    that the adaptive mode keeps separate statistics for, e.g. the divisor.
+    """
+
+    name = None
+    template = "{} ? {}"
+    # Answers closer than this to the exact one are accepted, or exactly this
+    # close too when the tolerance is inclusive. Set it on the registered
+    # operation to change it for every quiz.
+    tolerance = Fraction(1, 100)
+    tolerance_inclusive = False
+
+    def check(self, user_answer, correct_answer):
+        """Compare exactly: ints and Fractions as they are, floats as the decimal they print as."""
+        error = abs(exact(user_answer) - exact(correct_answer))
+        return error <= self.tolerance if self.tolerance_inclusive else error < self.tolerance
+
+    def format(self, left, right):
+        return self.template.format(left, right)
+
+    def parse(self, problem):
+        """Recover (name, left, right) from a formatted problem, or None if it isn't ours."""
+        if not hasattr(self, "_pattern"):
+            literals = re.split(r"\{[^}]*\}", self.template)
+            self._pattern = re.compile("(.+?)".join(re.escape(part) for part in literals))
+        match = self._pattern.fullmatch(problem)
+        if match is None:
+            return None
+        try:
+            left, right = (int(value.replace(",", "")) for value in match.groups())
+        except ValueError:
+            return None
+        return self.name, left, right
+
+    def operands(self, level, rng):
+        """Draw one (left, right) pair with a random.Random-like rng."""
+        raise NotImplementedError
+
+    def answer(self, left, right):
+        raise NotImplementedError
+
+    def exact(self, left, right):
+        """The unrounded answer, as an int or Fraction."""
+        return self.answer(left, right)
+
+    def bucket(self, left, right):
+        """The operand bucket of a problem, a small int; one bucket unless overridden."""
+        return 0
+
+    def generate(self, level, rng):
+        """One (problem, answer) drawn with rng, e.g. the session's random.Random."""
+        left, right = self.operands(level, rng)
+        return self.format(left, right), self.answer(left, right)
+
+    def operands_batch(self, level, n, rng):
+        """Draw n operand pairs as arrays with a NumPy Generator."""
+        scalar_rng = random.Random(int(rng.integers(2 ** 63)))
+        pairs = [self.operands(level, scalar_rng) for _ in range(n)]
+        return np.array([pair[0] for pair in pairs]), np.array([pair[1] for pair in pairs])
+
+    def answers_batch(self, level, left, right):
+        return np.array([self.answer(a, b) for a, b in zip(left.tolist(), right.tolist())])
+
+    def generate_batch(self, level, n, rng):
+        """n (problem, answer) pairs drawn with a NumPy Generator."""
+        left, right = self.operands_batch(level, n, rng)
+        answers = self.answers_batch(level, left, right)
+        fmt = self.format
+        return [(fmt(a, b), answer)
+                for a, b, answer in zip(left.tolist(), right.tolist(), answers.tolist())]
+
+    def space_size(self, level):
+        """Number of entries grid() returns, or None if the space can't be listed."""
+        return None
+
+    def grid(self, level):
+        """Every (left, right) the generator can draw, plus weights (None when uniform)."""
+        raise NotImplementedError
+
+    def space(self, level):
+        """(left, right, answers, problems, weights) for the whole problem space."""
+        left, right, weights = self.grid(level)
+        answers = self.answers_batch(level, left, right)
+        fmt = self.format
+        problems = [fmt(a, b) for a, b in zip(left.tolist(), right.tolist())]
+        return left, right, answers, problems, weights
+
+
+class BasicOperation(Operation):
+    """Two operands drawn independently from the same range."""
+
+    ranges = {
+        "Easy": (1, 10),
+        "Medium": (10, 50),
+        "Hard": (50, 100),
+    }
+
+    def operands(self, level, rng):
+        min_num, max_num = self.ranges[level]
+        return rng.randint(min_num, max_num), rng.randint(min_num, max_num)
+
+    def operands_batch(self, level, n, rng):
+        min_num, max_num = self.ranges[level]
+        return (rng.integers(min_num, max_num + 1, size=n),
+                rng.integers(min_num, max_num + 1, size=n))
+
+    def answers_batch(self, level, left, right):
+        return self.answer(left, right)
+
+    def space_size(self, level):
+        min_num, max_num = self.ranges[level]
+        return (max_num - min_num + 1) ** 2
+
+    def grid(self, level):
+        min_num, max_num = self.ranges[level]
+        numbers = np.arange(min_num, max_num + 1)
+        left, right = np.meshgrid(numbers, numbers, indexing="ij")
+        return left.ravel(), right.ravel(), None
+
+    @staticmethod
+    def band(number):
+        """A single digit as itself, a longer number by its tens: 7 -> 7, 47 -> 40."""
+        return number if number < 10 else number // 10 * 10
+
+
+class Addition(BasicOperation):
+    name = "Addition"
+    template = "{} + {}"
+
+    def answer(self, left, right):
+        return left + right
+
+    def bucket(self, left, right):
+        # 1 when the ones carry
+        return int(left % 10 + right % 10 >= 10)
+
+
+class Subtraction(BasicOperation):
+    name = "Subtraction"
+    template = "{} - {}"
+
+    def operands(self, level, rng):
+        num1, num2 = super().operands(level, rng)
+        if num1 < num2:
+            num1, num2 = num2, num1
+        return num1, num2
+
+    def operands_batch(self, level, n, rng):
+        num1, num2 = super().operands_batch(level, n, rng)
+        return np.maximum(num1, num2), np.minimum(num1, num2)
+
+    def grid(self, level):
+        # Keep both orderings so swapped pairs stay twice as likely as equal ones
+        num1, num2, weights = super().grid(level)
+        return np.maximum(num1, num2), np.minimum(num1, num2), weights
+
+    def answer(self, left, right):
+        return left - right
+
+    def bucket(self, left, right):
+        # 1 when the ones borrow
+        return int(left % 10 < right % 10)
+
+
+class Multiplication(BasicOperation):
+    name = "Multiplication"
+    template = "{} × {}"
+
+    def answer(self, left, right):
+        return left * right
+
+    def bucket(self, left, right):
+        # The times table: the smaller factor
+        return self.band(min(left, right))
+
+
+class Division(BasicOperation):
+    name = "Division"
+    template = "{} ÷ {}"
+    quotients = (2, 10)
+
+    def operands(self, level, rng):
+        min_num, max_num = self.ranges[level]
+        num2 = rng.randint(min_num, max_num)
+        return num2 * rng.randint(*self.quotients), num2
+
+    def operands_batch(self, level, n, rng):
+        min_num, max_num = self.ranges[level]
+        low, high = self.quotients
+        num2 = rng.integers(min_num, max_num + 1, size=n)
+        return num2 * rng.integers(low, high + 1, size=n), num2
+
+    def answer(self, left, right):
+        return left // right
+
+    def bucket(self, left, right):
+        return self.band(right)
+
+    def space_size(self, level):
+        min_num, max_num = self.ranges[level]
+        low, high = self.quotients
+        return (max_num - min_num + 1) * (high - low + 1)
+
+    def grid(self, level):
+        min_num, max_num = self.ranges[level]
+        low, high = self.quotients
+        divisors, quotients = np.meshgrid(np.arange(min_num, max_num + 1),
+                                          np.arange(low, high + 1), indexing="ij")
+        return (divisors * quotients).ravel(), divisors.ravel(), None
+
+
+class FractionConversion(Operation):
+    """A fraction numerator/denominator to write as a decimal scaled by ``scale``.
+
+    Answers are shown rounded half up to ``places`` decimals. Every fraction
+    any difficulty can draw is precomputed once, as its exact value and its
+    rounded answer, plus a NumPy table of the rounded answers per difficulty
+    indexed by [denominator, numerator] for the batch path.
+    """
+
+    scale = 1
+    places = 0
+    denominators = {}
+    # Numerators run from 1 to the denominator, or to one less without whole fractions
+    whole = True
+
+    def __init__(self):
+        self._exact = {}
+        self._answers = {}
+        self._tables = {}
+        for level, denominators in self.denominators.items():
+            largest = max(denominators)
+            table = np.zeros((largest + 1, largest + 1))
+            for denominator in denominators:
+                for numerator in self._numerators(denominator):
+                    if (numerator, denominator) not in self._exact:
+                        value = Fraction(self.scale * numerator, denominator)
+                        self._exact[numerator, denominator] = value
+                        self._answers[numerator, denominator] = self._rounded(value)
+                    table[denominator, numerator] = self._answers[numerator, denominator]
+            self._tables[level] = table
+
+    def _numerators(self, denominator):
+        return range(1, denominator + 1 if self.whole else denominator)
+
+    def _rounded(self, value):
+        # The one division by a power of ten that turns an exact answer into a shown one
+        return round_half_up(value, self.places) / 10 ** self.places
+
+    def operands(self, level, rng):
+        denominator = rng.choice(self.denominators[level])
+        return rng.randint(1, len(self._numerators(denominator))), denominator
+
+    def answer(self, left, right):
+        answer = self._answers.get((left, right))
+        return self._rounded(self.exact(left, right)) if answer is None else answer
+
+    def exact(self, left, right):
+        value = self._exact.get((left, right))
+        return Fraction(self.scale * left, right) if value is None else value
+
+    def bucket(self, left, right):
+        return right
+
+    def operands_batch(self, level, n, rng):
+        denominators = rng.choice(self.denominators[level], size=n)
+        return rng.integers(1, denominators + self.whole), denominators
+
+    def answers_batch(self, level, left, right):
+        return self._tables[level][right, left]
+
+    def space_size(self, level):
+        return sum(len(self._numerators(d)) for d in self.denominators[level])
+
+    def grid(self, level):
+        denominators = self.denominators[level]
+        counts = [len(self._numerators(d)) for d in denominators]
+        right = np.repeat(denominators, counts)
+        left = np.concatenate([np.arange(1, count + 1) for count in counts])
+        # Denominator is picked first, so small denominators carry more weight per entry
+        return left, right, 1.0 / (len(denominators) * np.repeat(counts, counts))
+
+
+class RatioToPercent(FractionConversion):
+    name = "Ratio to %"
+    template = "{}/{}"
+    scale = 100
+    places = 1  # Shown as a percentage with 1 decimal
+    # Allow 5% tolerance for ratio to percentage problems
+    tolerance = Fraction(5)
+    tolerance_inclusive = True
+    # 1/2=50%, 1/4=25%, etc.
+    denominators = {
+        "Easy": [2, 4, 5, 10],
+        "Medium": [2, 3, 4, 5, 8, 10, 20],
+        "Hard": [2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 15, 16, 20, 25],
+    }
+
+
+class RatioToDecimal(FractionConversion):
+    name = "Ratio to Decimal"
+    template = "{}/{} as a decimal"
+    places = 3
+    whole = False
+    # Three decimal places, so 1/3 is 0.333 and 1/8 is 0.125
+    tolerance = Fraction(1, 2000)
+    tolerance_inclusive = True
+    denominators = {
+        "Easy": [2, 4, 5, 10],
+        "Medium": [3, 4, 5, 8, 10, 20, 25],
+        "Hard": [3, 6, 7, 8, 9, 11, 12, 16, 40],
+    }
+
+
+class MultiplyByPercent(Operation):
+    name = "Multiply by %"
+    template = "{}% of {:,}"
+    bases = {
+        "Easy": (10, 100),            # 10-100
+        "Medium": (100, 10000),       # 100-10,000
+        "Hard": (10000, 1000000),     # 10,000-1,000,000
+    }
+    percentages = {
+        "Easy": [1, 5, 10, 25, 50],
+        "Medium": [1, 5, 10, 15, 20, 25, 50, 75],
+        "Hard": [1, 2, 5, 10, 15, 20, 25, 30, 50, 75],
+    }
+
+    def operands(self, level, rng):
+        base_num = rng.randint(*self.bases[level])
+        return rng.choice(self.percentages[level]), base_num
+
+    # Within half a unit of the exact value, so 12 and 13 are both right for 12.5
+    tolerance = Fraction(1, 2)
+    tolerance_inclusive = True
+
+    def answer(self, left, right):
+        # Rounded half up, so 25% of 50 is 13 rather than round()'s 12
+        return (left * right + 50) // 100
+
+    def exact(self, left, right):
+        return Fraction(left * right, 100)
+
+    def bucket(self, left, right):
+        return left
+
+    def operands_batch(self, level, n, rng):
+        low, high = self.bases[level]
+        bases = rng.integers(low, high + 1, size=n)
+        return rng.choice(self.percentages[level], size=n), bases
+
+    def answers_batch(self, level, left, right):
+        return (left * right + 50) // 100
+
+    def space_size(self, level):
+        low, high = self.bases[level]
+        return (high - low + 1) * len(self.percentages[level])
+
+    def grid(self, level):
+        low, high = self.bases[level]
+        percentages, bases = np.meshgrid(self.percentages[level], np.arange(low, high + 1),
+                                         indexing="ij")
+        return percentages.ravel(), bases.ravel(), None
+
+
+class Mixed(Operation):
+    """Each problem comes from one of the member operations, picked uniformly."""
+
+    name = "Mixed"
+
+    def __init__(self, members):
+        self.members = list(members)
+
+    def generate(self, level, rng):
+        return get_operation(rng.choice(self.members)).generate(level, rng)
+
+    def parse(self, problem):
+        for member in self.members:
+            parsed = get_operation(member).parse(problem)
+            if parsed is not None:
+                return parsed
+        return None
+
+    def generate_batch(self, level, n, rng):
+        picks = rng.integers(0, len(self.members), size=n)
+        problems = [None] * n
+        for position, member in enumerate(self.members):
+            slots = np.flatnonzero(picks == position)
+            if slots.size:
+                batch = get_operation(member).generate_batch(level, slots.size, rng)
+                for slot, item in zip(slots.tolist(), batch):
+                    problems[slot] = item
+        return problems
+
+    def space_size(self, level):
+        sizes = [get_operation(member).space_size(level) for member in self.members]
+        return None if None in sizes else sum(sizes)
+
+    def space(self, level):
+        parts = []
+        for member in self.members:
+            left, right, answers, problems, weights = get_operation(member).space(level)
+            # Each member gets an equal share of the probability
+            if weights is None:
+                weights = np.full(len(problems), 1.0 / len(problems))
+            parts.append((left, right, answers, problems,
+                          weights / weights.sum() / len(self.members)))
+        left, right, answers, weights = (np.concatenate([part[i] for part in parts])
+                                         for i in (0, 1, 2, 4))
+        problems = [problem for part in parts for problem in part[3]]
+        return left, right, answers, problems, weights
+
+
+_REGISTRY = {}
+
+
+def register(operation):
+    """Make an operation available by name; later registrations replace earlier ones."""
+    # The attempt log keeps operation names in 16 bytes
+    if len(operation.name.encode()) > 16:
+        raise ValueError(f"Operation name too long for the attempt log: {operation.name}")
+    _REGISTRY[operation.name] = operation
+    return operation
+
+
+def get_operation(name):
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown operation: {name}") from None
+
+
+def operation_names():
+    """Registered operation names, in registration order."""
+    return list(_REGISTRY)
+
+
+BASIC_OPERATIONS = ["Addition", "Subtraction", "Multiplication", "Division"]
+
+for _operation in (Addition(), Subtraction(), Multiplication(), Division(),
+                   RatioToPercent(), MultiplyByPercent(), RatioToDecimal(),
+                   Mixed(BASIC_OPERATIONS)):
+    register(_operation)
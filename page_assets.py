@@ -0,0 +1,35 @@
+"""Static page assets, read from assets/ once per process.
+
+These are plain module-level caches rather than st.cache_resource: the
+module stays imported across reruns, and a cache_resource call re-reads
+the function's source to build its key every time, which costs about a
+millisecond per call on every run.
+"""
+import functools
+import os
+import re
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+def _read(name):
+    with open(os.path.join(ASSETS_DIR, name), encoding="utf-8") as asset:
+        return asset.read()
+
+
+def minify_css(css):
+    """Drop comments and the whitespace around punctuation."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return re.sub(r"\s+", " ", css).strip()
+
+
+@functools.cache
+def stylesheet():
+    """The app's stylesheet as a minified <style> tag."""
+    return f"<style>{minify_css(_read('style.css'))}</style>"
+
+
+@functools.cache
+def how_it_works():
+    return _read("how_it_works.md")
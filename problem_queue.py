@@ -0,0 +1,52 @@
+import secrets
+from collections import deque
+
+import numpy as np
+
+from problems import generate_problems
+
+
+class ProblemQueue:
+    """Upcoming (problem, answer) pairs for one quiz, generated ahead of time.
+
+    The queue is filled from a seeded generator, so the same seed, operation
+    and difficulty always produce the same quiz. Advancing is a pop; when the
+    queue runs low it is topped up in one batch from the same generator.
+    """
+
+    def __init__(self, operation, difficulty, size, seed=None, refill_size=None):
+        self.operation = operation
+        self.difficulty = difficulty
+        # Difficulty of the problem last popped; fixed here, varies for AdaptiveQueue
+        self.current_difficulty = difficulty
+        self.size = size
+        self.seed = secrets.randbits(63) if seed is None else seed
+        self.refill_size = refill_size or max(size, 1)
+        self._rng = np.random.default_rng(self.seed)
+        self._items = deque()
+        self._refill(size)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _refill(self, count):
+        if count > 0:
+            self._items.extend(generate_problems(self.operation, self.difficulty,
+                                                 count, seed=self._rng))
+
+    def pop(self):
+        """Return the next (problem, answer), topping the queue up if it is empty."""
+        if not self._items:
+            self._refill(self.refill_size)
+        return self._items.popleft()
+
+    def peek(self):
+        """Look at the next (problem, answer) without consuming it."""
+        if not self._items:
+            self._refill(self.refill_size)
+        return self._items[0]
+
+    def replay(self):
+        """A fresh queue that yields the same problems from the start."""
+        return ProblemQueue(self.operation, self.difficulty, self.size,
+                            seed=self.seed, refill_size=self.refill_size)
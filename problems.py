@@ -0,0 +1,162 @@
+import array
+import bisect
+import sys
+import threading
+import time
+
+import numpy as np
+
+from operations import get_operation
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+def _level(difficulty):
+    """Anything that isn't Easy or Medium is treated as Hard."""
+    return difficulty if difficulty in ("Easy", "Medium") else "Hard"
+
+
+def generate_problem(operation, difficulty, rng):
+    """Generate a math problem based on operation and difficulty.
+
+    rng is a random.Random owned by the caller (e.g. one per session), never
+    the shared module-level generator, so the same seed gives the same problems.
+    """
+    index = get_problem_index(operation, difficulty)
+    if index is not None:
+        return index.sample(rng)
+    return get_operation(operation).generate(_level(difficulty), rng)
+
+
+def generate_problems(operation, difficulty, n, seed=None):
+    """Generate n problems at once; returns a list of (problem, answer) like generate_problem.
+
+    seed may be an int for a reproducible batch, or a NumPy Generator to keep
+    drawing from across calls.
+    """
+    rng = np.random.default_rng(seed)
+    index = get_problem_index(operation, difficulty)
+    if index is not None:
+        return index.sample_many(n, rng)
+    return get_operation(operation).generate_batch(_level(difficulty), n, rng)
+
+
+# Problem spaces larger than this are generated on the fly instead of indexed
+MAX_INDEX_SIZE = 100_000
+
+
+class ProblemIndex:
+    """Immutable table of every problem for one (operation, difficulty) pair.
+
+    Operands, answers and display strings are kept in flat typed arrays (the
+    strings as one joined text plus offsets), so a single index can be shared
+    by every session in the process and drawing a problem is one random index
+    into them. NumPy views over the same buffers serve batch draws.
+    """
+
+    def __init__(self, operation, level, left, right, answers, problems, weights=None):
+        self.operation = operation
+        self.difficulty = level
+        self.build_seconds = 0.0
+        self._size = len(problems)
+        self._left = array.array("q", left.tolist())
+        self._right = array.array("q", right.tolist())
+        self._answers = array.array("d" if answers.dtype.kind == "f" else "q", answers.tolist())
+        self._text = "".join(problems)
+        self._offsets = array.array("q", [0])
+        for problem in problems:
+            self._offsets.append(self._offsets[-1] + len(problem))
+        # Cumulative weights for non-uniform spaces, None when every entry is equally likely
+        self._cum_weights = None if weights is None else array.array("d", np.cumsum(weights))
+
+    def __len__(self):
+        return self._size
+
+    def _view(self, buffer):
+        view = np.frombuffer(buffer, dtype=np.float64 if buffer.typecode == "d" else np.int64)
+        view.flags.writeable = False
+        return view
+
+    @property
+    def left(self):
+        return self._view(self._left)
+
+    @property
+    def right(self):
+        return self._view(self._right)
+
+    @property
+    def answers(self):
+        return self._view(self._answers)
+
+    @property
+    def nbytes(self):
+        buffers = (self._left, self._right, self._answers, self._offsets, self._cum_weights)
+        return (sum(b.itemsize * len(b) for b in buffers if b is not None)
+                + sys.getsizeof(self._text))
+
+    def _item(self, i):
+        offsets = self._offsets
+        return self._text[offsets[i]:offsets[i + 1]], self._answers[i]
+
+    def sample(self, rng):
+        """Draw one (problem, answer) with rng, with the same odds as the scalar generator."""
+        if self._cum_weights is None:
+            return self._item(int(rng.random() * self._size))
+        cum_weights = self._cum_weights
+        i = bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+        return self._item(min(i, self._size - 1))
+
+    def sample_many(self, n, rng):
+        """Draw n (problem, answer) pairs using a NumPy generator."""
+        if self._cum_weights is None:
+            picks = rng.integers(0, self._size, size=n)
+        else:
+            cum_weights = self._view(self._cum_weights)
+            picks = np.searchsorted(cum_weights, rng.random(n) * cum_weights[-1], side="right")
+            np.minimum(picks, self._size - 1, out=picks)
+        return [self._item(i) for i in picks.tolist()]
+
+    @classmethod
+    def build(cls, operation, level):
+        start = time.perf_counter()
+        left, right, answers, problems, weights = get_operation(operation).space(level)
+        if weights is not None and np.all(weights == weights[0]):
+            weights = None
+        index = cls(operation, level, left, right, answers, problems, weights)
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+
+_INDEXES = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def get_problem_index(operation, difficulty):
+    """Shared index for the pair, built on first use; None if the space is too large."""
+    key = (operation, _level(difficulty))
+    index = _INDEXES.get(key)
+    if index is None and key not in _INDEXES:
+        with _INDEX_LOCK:
+            if key not in _INDEXES:
+                size = get_operation(key[0]).space_size(key[1])
+                if size is None or size > MAX_INDEX_SIZE:
+                    _INDEXES[key] = None
+                else:
+                    _INDEXES[key] = ProblemIndex.build(*key)
+            index = _INDEXES[key]
+    return index
+
+
+def index_stats():
+    """Build time and memory of every index built so far in this process."""
+    return [
+        {
+            "operation": index.operation,
+            "difficulty": index.difficulty,
+            "entries": len(index),
+            "build_ms": index.build_seconds * 1000,
+            "bytes": index.nbytes,
+        }
+        for index in _INDEXES.values() if index is not None
+    ]
@@ -0,0 +1,198 @@
+import logging
+import time
+
+from answers import exact
+from history import Attempt, AttemptHistory
+from operations import get_operation
+
+logger = logging.getLogger(__name__)
+
+
+class QuizSession:
+    """One quiz as a plain state machine, independent of Streamlit.
+
+    A session draws problems from a queue (ProblemQueue, AdaptiveQueue or
+    ReviewQueue). start() shows the first problem. submit() accepts a
+    correct answer and moves on; a wrong answer leaves the problem up so it
+    can be tried again. skip() records the problem as missed. The quiz is
+    complete after total_problems attempts or, for a sprint with a
+    time_limit, once the clock passes the deadline. total_problems is None
+    for an open-ended sprint. The deadline is checked against this
+    session's clock on every call, so an answer that arrives late is
+    not counted.
+
+    Each problem is parsed once, when it is shown, into current_operation
+    (the concrete operation, e.g. Division within a Mixed quiz) and
+    current_exact, the unrounded answer that submit() checks against with
+    that operation's tolerance.
+
+    Each accepted or skipped problem becomes an Attempt in the history (a
+    compact AttemptHistory), is counted in skills (a SkillBook) if one is
+    given, and is passed to on_attempt. That is the hook for logging and
+    metrics; if it raises, the error is logged and the quiz carries on.
+    Times come from clock, so a simulation can supply its own.
+    """
+
+    def __init__(self, queue, total_problems, skills=None, on_attempt=None,
+                 clock=time.perf_counter, time_limit=None):
+        self.queue = queue
+        self.total_problems = total_problems
+        self.time_limit = time_limit
+        self.skills = skills
+        self.on_attempt = on_attempt
+        self.clock = clock
+        self.score = 0
+        self.attempts = 0
+        self.history = AttemptHistory()
+        self.current_problem = None
+        self.current_answer = None
+        self.current_operation = None
+        self.current_exact = None
+        self._operands = None
+        self.shown_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.deadline = None
+        self.complete = False
+
+    # Clock readings, which only mean something within this process
+    _STAMPS = ("shown_at", "started_at", "finished_at", "deadline")
+
+    def __getstate__(self):
+        """Pickled with clock readings as ages, so the quiz can resume in another process.
+
+        on_attempt is left out; whoever restores the quiz sets it again.
+        """
+        state = dict(vars(self), on_attempt=None)
+        now = self.clock()
+        for name in self._STAMPS:
+            if state[name] is not None:
+                state[name] -= now
+        state["_pickled_at"] = time.time()
+        return state
+
+    def __setstate__(self, state):
+        # Time away on disk counts, as it would have in memory
+        pickled_at = state.pop("_pickled_at")
+        vars(self).update(state)
+        now = self.clock() - max(0.0, time.time() - pickled_at)
+        for name in self._STAMPS:
+            if state[name] is not None:
+                setattr(self, name, state[name] + now)
+
+    def start(self):
+        """Reset the score and history, start the clock and show the first problem."""
+        self.score = 0
+        self.attempts = 0
+        self.history = AttemptHistory()
+        self.complete = False
+        self.started_at = self.clock()
+        self.finished_at = None
+        self.deadline = None if self.time_limit is None else self.started_at + self.time_limit
+        self._advance()
+        return self
+
+    def _finish(self, now=None):
+        self.complete = True
+        self.finished_at = self.clock() if now is None else now
+        if self.deadline is not None:
+            self.finished_at = min(self.finished_at, self.deadline)
+        self.current_problem = None
+        self.current_answer = None
+        self.current_exact = None
+
+    def _advance(self):
+        if self.total_problems is not None and self.attempts >= self.total_problems:
+            self._finish()
+        elif not self.expire():
+            self.current_problem, self.current_answer = self.queue.pop()
+            parsed = get_operation(self.queue.operation).parse(self.current_problem)
+            if parsed is None:
+                self.current_operation = self.queue.operation
+                self.current_exact = exact(self.current_answer)
+                self._operands = None
+            else:
+                self.current_operation, *self._operands = parsed
+                self.current_exact = get_operation(parsed[0]).exact(*self._operands)
+            self.shown_at = self.clock()
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without a time limit."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    def expire(self):
+        """Complete the quiz if its deadline has passed; returns whether it is complete."""
+        if not self.complete and self.deadline is not None:
+            now = self.clock()
+            if now >= self.deadline:
+                self._finish(now)
+        return self.complete
+
+    def submit(self, user_answer):
+        """Check an answer; if it is correct, record it and move to the next problem.
+
+        Returns False for a wrong answer, and also when the deadline has
+        passed, in which case the quiz is now complete.
+        """
+        if self.complete:
+            raise RuntimeError("the quiz is already complete")
+        if self.expire():
+            return False
+        operation = get_operation(self.current_operation)
+        if not operation.check(user_answer, self.current_exact):
+            return False
+        self._record(user_answer, True)
+        return True
+
+    def skip(self, user_answer=0):
+        """Record the current problem as missed and move to the next one."""
+        if self.complete:
+            raise RuntimeError("the quiz is already complete")
+        if not self.expire():
+            self._record(user_answer, False)
+
+    def _record(self, user_answer, correct):
+        response_time = self.clock() - self.shown_at
+        difficulty = self.queue.current_difficulty
+        # Skills are tracked per concrete operation, e.g. Division within a Mixed quiz
+        attempt = Attempt(self.current_problem, self.current_answer, float(user_answer), correct,
+                          response_time, self.current_operation, difficulty)
+        self.attempts += 1
+        self.score += correct
+        self.history.append(attempt, self._operands)
+        if self.skills is not None:
+            bucket = (None if self._operands is None
+                      else get_operation(attempt.operation).bucket(*self._operands))
+            self.skills.update(attempt.operation, difficulty, correct, response_time, bucket)
+        if self.on_attempt is not None:
+            # The attempt is already counted, so a failing hook must not stop the advance
+            try:
+                self.on_attempt(self, attempt)
+            except Exception:
+                logger.exception("on_attempt failed for %r", attempt.problem)
+        self._advance()
+
+    @property
+    def accuracy(self):
+        """Percentage of attempts so far that were correct."""
+        return self.score / self.attempts * 100 if self.attempts else 0.0
+
+    def results(self):
+        """Summary of the quiz: score, total, accuracy over all problems, speed and history.
+
+        A sprint's total is the number of problems attempted before the deadline.
+        """
+        total = self.attempts if self.total_problems is None else self.total_problems
+        elapsed = (self.finished_at if self.complete else self.clock()) - self.started_at
+        return {
+            'score': self.score,
+            'total': total,
+            'incorrect': total - self.score,
+            'accuracy': self.score / total * 100 if total else 0.0,
+            'elapsed': elapsed,
+            'problems_per_minute': self.score / elapsed * 60 if elapsed > 0 else 0.0,
+            'mean_time': float(self.history.columns()["response_time"].mean()) if self.attempts else 0.0,
+            'history': self.history,
+        }
@@ -0,0 +1,77 @@
+"""Objects shared by every session in the server process, made on first use.
+
+Like page_assets, these are module-level caches rather than st.cache_resource.
+The app script defines its functions again on every run, and each
+st.cache_resource decoration reads the function's source to build its key,
+about a millisecond per resource on every run. This module is imported once,
+so each object is built once and then looked up behind a lock.
+"""
+import functools
+import os
+import random
+import secrets
+import threading
+
+import streamlit as st
+
+from adaptive import SkillBook
+from attempt_log import DEFAULT_PATH, AttemptLog
+from leaderboard import DEFAULT_PATH as LEADERBOARD_PATH
+from leaderboard import Leaderboard
+from metrics import Metrics, serve
+from session_store import DEFAULT_DIR as SESSION_DIR
+from session_store import SessionStore
+
+# Port for the Prometheus endpoint (/metrics on 127.0.0.1); unset serves none
+METRICS_PORT = os.environ.get("MENTAL_MATH_METRICS_PORT")
+
+
+def _shared(factory):
+    """Call factory once, even when two sessions ask at the same time."""
+    cached = functools.cache(factory)
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            return cached()
+    return get
+
+
+@_shared
+def server_metrics():
+    """Latency histograms shared by every session in this server process."""
+    metrics = Metrics()
+    if METRICS_PORT:
+        serve(metrics, int(METRICS_PORT))
+    return metrics
+
+
+@_shared
+def attempt_log():
+    """One attempt log per server process, shared by every session."""
+    return AttemptLog(DEFAULT_PATH)
+
+
+@_shared
+def leaderboard():
+    """Leaderboards shared by every session, read through a short-lived cache."""
+    return Leaderboard(LEADERBOARD_PATH)
+
+
+def new_session():
+    """What a learner's Session starts with."""
+    # The session's own generator, shared with no other session; every quiz
+    # seed is drawn from it, so ?seed=N replays a whole session
+    seed = st.query_params.get("seed", "")
+    session_seed = int(seed) if seed.isdigit() else secrets.randbits(63)
+    return {"quiz": None, "quiz_active": False, "quiz_ranked": False,
+            "skill_stats": SkillBook(), "session_seed": session_seed,
+            "rng": random.Random(session_seed), "review_schedule": None}
+
+
+@_shared
+def session_store():
+    """Every learner's quiz state in this process; idle ones wait on disk."""
+    # The review schedule is already on disk and is reopened on first use
+    return SessionStore(SESSION_DIR, defaults=new_session, transient=["review_schedule"])
@@ -0,0 +1,199 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import time
+
+# Per-user schedules live here unless MENTAL_MATH_REVIEW_DIR says otherwise
+DEFAULT_DIR = os.environ.get("MENTAL_MATH_REVIEW_DIR", os.path.join("data", "review"))
+
+# Leitner boxes: how long to wait before reviewing an item in box 1, 2, ...
+# A missed problem starts in box 1 and is due straight away; answering it
+# correctly in the last box retires it.
+DAY = 24 * 60 * 60
+BOX_INTERVALS = [0, 1 * DAY, 3 * DAY, 7 * DAY, 14 * DAY]
+
+
+class ReviewItem:
+    __slots__ = ("operation", "difficulty", "problem", "answer", "box", "due")
+
+    def __init__(self, operation, difficulty, problem, answer, box, due):
+        self.operation = operation
+        self.difficulty = difficulty
+        self.problem = problem
+        self.answer = answer
+        self.box = box
+        self.due = due
+
+    @property
+    def key(self):
+        return self.operation, self.problem
+
+
+class ReviewSchedule:
+    """Leitner schedule of one learner's missed problems.
+
+    Items sit in a dict keyed by (operation, problem) and in a heap ordered by
+    due time, so the next due item is found in O(log n). Rescheduling pushes a
+    new heap entry and leaves the old one to be skipped when it surfaces.
+
+    Changes are appended to a JSON Lines journal, and the journal is only
+    read the first time the schedule is used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._items = None
+        self._heap = []
+        self._journal_lines = 0
+
+    def _load(self):
+        if self._items is not None:
+            return
+        self._items = {}
+        torn = False
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as journal:
+                for line in journal:
+                    self._journal_lines += 1
+                    # A write cut short by a crash or a full disk leaves a line
+                    # that doesn't decode; it is skipped, like a torn attempt record
+                    try:
+                        row = json.loads(line)
+                        key = (row["operation"], row["problem"])
+                        item = ReviewItem(**row) if row["box"] else None
+                    except (ValueError, KeyError, TypeError):
+                        torn = True
+                        continue
+                    if item is not None:
+                        self._items[key] = item
+                    else:
+                        self._items.pop(key, None)
+        self._heap = [(item.due, item.key) for item in self._items.values()]
+        heapq.heapify(self._heap)
+        # Rewrite the journal once most of it is superseded entries, or to drop
+        # torn lines before anything is appended after them
+        if torn or self._journal_lines > 2 * len(self._items) + 100:
+            self._compact()
+
+    def _compact(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as journal:
+            for item in self._items.values():
+                journal.write(self._row(item))
+        os.replace(temporary, self.path)
+        self._journal_lines = len(self._items)
+
+    @staticmethod
+    def _row(item):
+        return json.dumps({name: getattr(item, name) for name in ReviewItem.__slots__}) + "\n"
+
+    def _save(self, item):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(self._row(item))
+        self._journal_lines += 1
+
+    def _schedule(self, item, box, now):
+        item.box = box
+        if box > len(BOX_INTERVALS):
+            # Retired: recorded in the journal with box 0
+            item.box = 0
+            self._items.pop(item.key, None)
+        else:
+            item.due = now + BOX_INTERVALS[box - 1]
+            self._items[item.key] = item
+            heapq.heappush(self._heap, (item.due, item.key))
+        self._save(item)
+
+    def __len__(self):
+        self._load()
+        return len(self._items)
+
+    def missed(self, operation, difficulty, problem, answer, now=None):
+        """Put a missed problem (back) into the first box."""
+        self._load()
+        now = time.time() if now is None else now
+        item = self._items.get((operation, problem))
+        if item is None:
+            item = ReviewItem(operation, difficulty, problem, answer, 1, now)
+        self._schedule(item, 1, now)
+
+    def reviewed(self, operation, problem, correct, now=None):
+        """Move a reviewed problem up a box, or back to the first one if it was missed again."""
+        self._load()
+        item = self._items.get((operation, problem))
+        if item is None:
+            return
+        now = time.time() if now is None else now
+        self._schedule(item, item.box + 1 if correct else 1, now)
+
+    def _pop_due(self, now):
+        """Pop the earliest live heap entry if it is due, skipping stale ones."""
+        while self._heap and self._heap[0][0] <= now:
+            due, key = heapq.heappop(self._heap)
+            item = self._items.get(key)
+            if item is not None and item.due == due:
+                return item
+        return None
+
+    def take_due(self, limit, now=None):
+        """Up to limit items that are due, earliest first, left in the schedule."""
+        self._load()
+        now = time.time() if now is None else now
+        items = []
+        while len(items) < limit:
+            item = self._pop_due(now)
+            if item is None:
+                break
+            items.append(item)
+        for item in items:
+            heapq.heappush(self._heap, (item.due, item.key))
+        return items
+
+
+def user_path(user_id, directory, suffix):
+    """Path of a per-user file; ids that aren't plain names are hashed."""
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", user_id):
+        user_id = hashlib.sha256(user_id.encode()).hexdigest()[:32]
+    return os.path.join(directory, f"{user_id}{suffix}")
+
+
+def schedule_path(user_id, directory=DEFAULT_DIR):
+    """Journal path for a user."""
+    return user_path(user_id, directory, ".jsonl")
+
+
+class ReviewQueue:
+    """Drop-in for ProblemQueue that serves due review items in order.
+
+    operation and current_difficulty follow the item last popped, since a
+    review mixes problems from different quizzes.
+    """
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.seed = None
+        self.difficulty = "Review"
+        self.operation = self.items[0].operation if self.items else None
+        self.current_difficulty = None
+        self._position = 0
+
+    def __len__(self):
+        return len(self.items) - self._position
+
+    def pop(self):
+        item = self.items[self._position]
+        self._position += 1
+        self.operation = item.operation
+        self.current_difficulty = item.difficulty
+        return item.problem, item.answer
+
+    def replay(self):
+        return ReviewQueue(self.items)
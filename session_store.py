@@ -0,0 +1,178 @@
+"""Per-learner quiz state that is moved to disk while it sits idle.
+
+Each browser session keeps a Session (the quiz, skills, generator, ...)
+and touches it through SessionStore.resume on every run and callback. The
+store keeps live sessions in least-recently-used order. A session idle for
+idle_seconds is written to a compressed pickle snapshot and emptied, as is
+the least recently used one whenever more than max_live are in memory. The
+next resume fills it again from the snapshot, and so does open() when the
+learner comes back in a new tab with the same user id, so the quiz carries
+on where it stopped.
+
+Snapshots are kept in least-recently-written order within disk_budget
+bytes; the oldest are deleted first. Sweeps for idle sessions piggyback on
+other sessions' calls, at most once per sweep_interval.
+"""
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from review import user_path
+
+# Snapshots live here unless MENTAL_MATH_SESSION_DIR says otherwise
+DEFAULT_DIR = os.environ.get("MENTAL_MATH_SESSION_DIR", os.path.join("data", "sessions"))
+
+
+class Session:
+    """The resumable part of one learner's state: user_id plus whatever the app sets."""
+
+    def __init__(self, user_id, **values):
+        self.user_id = user_id
+        self.__dict__.update(values)
+
+    @property
+    def evicted(self):
+        """True once the store has emptied this session into a snapshot."""
+        return vars(self).keys() == {"user_id"}
+
+
+def snapshot_path(user_id, directory=DEFAULT_DIR):
+    """Snapshot path for a user."""
+    return user_path(user_id, directory, ".snap")
+
+
+class SessionStore:
+    """Live sessions in LRU order, with idle ones evicted to on-disk snapshots.
+
+    defaults() returns the values a new session starts with. Attributes
+    named in transient are not written to snapshots; they come back as
+    None and are rebuilt by the app (e.g. state that is already on disk).
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, defaults=dict, idle_seconds=15 * 60,
+                 max_live=1000, disk_budget=256 * 1024 * 1024, transient=(),
+                 sweep_interval=30.0, clock=time.monotonic):
+        self.directory = directory
+        self.defaults = defaults
+        self.idle_seconds = idle_seconds
+        self.max_live = max_live
+        self.disk_budget = disk_budget
+        self.transient = tuple(transient)
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._live = OrderedDict()  # user_id -> [session, last active], oldest first
+        self._next_sweep = clock() + sweep_interval
+        # Snapshots on disk, oldest first, with their sizes
+        self._snapshots = OrderedDict()
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".snap")]
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            self._snapshots[entry.path] = entry.stat().st_size
+        self._disk_bytes = sum(self._snapshots.values())
+        self.evictions = 0
+        self.restores = 0
+
+    def open(self, user_id):
+        """The session for user_id: the live one, else restored from its snapshot, else new."""
+        with self._lock:
+            entry = self._live.get(user_id)
+            session = entry[0] if entry is not None else Session(user_id)
+            return self._activate(session)
+
+    def resume(self, session):
+        """Mark session active and refill it if it was evicted.
+
+        Returns the session to use from now on. That is a different object
+        when the same learner's session was reopened elsewhere (e.g. in a
+        new tab) while this one was on disk.
+        """
+        with self._lock:
+            entry = self._live.get(session.user_id)
+            if entry is not None and entry[0] is not session:
+                session = entry[0]
+            return self._activate(session)
+
+    def _activate(self, session):
+        now = self.clock()
+        entry = self._live.get(session.user_id)
+        if entry is None:
+            if session.evicted:
+                self._restore(session)
+            self._live[session.user_id] = [session, now]
+        else:
+            entry[1] = now
+            self._live.move_to_end(session.user_id)
+        if now >= self._next_sweep or len(self._live) > self.max_live:
+            self._sweep(now)
+        return session
+
+    def _restore(self, session):
+        path = snapshot_path(session.user_id, self.directory)
+        values = None
+        if path in self._snapshots:
+            try:
+                with open(path, "rb") as snapshot:
+                    values = pickle.loads(zlib.decompress(snapshot.read()))
+            except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+                values = None  # A damaged snapshot starts the learner afresh
+            self._forget(path)
+            self.restores += values is not None
+        vars(session).update(self.defaults() if values is None else values)
+
+    def _forget(self, path):
+        self._disk_bytes -= self._snapshots.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def sweep(self):
+        """Evict idle sessions, and the least recently used beyond max_live, now."""
+        with self._lock:
+            self._sweep(self.clock())
+
+    def _sweep(self, now):
+        self._next_sweep = now + self.sweep_interval
+        for _ in range(len(self._live)):
+            user_id, entry = next(iter(self._live.items()))
+            if now - entry[1] < self.idle_seconds and len(self._live) <= self.max_live:
+                break
+            try:
+                self._evict(user_id, entry[0])
+            except (OSError, pickle.PicklingError, TypeError, AttributeError):
+                # Keep a session that can't be written in memory, as if it had just been used
+                entry[1] = now
+                self._live.move_to_end(user_id)
+
+    def _evict(self, user_id, session):
+        values = {key: value for key, value in vars(session).items() if key != "user_id"}
+        for key in self.transient:
+            if key in values:
+                values[key] = None
+        data = zlib.compress(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL))
+        path = snapshot_path(user_id, self.directory)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(data)
+        os.replace(temporary, path)
+        self._disk_bytes -= self._snapshots.pop(path, 0)
+        self._snapshots[path] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.disk_budget and len(self._snapshots) > 1:
+            self._forget(next(iter(self._snapshots)))
+
+        del self._live[user_id]
+        vars(session).clear()
+        session.user_id = user_id
+        self.evictions += 1
+
+    def stats(self):
+        """Sessions in memory, snapshots on disk and their total size."""
+        with self._lock:
+            return {"live": len(self._live), "snapshots": len(self._snapshots),
+                    "snapshot_bytes": self._disk_bytes, "evictions": self.evictions,
+                    "restores": self.restores}
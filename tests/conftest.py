@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# Keep the app's files out of data/; set before any test imports the modules that read these
+_DATA = tempfile.mkdtemp(prefix="mental_math_tests_")
+for name, path in [("MENTAL_MATH_ATTEMPT_LOG", "attempts.log"),
+                   ("MENTAL_MATH_SESSION_DIR", "sessions"),
+                   ("MENTAL_MATH_REVIEW_DIR", "review"),
+                   ("MENTAL_MATH_LEADERBOARD", "leaderboard.db"),
+                   ("MENTAL_MATH_ANALYTICS_DIR", "analytics")]:
+    os.environ.setdefault(name, os.path.join(_DATA, path))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sweep", action="store_true",
+                     help="check a million operand pairs per operation and difficulty, "
+                          "and every problem index entry")
+
+
+@pytest.fixture(scope="session")
+def samples(request):
+    """Operand pairs, and at most this many index entries, per operation and difficulty."""
+    return 1_000_000 if request.config.getoption("--sweep") else 5_000
+
+
+@pytest.fixture(scope="session")
+def text_samples(request):
+    """Formatted problems per operation, difficulty and path."""
+    return 20_000 if request.config.getoption("--sweep") else 500
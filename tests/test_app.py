@@ -0,0 +1,46 @@
+"""The quiz page, run through Streamlit's AppTest."""
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from answer_pad import unmask_answer
+from answers import format_answer
+from review import ReviewSchedule, schedule_path
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_demo.py")
+
+
+def start_quiz(at):
+    next(b for b in at.button if "Start Quiz" in b.label).click().run()
+    assert not at.exception, at.exception
+    return at.session_state.session.quiz
+
+
+def test_pad_answer_after_expired_sprint():
+    """A quiz started after a sprint that ran out unanswered gets its own answer mask."""
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.run()
+    at.radio[0].set_value("Sprint").run()
+    sprint = start_quiz(at)
+    sprint.deadline = sprint.clock() - 1
+    at.run()
+    next(b for b in at.button if "Start New Quiz" in b.label).click().run()
+    at.radio[0].set_value("Fixed count").run()
+    quiz = start_quiz(at)
+    assert quiz is not sprint
+    assert unmask_answer(*at.session_state.answer_mask[1]) == float(quiz.current_exact)
+
+
+def test_no_replay_after_review():
+    """Replaying a review would move its items up the schedule again."""
+    ReviewSchedule(schedule_path("reviewer")).missed("Addition", "Easy", "3 + 4", 7, now=0)
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.query_params["user"] = "reviewer"
+    at.run()
+    at.toggle(key="use_answer_pad").set_value(False).run()
+    next(b for b in at.button if "Review Missed Problems" in b.label).click().run()
+    quiz = at.session_state.session.quiz
+    at.text_input[0].input(format_answer(quiz.current_answer)).run()
+    assert not at.exception, at.exception
+    assert quiz.complete
+    assert not any("Replay" in b.label for b in at.button)
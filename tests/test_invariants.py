@@ -0,0 +1,197 @@
+"""Answer invariants and reproducibility of every operation, over seeded samples.
+
+For each operation and difficulty it draws operand pairs from a seeded
+generator and checks them in bulk. It checks the operand ranges, that
+answers match the operation's rule (e.g. Division always has a whole
+quotient from 2 to 10, and Multiply by % rounds .5 up), and that every
+correct answer passes check(). It also checks entries of the problem index,
+including that the rounded answer passes check() against the exact one,
+and a smaller sample through the full path, from the problem text to
+parse() and back. Scalar and batch draws must agree with each other and
+repeat exactly for the same seed. Generators seeded per session must not
+affect each other, even when drawn from interleaved or from several
+threads. Nothing may touch the module-level random generator.
+
+The default samples take a few seconds. For the full sweep (a million
+pairs per operation and difficulty, and every index entry) run from the
+repository root:
+    python -m pytest tests --sweep
+"""
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from adaptive import AdaptiveQueue, SkillBook
+from operations import BASIC_OPERATIONS, get_operation, operation_names
+from problem_queue import ProblemQueue
+from problems import DIFFICULTIES, generate_problem, generate_problems, get_problem_index
+
+SEED = 0
+CASES = [(name, level) for name in operation_names() for level in DIFFICULTIES]
+
+
+@pytest.fixture(autouse=True)
+def module_random_untouched():
+    state = random.getstate()
+    yield
+    assert random.getstate() == state, "the module-level random generator was used"
+
+
+def valid(name, level, left, right, answers):
+    """Boolean mask of the (left, right, answer) rows that satisfy name's invariants."""
+    operation = get_operation(name)
+    left, right = np.asarray(left, dtype=np.int64), np.asarray(right, dtype=np.int64)
+    answers = np.asarray(answers, dtype=np.float64)
+    if name in BASIC_OPERATIONS:
+        low, high = operation.ranges[level]
+        if name == "Division":
+            quotients = left // right
+            low_q, high_q = operation.quotients
+            return ((right >= low) & (right <= high) & (left % right == 0)
+                    & (quotients >= low_q) & (quotients <= high_q) & (answers == quotients))
+        ok = (left >= low) & (left <= high) & (right >= low) & (right <= high)
+        if name == "Addition":
+            return ok & (answers == left + right)
+        if name == "Subtraction":
+            return ok & (left >= right) & (answers == left - right) & (answers >= 0)
+        return ok & (answers == left * right)
+    if name == "Ratio to %":
+        return (np.isin(right, operation.denominators[level]) & (left >= 1) & (left <= right)
+                & (np.abs(answers - 100 * left / right) <= 0.05 + 1e-9)
+                & (answers > 0) & (answers <= 100))
+    if name == "Multiply by %":
+        low, high = operation.bases[level]
+        halves = left * right % 100 == 50
+        return (np.isin(left, operation.percentages[level]) & (right >= low) & (right <= high)
+                & (np.abs(answers - left * right / 100) <= 0.5) & (answers % 1 == 0)
+                & ~(halves & (answers < left * right / 100)))
+    if name == "Ratio to Decimal":
+        return (np.isin(right, operation.denominators[level]) & (left >= 1) & (left < right)
+                & (np.abs(answers - left / right) <= 0.0005 + 1e-12)
+                & (answers > 0) & (answers < 1))
+    raise ValueError(f"No invariants for {name}")
+
+
+def check_answers(name, answers):
+    """Every correct answer is accepted, and one a whole tolerance away is not."""
+    operation = get_operation(name)
+    return all(operation.check(answer, answer)
+               and not operation.check(answer + 2 * operation.tolerance, answer)
+               for answer in answers)
+
+
+def members(name):
+    return getattr(get_operation(name), "members", None) or [name]
+
+
+@pytest.mark.parametrize("name, level", CASES)
+def test_batch(name, level, samples):
+    """Operands and answers of the batch path, checked without formatting."""
+    rng = np.random.default_rng(SEED)
+    for member in members(name):
+        concrete = get_operation(member)
+        left, right = concrete.operands_batch(level, samples, rng)
+        answers = concrete.answers_batch(level, left, right)
+        bad = int((~valid(member, level, left, right, answers)).sum())
+        assert bad == 0, f"{member} {level}: {bad:,} batch samples break the invariants"
+        assert check_answers(member, answers[:1000].tolist()), f"{member} {level}: check()"
+        # Scalar answers for the same operands must match the batch table
+        picks = rng.integers(0, samples, size=min(samples, 10_000)).tolist()
+        assert all(concrete.answer(int(left[i]), int(right[i])) == answers[i] for i in picks), \
+            f"{member} {level}: answer() and answers_batch() disagree"
+
+
+@pytest.mark.parametrize("name, level", CASES)
+def test_index(name, level, samples):
+    """Entries of the problem index, all of them if there are at most samples."""
+    index = get_problem_index(name, level)
+    if index is None:
+        pytest.skip("no index for a space this large")
+    entries = range(len(index))
+    if len(index) > samples:
+        entries = random.Random(SEED).sample(entries, samples)
+    bad = 0
+    for i in entries:
+        problem, answer = index._item(i)
+        parsed = get_operation(name).parse(problem)
+        if parsed is None or parsed[0] not in members(name):
+            bad += 1
+            continue
+        member, left, right = parsed
+        concrete = get_operation(member)
+        bad += not (left == index.left[i] and right == index.right[i]
+                    and valid(member, level, [left], [right], [answer])[0]
+                    and concrete.check(answer, concrete.exact(left, right)))
+    assert bad == 0, f"{name} {level}: {bad:,} index entries break the invariants"
+
+
+@pytest.mark.parametrize("name, level", CASES)
+def test_shown_problems(name, level, text_samples):
+    """Problems as shown, through generate_problems and generate_problem, parsed back."""
+    batch = generate_problems(name, level, text_samples, seed=SEED)
+    rng = random.Random(SEED)
+    scalar = [generate_problem(name, level, rng) for _ in range(text_samples)]
+    bad = 0
+    for problem, answer in batch + scalar:
+        parsed = get_operation(name).parse(problem)
+        if parsed is None or parsed[0] not in members(name):
+            bad += 1
+            continue
+        member, left, right = parsed
+        bad += not valid(member, level, [left], [right], [answer])[0]
+    assert bad == 0, f"{name} {level}: {bad:,} shown problems break the invariants"
+    assert generate_problems(name, level, text_samples, seed=SEED) == batch, \
+        f"{name} {level}: the same seed gave a different batch"
+    rng = random.Random(SEED)
+    assert [generate_problem(name, level, rng) for _ in range(text_samples)] == scalar, \
+        f"{name} {level}: the same seed gave different scalar problems"
+
+
+def session_problems(session_seed, draws=2000):
+    names = operation_names()
+    rng = random.Random(session_seed)
+    return [generate_problem(names[i % len(names)], DIFFICULTIES[i % 3], rng)
+            for i in range(draws)]
+
+
+def test_interleaved_sessions():
+    """Session generators don't share state: interleaved draws match solo ones."""
+    names = operation_names()
+    seeds = [SEED + i for i in range(8)]
+    rngs = {s: random.Random(s) for s in seeds}
+    interleaved = {s: [] for s in seeds}
+    for i in range(2000):
+        for s in seeds:
+            interleaved[s].append(generate_problem(names[i % len(names)], DIFFICULTIES[i % 3],
+                                                   rngs[s]))
+    assert interleaved == {s: session_problems(s) for s in seeds}
+
+
+def test_threaded_sessions():
+    """Sessions drawn on separate threads match solo ones."""
+    seeds = [SEED + i for i in range(8)]
+    threaded = {}
+    threads = [threading.Thread(target=lambda s=s: threaded.__setitem__(s, session_problems(s)))
+               for s in seeds]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert threaded == {s: session_problems(s) for s in seeds}
+
+
+@pytest.mark.parametrize("name", operation_names())
+def test_queue_replay(name):
+    queue = ProblemQueue(name, "Medium", 50, seed=SEED)
+    drawn = [queue.pop() for _ in range(120)]  # past the first refill
+    replay = queue.replay()
+    assert [replay.pop() for _ in range(120)] == drawn
+
+
+def test_adaptive_replay():
+    adaptive = AdaptiveQueue("Mixed", SkillBook(), seed=SEED)
+    drawn = [adaptive.pop() for _ in range(200)]
+    replay = adaptive.replay()
+    assert [replay.pop() for _ in range(200)] == drawn
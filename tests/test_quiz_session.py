@@ -0,0 +1,17 @@
+"""The quiz state machine, without Streamlit."""
+from problem_queue import ProblemQueue
+from quiz_session import QuizSession
+
+
+def test_failing_hook_still_advances():
+    def on_attempt(quiz, attempt):
+        raise OSError("disk full")
+
+    quiz = QuizSession(ProblemQueue("Addition", "Easy", 5, seed=0), 5,
+                       on_attempt=on_attempt).start()
+    problems = ProblemQueue("Addition", "Easy", 5, seed=0)
+    problems.pop()
+    assert quiz.submit(quiz.current_answer)
+    assert quiz.attempts == 1 and quiz.score == 1
+    assert len(quiz.history) == 1
+    assert quiz.current_problem == problems.pop()[0]
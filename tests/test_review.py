@@ -0,0 +1,16 @@
+"""The review schedule's journal."""
+from review import ReviewSchedule
+
+
+def test_torn_journal_line_is_skipped(tmp_path):
+    path = str(tmp_path / "learner.jsonl")
+    schedule = ReviewSchedule(path)
+    schedule.missed("Addition", "Easy", "3 + 4", 7, now=0)
+    with open(path, "a", encoding="utf-8") as journal:
+        journal.write('{"operation": "Addition", "diffic')
+
+    schedule = ReviewSchedule(path)
+    schedule.missed("Addition", "Easy", "5 + 6", 11, now=0)
+    assert len(schedule) == 2
+    # The torn line is gone, so the entry written after it reads back too
+    assert len(ReviewSchedule(path)) == 2
@@ -0,0 +1,239 @@
+"""Printable worksheets and answer keys, streamed to CSV, JSON Lines or PDF.
+
+Problems are drawn by generate_problems in fixed-size chunks from one seeded
+NumPy generator, and each chunk is written out before the next is drawn, so
+an export holds one chunk in memory however many problems it has. The same
+operation, difficulty, count and seed always give the same worksheet. A PDF
+gets its answer key by drawing the same problems a second time from the
+seed, instead of keeping them.
+
+Run from the repository root:
+    python -m worksheet --operation Mixed --difficulty Medium --count 10000 --seed 7 -o class.pdf
+"""
+import argparse
+import array
+import csv
+import io
+import json
+import math
+import secrets
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from answers import format_answer
+from operations import operation_names
+from problems import DIFFICULTIES, generate_problems
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "pdf": "application/pdf"}
+# Problems drawn and written per step
+CHUNK = 4096
+
+
+def iter_problems(operation, difficulty, count, seed, chunk=CHUNK):
+    """Yield count (problem, answer) pairs, chunk at a time, reproducibly from seed."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, chunk):
+        yield from generate_problems(operation, difficulty, min(chunk, count - start), seed=rng)
+
+
+def write_csv(out, problems, answers=True):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(["number", "problem", "answer"] if answers else ["number", "problem"])
+    for number, (problem, answer) in enumerate(problems, 1):
+        writer.writerow([number, problem, format_answer(answer)] if answers else [number, problem])
+    text.flush()
+    text.detach()
+
+
+def write_jsonl(out, problems, answers=True):
+    for number, (problem, answer) in enumerate(problems, 1):
+        record = {"number": number, "problem": problem}
+        if answers:
+            record["answer"] = format_answer(answer)
+        out.write(json.dumps(record, ensure_ascii=False).encode())
+        out.write(b"\n")
+
+
+class PdfWriter:
+    """Minimal PDF 1.4 writer that writes each page as soon as it is added.
+
+    Text uses the standard Helvetica fonts in WinAnsiEncoding, which covers
+    the × and ÷ signs, and content streams are deflated. Only the page
+    and offset tables (8 bytes per object) are kept until close().
+    """
+
+    WIDTH, HEIGHT = 595, 842  # A4 in points
+    _PAGES = 1  # object number of the page tree, written last
+
+    def __init__(self, out):
+        self.out = out
+        # Byte offset of each object by number; 0 is the free entry, 1 the page tree
+        self._offsets = array.array("q", [0, 0])
+        self._kids = array.array("q")
+        self._position = 0
+        self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._fonts = [self._object(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+                                    b"/Encoding /WinAnsiEncoding >>" % name)
+                       for name in (b"Helvetica", b"Helvetica-Bold")]
+
+    def _emit(self, data):
+        self.out.write(data)
+        self._position += len(data)
+
+    def _object(self, body, number=None):
+        if number is None:
+            number = len(self._offsets)
+            self._offsets.append(0)
+        self._offsets[number] = self._position
+        self._emit(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        return number
+
+    @staticmethod
+    def text(x, y, value, size=11, bold=False):
+        """Content stream operators that draw value with its baseline starting at (x, y)."""
+        escaped = (value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                   .encode("cp1252", errors="replace"))
+        return b"/F%d %d Tf 1 0 0 1 %.1f %.1f Tm (%s) Tj\n" % (2 if bold else 1, size, x, y,
+                                                           escaped)
+
+    def page(self, operators):
+        """Add a page drawn by a list of text() operators."""
+        content = zlib.compress(b"BT\n" + b"".join(operators) + b"ET\n")
+        stream = self._object(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+                              % (len(content), content))
+        fonts = b" ".join(b"/F%d %d 0 R" % (i, font) for i, font in enumerate(self._fonts, 1))
+        self._kids.append(self._object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> "
+            b"/Contents %d 0 R >>" % (self._PAGES, self.WIDTH, self.HEIGHT, fonts, stream)))
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        self._offsets[self._PAGES] = self._position
+        self._emit(b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [" % (self._PAGES, len(self._kids)))
+        for start in range(0, len(self._kids), CHUNK):
+            self._emit(b"".join(b"%d 0 R " % kid for kid in self._kids[start:start + CHUNK]))
+        self._emit(b"] >>\nendobj\n")
+        catalog = self._object(b"<< /Type /Catalog /Pages %d 0 R >>" % self._PAGES)
+        xref = self._position
+        size = len(self._offsets)
+        self._emit(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for start in range(1, size, CHUNK):
+            self._emit(b"".join(b"%010d 00000 n \n" % offset
+                                for offset in self._offsets[start:start + CHUNK]))
+        self._emit(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                   % (size, catalog, xref))
+
+
+# Worksheet pages: two columns of 25 problems; answer key pages: four columns of 50
+WORKSHEET_COLUMNS, WORKSHEET_ROWS = 2, 25
+KEY_COLUMNS, KEY_ROWS = 4, 50
+
+
+def _pages(problems, per_page):
+    page = []
+    for number, item in enumerate(problems, 1):
+        page.append((number, item))
+        if len(page) == per_page:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def write_pdf(out, operation, difficulty, count, seed, answers=True):
+    """Worksheet pages for the problems, then, with answers, the answer key pages."""
+    pdf = PdfWriter(out)
+    title = f"{operation} ({difficulty}): {count:,} problems, seed {seed}"
+    sheets = math.ceil(count / (WORKSHEET_COLUMNS * WORKSHEET_ROWS))
+    keys = math.ceil(count / (KEY_COLUMNS * KEY_ROWS)) if answers else 0
+    total = sheets + keys
+    left, top = 50, PdfWriter.HEIGHT - 60
+    column_width = (PdfWriter.WIDTH - 2 * left) / WORKSHEET_COLUMNS
+
+    def header(heading, page_number):
+        return [pdf.text(left, top, heading, size=16, bold=True),
+                pdf.text(left, top - 20, title, size=9),
+                pdf.text(left, 30, f"Page {page_number} of {total}", size=9)]
+
+    for page_number, page in enumerate(
+            _pages(iter_problems(operation, difficulty, count, seed),
+                   WORKSHEET_COLUMNS * WORKSHEET_ROWS), 1):
+        operators = header("Mental Math Worksheet", page_number)
+        operators.append(pdf.text(left, top - 40, "Name: ______________________    "
+                                                  "Date: ____________", size=11))
+        for slot, (number, (problem, _)) in enumerate(page):
+            column, row = divmod(slot, WORKSHEET_ROWS)
+            operators.append(pdf.text(left + column * column_width, top - 75 - row * 27,
+                                      f"{number}.  {problem} = __________", size=12))
+        pdf.page(operators)
+
+    if answers:
+        key_width = (PdfWriter.WIDTH - 2 * left) / KEY_COLUMNS
+        for page_number, page in enumerate(
+                _pages(iter_problems(operation, difficulty, count, seed),
+                       KEY_COLUMNS * KEY_ROWS), sheets + 1):
+            operators = header("Answer Key", page_number)
+            for slot, (number, (_, answer)) in enumerate(page):
+                column, row = divmod(slot, KEY_ROWS)
+                operators.append(pdf.text(left + column * key_width, top - 50 - row * 13.5,
+                                          f"{number}.  {format_answer(answer)}", size=9))
+            pdf.page(operators)
+    pdf.close()
+
+
+def export(out, fmt, operation, difficulty, count, seed=None, answers=True):
+    """Write a worksheet to the binary stream out; returns the seed it was drawn from."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    seed = secrets.randbits(63) if seed is None else seed
+    if fmt == "pdf":
+        write_pdf(out, operation, difficulty, count, seed, answers)
+    elif fmt == "csv":
+        write_csv(out, iter_problems(operation, difficulty, count, seed), answers)
+    else:
+        write_jsonl(out, iter_problems(operation, difficulty, count, seed), answers)
+    return seed
+
+
+def export_bytes(fmt, operation, difficulty, count, seed=None, answers=True):
+    """The whole worksheet as bytes, for a download button."""
+    out = io.BytesIO()
+    export(out, fmt, operation, difficulty, count, seed, answers)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operation", default="Mixed", choices=operation_names())
+    parser.add_argument("--difficulty", default="Medium", choices=DIFFICULTIES)
+    parser.add_argument("--count", type=int, default=100, help="number of problems")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible worksheet")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="output format (default: from the file extension, else csv)")
+    parser.add_argument("--no-answers", action="store_true", help="leave out the answers")
+    parser.add_argument("-o", "--output", default="-", help="file to write, - for stdout")
+    args = parser.parse_args()
+
+    fmt = args.format or args.output.rpartition(".")[2].lower()
+    if fmt not in FORMATS:
+        fmt = "csv"
+    start = time.perf_counter()
+    if args.output == "-":
+        seed = export(sys.stdout.buffer, fmt, args.operation, args.difficulty, args.count,
+                      args.seed, not args.no_answers)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as out:
+            seed = export(out, fmt, args.operation, args.difficulty, args.count, args.seed,
+                          not args.no_answers)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.count:,} problems as {fmt} to {args.output} (seed {seed}) "
+          f"in {seconds:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()